@@ -27,7 +27,9 @@ done
 source /root/.venv/bin/activate
 
 python3 -m fuzz.fmt_recovery.rearrange_dualrecord $TMP_DIR
-python3 -m fuzz.fmt_recovery ${TEE} $TMP_DIR/out $TMP_DIR/out
+# ioctl dirs whose recordings did not change since the last run are taken
+# from its results in $OUT_DIR instead of being processed again
+python3 -m fuzz.fmt_recovery -j "$(nproc)" --cache $OUT_DIR ${TEE} $TMP_DIR/out $TMP_DIR/out
 
 for d in `find ${TMP_DIR}/out -maxdepth 1 -mindepth 1 -type d`;
 do
@@ -37,4 +39,8 @@ do
   fi
 done
 
-mv $TMP_DIR/out/* $OUT_DIR
+for d in `find ${TMP_DIR}/out -maxdepth 1 -mindepth 1 -type d`;
+do
+  rm -rf $OUT_DIR/`basename $d`
+  mv $d $OUT_DIR
+done
@@ -9,6 +9,7 @@
 #define TEEZZ_CMD_SEND 0x02
 #define TEEZZ_CMD_END 0x03
 #define TEEZZ_CMD_TERMINATE 0x04
+#define TEEZZ_CMD_SEND_BATCH 0x05
 
 enum EXECUTOR_STATUS {
     EXECUTOR_SUCCESS = 42,
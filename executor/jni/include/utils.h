@@ -73,6 +73,16 @@ ssize_t send_len_val(int sock, char *buf, size_t sz);
 ssize_t send_buf(int sock, char *buf, size_t sz);
 
 ssize_t parse_lv(data_stream_t *ds, char **val);
+
+/* Point `item` to the next length-value-encoded item of the batch `ds`.
+ *
+ * `item` borrows its data from `ds` and must not be passed to `ds_deinit`.
+ *
+ * \param ds data stream holding the batch
+ * \param item data stream to be initialized with the next item
+ * \param return 1 if an item was parsed, 0 if `ds` is exhausted, -1 on error
+ */
+int ds_next_item(data_stream_t *ds, data_stream_t *item);
 int recv_buf(int sock, char *buf, size_t sz);
 
 /* Same as read_data, but with "enhanced" logging
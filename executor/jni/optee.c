@@ -451,6 +451,30 @@ int optee_execute(int data_sock)
                 goto err;
             }
             break;
+        case TEEZZ_CMD_SEND_BATCH:
+            LOGD(" ### TEEZZ_CMD_SEND_BATCH ###");
+            // the payload is a sequence of length-value-encoded
+            // `TEEZZ_CMD_SEND` payloads. We answer each of them as soon as
+            // it is executed, so the host can consume results while we
+            // execute the remaining ones.
+            {
+                data_stream_t item_ds = {0};
+                int has_item = 0;
+                while ((has_item = ds_next_item(in_ds, &item_ds)) == 1)
+                {
+                    ds_reset(out_ds);
+                    if (optee_cmd_send(&item_ds, out_ds, OPTEE_STATE.libteec, &OPTEE_STATE.ctx, &sess) != 0)
+                        goto err;
+                    if (send_buf(data_sock, out_ds->data, out_ds->pos) < 0)
+                    {
+                        LOGE("send_buf: error sending output data");
+                        goto err;
+                    }
+                }
+                if (has_item < 0)
+                    goto err;
+            }
+            break;
         case TEEZZ_CMD_END:
             LOGD(" ### TEEZZ_CMD_END ###");
             is_end = 1;
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Microbenchmark for `TEEZZ_CMD_SEND_BATCH`.
+
+Runs sequences of `TEEZZ_CMD_SEND` interactions against the local echo
+executor (`echo.c`), once with one round trip per interaction and once with
+all interactions of a sequence shipped in a single batch.
+
+    make echo
+    ./echo 4243 > /dev/null &
+    python3 bench_batch.py --port 4243
+
+Use `--delay` to emulate the round-trip time of an `adb forward` connection.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import logging
+
+ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "..")
+)
+sys.path.append(ROOT)
+
+from fuzz.runner.runner import Runner  # noqa: E402
+from fuzz.runner.sockreader import SocketReader  # noqa: E402
+from fuzz.runner.sessionmeta import OPTEESessionMetaData  # noqa: E402
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class DelayedSocket(socket.socket):
+    """Socket adding a fixed latency to every message it sends."""
+
+    DELAY = 0.0
+
+    def sendall(self, msg, *args):
+        time.sleep(self.DELAY)
+        return super().sendall(msg, *args)
+
+
+class DelayedRunner(Runner):
+    """`Runner` talking to the target through a `DelayedSocket`."""
+
+    def _connect(self):
+        self.socket = DelayedSocket()
+        self.socket.connect((self._host, self._port))
+        self.socket.settimeout(10.0)
+        self._reader = SocketReader(self.socket)
+
+
+def bench(host, port, seqlen, sz, iters, batch):
+    session_meta = OPTEESessionMetaData("00" * 16)
+    inps = [os.urandom(sz) for _ in range(seqlen)]
+    runner = DelayedRunner(host, port, session_meta)
+    nexecs = 0
+    tstart = time.perf_counter()
+    for _ in range(iters):
+        with runner:
+            if batch:
+                results = runner.run_batch(inps)
+            else:
+                results = (runner.run(inp) for inp in inps)
+            for inp, (status, response) in zip(inps, results):
+                assert response == inp, "echo mismatch"
+                nexecs += 1
+    return nexecs / (time.perf_counter() - tstart)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4243)
+    parser.add_argument("-n", "--iters", type=int, default=100)
+    parser.add_argument("-s", "--size", type=int, default=256)
+    parser.add_argument(
+        "-d",
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Latency in ms added to every message sent to the target.",
+    )
+    parser.add_argument(
+        "-l",
+        "--seqlens",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16],
+        help="Sequence lengths.",
+    )
+    args = parser.parse_args()
+    DelayedSocket.DELAY = args.delay / 1000
+
+    print(f"{'seqlen':>6} {'single [ex/s]':>14} {'batch [ex/s]':>13} {'speedup':>8}")
+    for seqlen in args.seqlens:
+        single = bench(
+            args.host, args.port, seqlen, args.size, args.iters, False
+        )
+        batch = bench(args.host, args.port, seqlen, args.size, args.iters, True)
+        print(f"{seqlen:>6} {single:>14.1f} {batch:>13.1f} {batch / single:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
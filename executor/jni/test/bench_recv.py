@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Microbenchmark for the host-side receive path.
+
+Runs `TEEZZ_CMD_SEND` round trips against the local echo executor (`echo.c`)
+and compares the buffered `SocketReader` used by `Runner` with the previous
+`select()`/`bytes +=` receive loop.
+
+    make echo
+    ./echo 4243 > /dev/null &
+    python3 bench_recv.py --port 4243
+"""
+import os
+import sys
+import time
+import socket
+import select
+import argparse
+import logging
+
+ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "..")
+)
+sys.path.append(ROOT)
+
+from fuzz.runner.runner import Runner  # noqa: E402
+from fuzz.runner.sessionmeta import OPTEESessionMetaData  # noqa: E402
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+
+class LegacyRunner(Runner):
+    """`Runner` using the receive loop prior to `SocketReader`."""
+
+    def _recv_exact(self, sz):
+        out = b""
+        self.socket.setblocking(0)
+        tstart = time.time()
+        while len(out) != sz:
+            if tstart + 10.0 < time.time():
+                raise socket.timeout()
+            ready = select.select([self.socket], [], [], 10)
+            if ready[0]:
+                out += self.socket.recv(sz - len(out))
+        return out
+
+
+def bench(runner_cls, host, port, sz, iters):
+    session_meta = OPTEESessionMetaData("00" * 16)
+    inp = os.urandom(sz)
+    runner = runner_cls(host, port, session_meta)
+    with runner:
+        tstart = time.perf_counter()
+        for _ in range(iters):
+            status, response = runner.run(inp)
+        tdiff = time.perf_counter() - tstart
+        assert response == inp, "echo mismatch"
+    return tdiff
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4243)
+    parser.add_argument("-n", "--iters", type=int, default=200)
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[64, 4 * 1024, 64 * 1024, 256 * 1024],
+        help="Payload sizes in bytes.",
+    )
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'legacy [ms]':>12} {'buffered [ms]':>14} {'speedup':>8}")
+    for sz in args.sizes:
+        t_legacy = bench(LegacyRunner, args.host, args.port, sz, args.iters)
+        t_buffered = bench(Runner, args.host, args.port, sz, args.iters)
+        print(
+            f"{sz:>10} {1000 * t_legacy / args.iters:>12.3f} "
+            f"{1000 * t_buffered / args.iters:>14.3f} "
+            f"{t_legacy / t_buffered:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
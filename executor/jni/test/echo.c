@@ -1,27 +1,85 @@
-#include "logging.h"
-#include "mytc.h"
-#include "utils.h"
+#include <logging.h>
+#include <utils.h>
+#include <executor.h>
 #include <arpa/inet.h>
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include <sys/socket.h>
 #include <unistd.h>
 
-int handle_client(int sock) {
-    char *buf = NULL;
-    size_t sz = 0;
+/* Local stand-in for the executor's data connection.
+ *
+ * Speaks the same TLV protocol as the real executor but, instead of talking
+ * to a TEE, echoes the payload of every `TEEZZ_CMD_SEND` (and every item of a
+ * `TEEZZ_CMD_SEND_BATCH`) back to the host framed like a regular response
+ * (status, size, content). Used to benchmark the host-side communication
+ * without a device.
+ */
+
+static int echo(int sock, data_stream_t *out_ds, char *data, uint32_t sz) {
+    int status = EXECUTOR_SUCCESS;
+
+    ds_reset(out_ds);
+    ds_write(out_ds, (char *)&status, sizeof(int));
+    ds_write(out_ds, (char *)&sz, sizeof(uint32_t));
+    ds_write(out_ds, data, sz);
+    if (send_buf(sock, out_ds->data, out_ds->pos) < 0) {
+        LOGE("send_buf: error sending output data");
+        return -1;
+    }
+    return 0;
+}
 
-    read_data(sock, &buf, &sz);
+static int handle_client(int sock) {
+    char cmd = 0;
+    uint32_t sz = 0;
+    char *data = NULL;
+    data_stream_t *out_ds = NULL;
+    int ret = 0;
+
+    out_ds = ds_init(32);
+    if (out_ds == NULL) {
+        LOGE("ds_init: error allocating output ds");
+        return -1;
+    }
 
-    printf("size: %lu\n", sz);
+    while (1) {
+        if (recv_tlv(sock, &cmd, &sz, &data)) {
+            LOGE("recv_tlv: error receiving tlv data");
+            ret = -1;
+            break;
+        }
+
+        if (cmd == TEEZZ_CMD_SEND) {
+            if (echo(sock, out_ds, data, sz) < 0) {
+                ret = -1;
+                break;
+            }
+        } else if (cmd == TEEZZ_CMD_SEND_BATCH) {
+            data_stream_t batch_ds = {.data = data, .sz = sz, .pos = 0};
+            data_stream_t item_ds = {0};
+            int has_item = 0;
+            while ((has_item = ds_next_item(&batch_ds, &item_ds)) == 1) {
+                if (echo(sock, out_ds, item_ds.data, item_ds.sz) < 0)
+                    break;
+            }
+            if (has_item != 0) {
+                ret = -1;
+                break;
+            }
+        } else if (cmd == TEEZZ_CMD_END || cmd == TEEZZ_CMD_TERMINATE) {
+            break;
+        }
+    }
 
-    send(sock, buf, sz, 0);
-    return 0;
+    free(data);
+    ds_deinit(out_ds);
+    return ret;
 }
 
 int main(int argc, char **argv) {
-    int sockfd, client_sock, c, ret;
-    ssize_t nread, msg;
+    int sockfd, client_sock, c;
     struct sockaddr_in server, client;
 
     if (argc != 2) {
@@ -49,34 +107,27 @@ int main(int argc, char **argv) {
         exit(EXIT_FAILURE);
     }
 
-    LOGD("bind done\n");
+    LOGD("bind done");
 
     if (listen(sockfd, 3) == -1) {
         perror("listen");
         exit(EXIT_FAILURE);
     }
 
-    LOGD("Waiting for incoming connections...\n");
+    while (1) {
+        LOGD("Waiting for incoming connections...");
 
-    c = sizeof(struct sockaddr_in);
+        c = sizeof(struct sockaddr_in);
+        if ((client_sock = accept(sockfd, (struct sockaddr *)&client,
+                                  (socklen_t *)&c)) == -1) {
+            perror("accept");
+            exit(EXIT_FAILURE);
+        }
 
-    if ((client_sock = accept(sockfd, (struct sockaddr *)&client,
-                              (socklen_t *)&c)) == -1) {
-        perror("accept");
-        exit(EXIT_FAILURE);
-    }
-
-    LOGD("Connection accepted\n");
-
-    ret = handle_client(client_sock);
-
-    if (ret == 0) {
-        LOGD("Disconnecting client\n");
-        fflush(stdout);
-        close(client_sock);
-    } else if (ret == -1) {
+        LOGD("Connection accepted");
+        handle_client(client_sock);
+        LOGD("Disconnecting client");
         close(client_sock);
-        exit(EXIT_FAILURE);
     }
 
     exit(EXIT_SUCCESS);
@@ -122,13 +122,14 @@ int recv_buf(int sock, char *buf, size_t sz) {
  * \param return number of bytes written, -1 on error */
 ssize_t send_buf(int sock, char *buf, size_t sz) {
     size_t nwrite = 0;
+    ssize_t ret = 0;
 
     while (nwrite < sz) {
-        if (write(sock, &buf[nwrite], 1) == -1) {
+        if ((ret = write(sock, &buf[nwrite], sz - nwrite)) == -1) {
             perror("write");
             return -1;
         }
-        nwrite++; 
+        nwrite += ret;
     }
     return nwrite;
 }
@@ -159,6 +160,24 @@ err:
     return -1;
 }
 
+int ds_next_item(data_stream_t *ds, data_stream_t *item) {
+    ssize_t sz = 0;
+    char *buf = NULL;
+
+    if (ds->pos == ds->sz)
+        return 0;
+
+    if ((sz = parse_lv(ds, &buf)) < 0) {
+        LOGE("parse_lv: error parsing batch item");
+        return -1;
+    }
+
+    item->data = buf;
+    item->sz = (uint32_t)sz;
+    item->pos = 0;
+    return 1;
+}
+
 ssize_t send_len_val(int sock, char *buf, size_t sz) {
     size_t nwrite = 0;
 
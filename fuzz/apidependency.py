@@ -1,4 +1,5 @@
 from __future__ import annotations
+import copy
 import logging
 import os
 from collections import UserList
@@ -18,6 +19,13 @@ class IoctlCallSequence(list):
         list.__init__(self, *args)
         self.dump_ids: List[int] = []
 
+    def copy(self) -> IoctlCallSequence:
+        """Returns a copy whose value dependencies can be modified without
+        affecting `self`. The `ValueDependency` objects are shared."""
+        seq = IoctlCallSequence(call.copy() for call in self)
+        seq.dump_ids = list(self.dump_ids)
+        return seq
+
     def get_elem_by_dump_id(self, dump_id: int) -> Optional[IoctlCall]:
         for elem in self:
             if dump_id == elem.dump_id:
@@ -88,6 +96,12 @@ class IoctlCall:
         out += "}"
         return out
 
+    def copy(self) -> IoctlCall:
+        """Returns a shallow copy with its own list of value dependencies."""
+        call = copy.copy(self)
+        call.value_dependencies = ValueDependencies(self.value_dependencies)
+        return call
+
     @property
     def relative_path(self):
         if self._is_dump_backed:
@@ -0,0 +1,268 @@
+"""Replays crashes on a pool of devices or tcp executors and buckets them.
+
+Every crash sequence is replayed `-k` times on one of the targets to measure
+how reliably it reproduces. On adb targets, the TEE log is captured for each
+crash and the crash is bucketed by the signature of its backtrace, see
+`fuzz.triaging.signature`.
+
+    python -m fuzz.batchtriage --out /tmp/triage -D DEV1 DEV2 -k 3 \\
+        tc fuzz/config/tc/tc_km.json /tmp/out/tc/*/crashes
+
+Results go to `<out>/triage/results.jsonl` as they come in, a second run
+with the same `--out` skips crashes triaged before. `report.json` and
+`report.txt` list the buckets, largest first.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fuzz.campaign import assign_ports
+from fuzz.utils import mkdir_p
+
+
+FORMAT = (
+    "%(asctime)s,%(msecs)d %(levelname)-8s "
+    "[%(filename)s:%(lineno)d] %(message)s"
+)
+log = logging.getLogger(__name__)
+
+RESULTS_NAME = "results.jsonl"
+# bucket of crashes that did not reproduce
+UNREPRODUCIBLE = "unreproducible"
+# bucket of crashes that reproduced by taking the target down, without a
+# backtrace or a crashing interaction to tell them apart
+TARGET_DIED = "target-died"
+# buckets that are no unique crashes, listed last in this order
+UNSIGNED = (TARGET_DIED, UNREPRODUCIBLE)
+
+
+def find_crashes(paths: List[str]) -> List[str]:
+    """Returns the crash sequences in `paths`. A path is either a crash
+    sequence (`id:...`) or a folder searched for `crashes` folders."""
+    crashes = []
+    for path in paths:
+        path = os.path.normpath(path)
+        if os.path.basename(path).startswith("id:"):
+            crashes.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            if os.path.basename(root) == "crashes":
+                crashes.extend(
+                    os.path.join(root, n)
+                    for n in sorted(dirs + files)
+                    if n.startswith("id:")
+                )
+            # crash sequences are no folders to search
+            dirs[:] = [d for d in dirs if not d.startswith("id:")]
+    return crashes
+
+
+def crash_name(crash: str) -> str:
+    """Returns a name of `crash` that is unique across instances."""
+    parts = os.path.normpath(crash).split(os.sep)
+    return "_".join(p.replace(":", "").replace(",", "_") for p in parts[-3:])
+
+
+def load_results(path: str) -> Dict[str, dict]:
+    results = {}
+    if os.path.isfile(path):
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # cut short while writing
+                    continue
+                results[result["crash"]] = result
+    return results
+
+
+def bucket_results(results: List[dict]) -> Dict[str, dict]:
+    """Groups `results` by signature, the largest bucket first."""
+    buckets = defaultdict(lambda: {"frames": [], "crashes": []})
+    for result in results:
+        signature = result["signature"]
+        if signature is None:
+            signature = TARGET_DIED if result["reproduced"] else UNREPRODUCIBLE
+        bucket = buckets[signature]
+        bucket["frames"] = list(result["frames"])
+        bucket["crashes"].append(
+            {
+                "crash": result["crash"],
+                "reproducibility": result["reproduced"] / result["runs"],
+            }
+        )
+    for bucket in buckets.values():
+        bucket["crashes"].sort(key=lambda c: -c["reproducibility"])
+    return dict(
+        sorted(
+            buckets.items(),
+            key=lambda b: (
+                UNSIGNED.index(b[0]) if b[0] in UNSIGNED else -1,
+                -len(b[1]["crashes"]),
+            ),
+        )
+    )
+
+
+def write_report(out_dir: str, buckets: Dict[str, dict]) -> None:
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(buckets, f, indent=2)
+    with open(os.path.join(out_dir, "report.txt"), "w") as f:
+        nbuckets = sum(1 for s in buckets if s not in UNSIGNED)
+        f.write(f"Unique crashes: {nbuckets}\n")
+        for signature, bucket in buckets.items():
+            f.write("-----------------------\n")
+            f.write(f"{signature} ({len(bucket['crashes'])} crashes)\n")
+            for frame in bucket["frames"]:
+                f.write(f"    {frame}\n")
+            for crash in bucket["crashes"]:
+                rate = crash["reproducibility"]
+                f.write(f"  {rate:4.0%} {crash['crash']}\n")
+
+
+def _worker(
+    args, device_id: Optional[str], port: int, jobs, results
+) -> None:
+    # imported here, the parent does not need a device connection
+    from fuzz.runner.triagerunner import TriageRunner
+
+    logging.basicConfig(
+        format=FORMAT, datefmt="%Y-%m-%d:%H:%M:%S", level=logging.INFO
+    )
+    with open(args.config, "r") as config:
+        runner = TriageRunner(
+            args.target_tee, port, config, args._out, device_id
+        )
+    while True:
+        crash = jobs.get()
+        if crash is None:
+            break
+        log_dir = os.path.join(args._out, "triage", "logs", crash_name(crash))
+        mkdir_p(log_dir)
+        try:
+            result = runner.replay(crash, args.replays, log_dir)._asdict()
+        except Exception as e:
+            log.error(f"Replaying {crash} failed: {e}")
+            continue
+        result["target"] = device_id or f"tcp:{port}"
+        results.put(result)
+
+
+def setup_args():
+    """Returns an initialized argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Replay crashes in parallel and bucket them by signature."
+    )
+    parser.add_argument("target_tee", help="Target tee (optee, qsee or tc).")
+    parser.add_argument("config", help="Target config file.")
+    parser.add_argument(
+        "crashes",
+        nargs="+",
+        help="Crash seqs or folders holding `crashes` folders.",
+    )
+    parser.add_argument(
+        "--out",
+        required=True,
+        dest="_out",
+        help="Directory used to write output to.",
+    )
+    parser.add_argument(
+        "-D",
+        "--devices",
+        nargs="+",
+        help="Android device ids (adb devices) to replay on.",
+    )
+    parser.add_argument(
+        "-P",
+        "--ports",
+        nargs="+",
+        type=int,
+        help="Ports of running tcp executors to replay on.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=4242,
+        help="First port to assign to the devices.",
+    )
+    parser.add_argument(
+        "-k",
+        "--replays",
+        type=int,
+        default=3,
+        help="Number of replays per crash.",
+    )
+    return parser
+
+
+def main():
+    logging.basicConfig(
+        format=FORMAT, datefmt="%Y-%m-%d:%H:%M:%S", level=logging.INFO
+    )
+
+    arg_parser = setup_args()
+    args = arg_parser.parse_args()
+    if bool(args.devices) == bool(args.ports):
+        arg_parser.error("give either --devices or --ports")
+
+    triage_dir = os.path.join(args._out, "triage")
+    mkdir_p(triage_dir)
+    results_path = os.path.join(triage_dir, RESULTS_NAME)
+    done = load_results(results_path)
+    todo = [c for c in find_crashes(args.crashes) if c not in done]
+    log.info(f"Triaging {len(todo)} crashes, {len(done)} done before.")
+
+    if args.devices:
+        ports = assign_ports(args.port, len(args.devices))
+        targets = list(zip(args.devices, ports))
+    else:
+        targets = [(None, port) for port in args.ports]
+
+    jobs = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    for crash in todo:
+        jobs.put(crash)
+    workers = []
+    for device_id, port in targets:
+        jobs.put(None)
+        worker = multiprocessing.Process(
+            target=_worker, args=(args, device_id, port, jobs, results)
+        )
+        worker.start()
+        workers.append(worker)
+
+    ntriaged = 0
+    with open(results_path, "a") as f:
+        while any(w.is_alive() for w in workers) or not results.empty():
+            try:
+                result = results.get(timeout=1)
+            except queue.Empty:
+                continue
+            done[result["crash"]] = result
+            f.write(json.dumps(result) + "\n")
+            f.flush()
+            ntriaged += 1
+    for worker in workers:
+        worker.join()
+        if worker.exitcode:
+            log.error(f"A worker died ({worker.exitcode}).")
+
+    buckets = bucket_results(list(done.values()))
+    write_report(triage_dir, buckets)
+    log.info(
+        f"Triaged {ntriaged}/{len(todo)} crashes, "
+        f"{sum(1 for s in buckets if s not in UNSIGNED)} unique."
+    )
+    sys.exit(0 if ntriaged == len(todo) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Runs a fuzzing campaign of several `fuzz.fuzz` instances in parallel.
+
+Every instance is a separate `fuzz.fuzz` process fuzzing one device (adb) or
+one local executor (tcp). Instances get a pair of ports (`port` for the
+forkserver, `port + 1` for the data connection) assigned automatically,
+share the seed corpus given with `--in` and write to their own subfolder of
+`--out`. With `-S`, they import each other's queue entries periodically.
+Instances that die are restarted and resume from their queue.
+
+    python -m fuzz.campaign --out /tmp/out -D DEV1 DEV2 -- \\
+        optee fuzz/config/optee/optee_km.json -m dumb --in /tmp/in -d 3600 \\
+        -S 60
+
+For the tcp target, `--executor` spawns a local executor per instance, e.g.,
+`--executor "./executor/jni/test/executor {port}"`.
+"""
+import argparse
+import logging
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import time
+
+from typing import List, Optional
+
+from fuzz.utils import mkdir_p
+
+
+FORMAT = (
+    "%(asctime)s,%(msecs)d %(levelname)-8s "
+    "[%(filename)s:%(lineno)d] %(message)s"
+)
+log = logging.getLogger(__name__)
+
+
+class CampaignException(Exception):
+    pass
+
+
+def is_port_pair_free(port: int, host: str = "127.0.0.1") -> bool:
+    """`True` if neither `port` nor `port + 1` is in use on `host`."""
+    for p in (port, port + 1):
+        with socket.socket() as s:
+            # the executor reuses ports in TIME_WAIT, too
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                s.bind((host, p))
+            except OSError:
+                return False
+    return True
+
+
+def assign_ports(base_port: int, n: int) -> List[int]:
+    """Returns `n` ports, each followed by a free port, starting at
+    `base_port`."""
+    ports = []
+    port = base_port
+    while len(ports) < n:
+        if port + 1 > 0xFFFF:
+            raise CampaignException(f"Ran out of ports after {base_port}.")
+        if is_port_pair_free(port):
+            ports.append(port)
+        port += 2
+    return ports
+
+
+class CampaignInstance(object):
+    """A `fuzz.fuzz` process and, optionally, its local executor."""
+
+    def __init__(
+        self,
+        name: str,
+        port: int,
+        cmd: List[str],
+        log_dir: str,
+        executor_cmd: Optional[List[str]] = None,
+    ):
+        self.name = name
+        self.port = port
+        self.cmd = cmd
+        self.executor_cmd = executor_cmd
+        self.log_path = os.path.join(log_dir, f"{name}.log")
+        self.restarts = 0
+        self.returncode: Optional[int] = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._executor: Optional[subprocess.Popen] = None
+        self._logf = None
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def done(self) -> bool:
+        """`True` if the instance finished its run successfully."""
+        return self.returncode == 0
+
+    def start(self) -> None:
+        self.returncode = None
+        self._logf = open(self.log_path, "ab")
+        if self.executor_cmd:
+            self._executor = subprocess.Popen(
+                self.executor_cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=self._logf,
+                stderr=subprocess.STDOUT,
+            )
+            self._wait_for_executor()
+        log.info(f"Starting {self.name} on port {self.port}.")
+        # no stdin, so a debugger breakpoint in the instance fails instead of
+        # blocking it forever
+        self._proc = subprocess.Popen(
+            self.cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=self._logf,
+            stderr=subprocess.STDOUT,
+        )
+
+    def _wait_for_executor(self, timeout: float = 10.0) -> None:
+        tstart = time.monotonic()
+        while time.monotonic() - tstart < timeout:
+            if self._executor.poll() is not None:
+                break
+            try:
+                socket.create_connection(("127.0.0.1", self.port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CampaignException(f"Executor of {self.name} did not come up.")
+
+    def poll(self) -> Optional[int]:
+        """Returns the exit code of the instance if it exited, `None`
+        otherwise."""
+        if self._proc is None:
+            return self.returncode
+        returncode = self._proc.poll()
+        if returncode is not None:
+            self.returncode = returncode
+            self._cleanup()
+        return returncode
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if self.running:
+            log.info(f"Stopping {self.name}.")
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+            self.returncode = self._proc.returncode
+        self._cleanup()
+
+    def _cleanup(self) -> None:
+        self._proc = None
+        if self._executor is not None:
+            self._executor.kill()
+            self._executor.wait()
+            self._executor = None
+        if self._logf is not None:
+            self._logf.close()
+            self._logf = None
+
+
+class Campaign(object):
+    """Runs `instances` until all of them finished, restarting instances that
+    exit with an error at most `max_restarts` times."""
+
+    def __init__(
+        self,
+        instances: List[CampaignInstance],
+        max_restarts: int = 5,
+        restart_delay: float = 10.0,
+        poll_interval: float = 1.0,
+    ):
+        self.instances = instances
+        self._max_restarts = max_restarts
+        self._restart_delay = restart_delay
+        self._poll_interval = poll_interval
+        # instance name -> earliest restart time
+        self._pending = {}
+
+    def _start(self, instance: CampaignInstance) -> None:
+        try:
+            instance.start()
+        except CampaignException as e:
+            log.error(e)
+            instance.stop()
+            # handled like an instance that died right away
+            instance.returncode = -1
+
+    def _failed(self, instance: CampaignInstance) -> bool:
+        return (
+            not instance.done
+            and instance.returncode is not None
+            and instance.restarts >= self._max_restarts
+        )
+
+    def _finished(self) -> bool:
+        return all(i.done or self._failed(i) for i in self.instances)
+
+    def _step(self) -> None:
+        now = time.monotonic()
+        for instance in self.instances:
+            if instance.name in self._pending:
+                if now >= self._pending[instance.name]:
+                    del self._pending[instance.name]
+                    instance.restarts += 1
+                    self._start(instance)
+                continue
+            if instance.running or instance.done or self._failed(instance):
+                continue
+            returncode = instance.poll()
+            if returncode is None or returncode == 0:
+                continue
+            if instance.restarts >= self._max_restarts:
+                log.error(
+                    f"{instance.name} died ({returncode}), giving up after "
+                    f"{instance.restarts} restarts."
+                )
+                continue
+            log.warning(
+                f"{instance.name} died ({returncode}), restarting in "
+                f"{self._restart_delay}s."
+            )
+            self._pending[instance.name] = now + self._restart_delay
+
+    def run(self) -> bool:
+        """Returns `True` if all instances finished successfully."""
+        for instance in self.instances:
+            self._start(instance)
+        try:
+            while not self._finished():
+                self._step()
+                time.sleep(self._poll_interval)
+        finally:
+            for instance in self.instances:
+                instance.stop()
+        return all(i.done for i in self.instances)
+
+
+def build_instances(args) -> List[CampaignInstance]:
+    if args.devices:
+        targets = [d for d in args.devices for _ in range(args.jobs)]
+    else:
+        targets = [None] * args.jobs
+    ports = assign_ports(args.port, len(targets))
+    log_dir = os.path.join(args._out, "campaign")
+    mkdir_p(log_dir)
+
+    instances = []
+    for device_id, port in zip(targets, ports):
+        name = f"{device_id or 'tcp'}-{port}"
+        cmd = [sys.executable, "-m", "fuzz.fuzz"]
+        cmd += ["adb" if device_id else "tcp"] + args.fuzz_args
+        cmd += ["--out", args._out, "--port", str(port), "--instance", name]
+        if device_id:
+            cmd.append(device_id)
+        executor_cmd = None
+        if args.executor:
+            executor_cmd = shlex.split(args.executor.format(port=port))
+        instances.append(
+            CampaignInstance(name, port, cmd, log_dir, executor_cmd)
+        )
+    return instances
+
+
+def setup_args():
+    """Returns an initialized argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Run several fuzzer instances in parallel. Arguments "
+        "after `--` are passed on to every `fuzz.fuzz` instance."
+    )
+    parser.add_argument(
+        "--out",
+        required=True,
+        dest="_out",
+        help="Directory used to write output to.",
+    )
+    parser.add_argument(
+        "-D",
+        "--devices",
+        nargs="+",
+        help="Android device ids (adb devices). Fuzz the tcp target if not "
+        "given.",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of instances per device, or of tcp instances.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=4242,
+        help="First port to assign. Every instance uses two ports.",
+    )
+    parser.add_argument(
+        "--executor",
+        help="Command spawning a local executor for each tcp instance. "
+        "`{port}` is replaced with the instance's port.",
+    )
+    parser.add_argument(
+        "--max-restarts",
+        type=int,
+        default=5,
+        help="Give up on an instance after this many restarts.",
+    )
+    parser.add_argument(
+        "--restart-delay",
+        type=float,
+        default=10.0,
+        help="Seconds to wait before restarting a dead instance.",
+    )
+    parser.add_argument("fuzz_args", nargs=argparse.REMAINDER)
+    return parser
+
+
+def main():
+    logging.basicConfig(
+        format=FORMAT, datefmt="%Y-%m-%d:%H:%M:%S", level=logging.DEBUG
+    )
+
+    arg_parser = setup_args()
+    args = arg_parser.parse_args()
+    if args.fuzz_args and args.fuzz_args[0] == "--":
+        args.fuzz_args = args.fuzz_args[1:]
+    if not args.fuzz_args:
+        arg_parser.error("missing arguments for the fuzzer instances")
+    if args.devices and args.executor:
+        arg_parser.error("--executor only applies to the tcp target")
+
+    campaign = Campaign(
+        build_instances(args),
+        max_restarts=args.max_restarts,
+        restart_delay=args.restart_delay,
+    )
+    try:
+        ok = campaign.run()
+    except KeyboardInterrupt:
+        ok = False
+    for instance in campaign.instances:
+        log.info(
+            f"{instance.name}: exit code {instance.returncode}, "
+            f"{instance.restarts} restarts"
+        )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ class TEEZZ_CMD(object):
     TEEZZ_CMD_SEND = p8(0x02)
     TEEZZ_CMD_END = p8(0x03)
     TEEZZ_CMD_TERMINATE = p8(0x04)
+    TEEZZ_CMD_SEND_BATCH = p8(0x05)
 
 
 class TEEID(object):
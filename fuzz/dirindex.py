@@ -0,0 +1,128 @@
+"""Cached, in-process directory walks.
+
+The format-recovery stages query the same recording trees over and over.
+Instead of forking `find` for every query, `DirIndex` lists every directory
+once with `os.scandir` and keeps the entries together with the directory's
+mtime. Adding, removing or renaming an entry changes the mtime of the
+directory containing it, so a later walk only stats the cached directories
+and lists again the ones that changed.
+
+Directory timestamps are coarse on some file systems, an entry added right
+after a directory was listed may leave its mtime unchanged. A listing is
+thus only trusted if the directory had not been modified for `RACY_NS`
+before it was listed.
+"""
+from __future__ import annotations
+import os
+import stat
+import time
+
+from typing import Dict, Iterator, List, Tuple, Union
+
+
+RACY_NS = 2 * 10**9
+
+# kinds of entries, as `find -type` names them
+FILE = "f"
+DIR = "d"
+OTHER = ""
+
+Entry = Tuple[bytes, str]
+
+
+def _kind(mode: int) -> str:
+    if stat.S_ISREG(mode):
+        return FILE
+    if stat.S_ISDIR(mode):
+        return DIR
+    return OTHER
+
+
+class _Listing(object):
+    __slots__ = ("mtime_ns", "listed_ns", "entries")
+
+    def __init__(self, mtime_ns: int, listed_ns: int, entries: List[Entry]):
+        self.mtime_ns = mtime_ns
+        self.listed_ns = listed_ns
+        self.entries = entries
+
+    def is_fresh(self, mtime_ns: int) -> bool:
+        return (
+            mtime_ns == self.mtime_ns
+            and mtime_ns + RACY_NS <= self.listed_ns
+        )
+
+
+class DirIndex(object):
+    """Caches the entries of the directories it walked."""
+
+    def __init__(self):
+        self._listings: Dict[bytes, _Listing] = {}
+        # number of directories listed, i.e., cache misses
+        self.nlisted = 0
+
+    def clear(self) -> None:
+        self._listings.clear()
+
+    def _entries(self, path: bytes, mtime_ns: int) -> List[Entry]:
+        listing = self._listings.get(path)
+        if listing is not None and listing.is_fresh(mtime_ns):
+            return listing.entries
+        listed_ns = time.time_ns()
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        kind = DIR
+                    elif entry.is_file(follow_symlinks=False):
+                        kind = FILE
+                    else:
+                        kind = OTHER
+                    entries.append((entry.name, kind))
+        except OSError:
+            self._listings.pop(path, None)
+            return []
+        self._listings[path] = _Listing(mtime_ns, listed_ns, entries)
+        self.nlisted += 1
+        return entries
+
+    def _walk(self, path: bytes, mtime_ns: int) -> Iterator[Entry]:
+        for name, kind in self._entries(path, mtime_ns):
+            entry_path = os.path.join(path, name)
+            yield entry_path, kind
+            if kind != DIR:
+                continue
+            try:
+                st = os.lstat(entry_path)
+            except OSError:
+                # removed in the meantime
+                continue
+            yield from self._walk(entry_path, st.st_mtime_ns)
+
+    def walk(self, root: Union[str, bytes]) -> Iterator[Entry]:
+        """Yields the paths below and including `root` together with their
+        kinds. Like `find`, parents come before their contents and
+        symbolic links are not followed."""
+        root = os.fsencode(root)
+        try:
+            st = os.stat(root)
+        except OSError:
+            return
+        yield root, _kind(st.st_mode)
+        if stat.S_ISDIR(st.st_mode):
+            yield from self._walk(root, st.st_mtime_ns)
+
+    def files(self, root: Union[str, bytes]) -> Iterator[bytes]:
+        for path, kind in self.walk(root):
+            if kind == FILE:
+                yield path
+
+    def dirs(self, root: Union[str, bytes]) -> Iterator[bytes]:
+        for path, kind in self.walk(root):
+            if kind == DIR:
+                yield path
+
+
+# shared by all walks of this process
+INDEX = DirIndex()
@@ -1,57 +1,69 @@
-import sys
+import argparse
 import os
+import sys
 import logging
 
-from fuzz.fmt_recovery import typify
-from fuzz.fmt_recovery import match
-from fuzz.fmt_recovery import common_sequence
-from fuzz.fmt_recovery import sz_off
-from fuzz.fmt_recovery import find_value_deps
+from fuzz.fmt_recovery.pipeline import run_pipeline
 
 logging.basicConfig()
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
-STAGE_BANNER = """
-################################################################################
-
-{}
-
-################################################################################
-"""
-
-
-def main(tee, ioctl_seq_dir, hal_dir):
-    print(STAGE_BANNER.format("TYPIFY"))
-    for ioctl_dir in os.listdir(ioctl_seq_dir):
-        ioctl_dir = os.path.join(ioctl_seq_dir, ioctl_dir)
-        typify.typify(tee, ioctl_dir)
 
+def main(
+    tee, ioctl_seq_dir, hal_dir, jobs=1, cache_dir=None, force=False
+) -> bool:
     # sort.main(tee, ioctl_seq_dir, hal_dir)
-    # print(STAGE_BANNER.format("MATCH"))
-    match.main(tee, ioctl_seq_dir)
-
-    for ioctl_dir in os.listdir(ioctl_seq_dir):
-        ioctl_dir = os.path.join(ioctl_seq_dir, ioctl_dir)
-        print(STAGE_BANNER.format("COMMON_SEQ"))
-        common_sequence.common_sequence(tee, ioctl_dir)
-
-        print(STAGE_BANNER.format("SZ_OFF"))
-        sz_off.sz_off(tee, ioctl_dir)
-
-        print(STAGE_BANNER.format("VAL_DEPS"))
-        find_value_deps.find_value_deps(tee, ioctl_dir)
+    nprocessed, nskipped, failed = run_pipeline(
+        tee, ioctl_seq_dir, jobs, cache_dir=cache_dir, force=force
+    )
+    log.info(
+        f"Processed {nprocessed} ioctl dirs, {nskipped} were up to date."
+    )
+    for ioctl_dir in failed:
+        log.error(f"Failed: {ioctl_dir}")
+    return not failed
 
 
-def usage():
-    print(f"{sys.argv[0]} <teec> <ioctl-dir> <hal-dir>")
+def setup_args():
+    """Returns an initialized argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Recover the formats of recorded ioctl sequences."
+    )
+    parser.add_argument("tee", help="Target tee (optee, qsee or tc).")
+    parser.add_argument(
+        "ioctl_seq_dir", help="Directory holding the ioctl dirs."
+    )
+    parser.add_argument("hal_dir", help="Directory of the hal recordings.")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of ioctl dirs processed in parallel.",
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache_dir",
+        help="Output of a previous run to take unchanged ioctl dirs from.",
+    )
+    parser.add_argument(
+        "-f",
+        "--force",
+        action="store_true",
+        help="Rerun all stages, even if their inputs did not change.",
+    )
+    return parser
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 4:
-        usage()
-        sys.exit()
-    tee = sys.argv[1]
-    ioctl_seq_dir = sys.argv[2]
-    hal_dir = sys.argv[3]
-    main(tee, ioctl_seq_dir, hal_dir)
+    args = setup_args().parse_args()
+    ok = main(
+        args.tee,
+        args.ioctl_seq_dir,
+        args.hal_dir,
+        args.jobs,
+        args.cache_dir,
+        args.force,
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,83 @@
+"""Aho-Corasick automaton to find many byte patterns in a single pass.
+
+The patterns are added to a trie whose nodes are linked to the node of their
+longest proper suffix in the trie (the failure links). Scanning a buffer
+follows the trie and falls back along the failure links on a mismatch, so
+every buffer is read once, regardless of the number of patterns, and all,
+also overlapping, occurrences of all patterns are reported.
+"""
+from __future__ import annotations
+from collections import deque
+
+from typing import Dict, Iterator, List, Tuple
+
+
+class AhoCorasick(object):
+    def __init__(self):
+        # node -> byte -> node, the root is node 0
+        self._goto: List[Dict[int, int]] = [{}]
+        self._fail: List[int] = [0]
+        # node -> ids of the patterns ending at the node
+        self._ends: List[List[int]] = [[]]
+        # like `_ends`, including the patterns ending at the node's suffixes
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[bytes] = []
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, pattern: bytes) -> int:
+        """Adds `pattern` and returns its id."""
+        if not pattern:
+            raise ValueError("Cannot match an empty pattern.")
+        node = 0
+        for byte in pattern:
+            nxt = self._goto[node].get(byte)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][byte] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._ends.append([])
+            node = nxt
+        pattern_id = len(self._patterns)
+        self._patterns.append(pattern)
+        self._ends[node].append(pattern_id)
+        self._built = False
+        return pattern_id
+
+    def pattern(self, pattern_id: int) -> bytes:
+        return self._patterns[pattern_id]
+
+    def build(self) -> None:
+        """Computes the failure links, breadth first."""
+        self._out = [list(ends) for ends in self._ends]
+        # the children of the root fail to the root
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for byte, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and byte not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(byte, 0)
+                self._fail[child] = fail
+                # the patterns ending at the suffix end here too
+                self._out[child] = self._out[child] + self._out[fail]
+        self._built = True
+
+    def finditer(self, buf: bytes) -> Iterator[Tuple[int, int]]:
+        """Yields `(offset, pattern id)` of all occurrences of the patterns
+        in `buf`, ordered by their end."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, byte in enumerate(buf, 1):
+            while node and byte not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(byte, 0)
+            for pattern_id in out[node]:
+                yield end - len(self._patterns[pattern_id]), pattern_id
@@ -6,10 +6,12 @@ import logging
 import pickle
 import os
 import string
-from difflib import SequenceMatcher
+import multiprocessing
 from collections import OrderedDict
 from multiprocessing import Pool
-from fuzz.utils import find_files
+from typing import Optional
+from fuzz.fmt_recovery.recindex import PARAM_NAMES, recording_paths
+from fuzz.fmt_recovery.substrings import SubstringIndex
 from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
 
 logging.basicConfig()
@@ -56,44 +58,42 @@ def find_padding(buf: bytes, padding: bytes = b"\x00"):
     return idx
 
 
-def get_matches(req, req_path, resp, resp_path):
+# the index of the responses in the worker processes
+_index: Optional[SubstringIndex] = None
+
+
+def _init_worker(index: SubstringIndex):
+    global _index
+    _index = index
+
+
+def get_matches(job):
+    """Returns the matches of a request with the responses of all earlier
+    dumps, together with their sort keys."""
+    req_id, req_pos, req_path, req = job
+    log.info(f"--?> {req_path}")
     match_list = []
-    s = SequenceMatcher(lambda x: x == b"\x00", resp, req, autojunk=False)
-    for match in s.get_matching_blocks():
-        if match.size == 0 or is_junk_sequence(resp[match.a : (match.a + match.size)]):
-            continue
-        match_list.append((resp_path, match.a, req_path, match.b, match.size))
+    blocks_by_resp = _index.matching_blocks(req, lambda key: key[0] < req_id)
+    for key, blocks in blocks_by_resp.items():
+        resp_id, resp_pos, resp_path = key
+        resp = _index[key]
+        for idx, (resp_begin, req_begin, size) in enumerate(blocks):
+            if is_junk_sequence(resp[resp_begin : resp_begin + size]):
+                continue
+            match_list.append(
+                (
+                    (resp_id, req_id, resp_pos, req_pos, idx),
+                    (resp_path, resp_begin, req_path, req_begin, size),
+                )
+            )
     return match_list
 
 
-def common_sequence(tee, ioctldir):
-    if tee == "qsee":
-        # re* for req and resp
-        ioctl_param_dumps = [
-            dump
-            for dump in find_files(ioctldir, ".*/\(resp\|req\)")
-            if not dump.endswith(b".types")
-        ]
-        shared_bufs = find_files(ioctldir, ".*/shared")
-        if shared_bufs:
-            ioctl_param_dumps.extend(
-                [dump for dump in shared_bufs if not dump.endswith(b".types")]
-            )
-    elif tee == "tc":
-        ioctl_param_dumps = [
-            dump
-            for dump in find_files(ioctldir, ".*/param_.*")
-            if not dump.endswith(b".types")
-        ]
-    elif tee == "optee":
-        ioctl_param_dumps = [
-            dump
-            for dump in find_files(ioctldir, ".*/param_.*")
-            if not dump.endswith(b".types")
-        ]
-    else:
+def common_sequence(tee, ioctldir, jobs: Optional[int] = None):
+    if tee not in PARAM_NAMES:
         log.error("tee {} unknown.".format(tee))
         sys.exit(0)
+    ioctl_param_dumps = recording_paths(tee, ioctldir)
 
     if not ioctl_param_dumps:
         log.error("no ioctl param dumps.")
@@ -121,56 +121,44 @@ def common_sequence(tee, ioctldir):
             reqs_by_id[id_] = []
         reqs_by_id[id_].append(req_path)
 
-    match_results = []
-    resp_ids = list(resps_by_id.keys())
-    resp_ids.sort()
-    req_ids = list(reqs_by_id.keys())
-    req_ids.sort()
-    matches = []
-
-    resps_blob_by_path = {}
-    reqs_blob_by_path = {}
-    for resp_id in resp_ids:
-        pool = Pool(processes=os.cpu_count() * 2)
-        log.info(resp_id)
-        for req_id in req_ids:
-            if req_id <= resp_id:
-                continue
+    # index all responses once, every request is matched against the
+    # responses of earlier dumps
+    index = SubstringIndex()
+    for resp_id in sorted(resps_by_id):
+        for resp_pos, resp_path in enumerate(resps_by_id[resp_id]):
+            with open(resp_path, "rb") as f:
+                resp = f.read()
+            padding_idx = find_padding(resp)
+            index.add((resp_id, resp_pos, resp_path), resp[:padding_idx])
+    if not index:
+        return
 
-            for resp_path in resps_by_id[resp_id]:
-                if resp_path not in resps_blob_by_path:
-                    with open(resp_path, "rb") as f:
-                        resp = f.read()
-                        padding_idx = find_padding(resp)
-                        resp = resp[:padding_idx]
-                    resps_blob_by_path[resp_path] = resp
-                else:
-                    resp = resps_blob_by_path[resp_path]
-
-                for req_path in reqs_by_id[req_id]:
-                    log.info(f"{resp_path} --?> {req_path}")
-                    if req_path not in reqs_blob_by_path:
-                        with open(req_path, "rb") as f:
-                            req = f.read()
-                        reqs_blob_by_path[req_path] = req
-                    else:
-                        req = reqs_blob_by_path[req_path]
-
-                    result = pool.apply_async(
-                        get_matches, (req, req_path, resp, resp_path)
-                    )
-                    match_results.append(result)
-                    del req
-                del resp
-
-        for result in match_results:
-            res = result.get()
-            if res != []:
-                matches.extend(res)
-
-        pool.close()
-        pool.join()
-        match_results = []
+    first_resp_id = min(resps_by_id)
+    jobs_todo = []
+    for req_id in sorted(reqs_by_id):
+        if req_id <= first_resp_id:
+            continue
+        for req_pos, req_path in enumerate(reqs_by_id[req_id]):
+            with open(req_path, "rb") as f:
+                jobs_todo.append((req_id, req_pos, req_path, f.read()))
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if multiprocessing.current_process().daemon:
+        # pool workers, e.g., of the pipeline, cannot have children
+        jobs = 1
+    if jobs > 1 and len(jobs_todo) > 1:
+        with Pool(jobs, initializer=_init_worker, initargs=(index,)) as pool:
+            results = pool.map(get_matches, jobs_todo)
+    else:
+        _init_worker(index)
+        results = [get_matches(job) for job in jobs_todo]
+
+    # in the order of the responses, as the templates keep the first of
+    # overlapping elements
+    matches = [
+        match for _, match in sorted(m for res in results for m in res)
+    ]
 
     for match in matches:
         log.info(match)
@@ -11,6 +11,8 @@ from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
 from typing import List, Dict, Tuple, Optional
 from fuzz.const import TEEID
 from fuzz.utils import find_files
+from fuzz.fmt_recovery.recindex import PARAM_NAMES, recording_paths
+from fuzz.fmt_recovery.ahocorasick import AhoCorasick
 
 ################################################################################
 # LOGGING
@@ -54,39 +56,10 @@ def get_seed_cls(target_tee: str) -> object:
 
 
 def get_ioctl_recording_paths(tee, ioctl_recording_dir):
-    if tee == "qsee":
-        # re* for req and resp
-        ioctl_recording_paths = [
-            f
-            for f in find_files(ioctl_recording_dir, ".*/\(resp\|req\)")
-            if not f.endswith(b"types")
-        ]
-        # if no file named 'shared' exists find_files
-        # returns None which can't be iterated
-        # -> use glob for shared
-        ioctl_recording_paths.extend(
-            [
-                f
-                for f in glob.glob(os.path.join(ioctl_recording_dir, ".*/shared"))
-                if not f.endswith(b"types")
-            ]
-        )
-    elif tee == "tc":
-        ioctl_recording_paths = [
-            f
-            for f in find_files(ioctl_recording_dir, ".*/param_.*")
-            if not f.endswith(b"types")
-        ]
-    elif tee == "optee":
-        ioctl_recording_paths = [
-            f
-            for f in find_files(ioctl_recording_dir, ".*/param_.*")
-            if not f.endswith(b"types")
-        ]
-    else:
+    if tee not in PARAM_NAMES:
         log.error("tee {} unknown.".format(tee))
         sys.exit(0)
-    return ioctl_recording_paths
+    return recording_paths(tee, ioctl_recording_dir)
 
 
 def extract_leaf_nodes(
@@ -106,68 +79,106 @@ def extract_leaf_nodes(
     return []
 
 
+def is_matchable(data) -> bool:
+    # we do not match individual bytes or sequences that are only zeroes
+    return bool(data) and len(data) > 1 and any(data)
+
+
+class HalLeafIndex(object):
+    """The leaf nodes of the HAL recordings of a high-level function. The
+    leaf values are indexed to find all of them in an ioctl recording in a
+    single pass."""
+
+    def __init__(self, hal_data: List[object]):
+        # (hal node id, type, data) of all leaf nodes
+        self.leaves: List[Tuple[Tuple[int, int], str, bytes]] = []
+        self._matcher = AhoCorasick()
+        # pattern id -> indices of the leaves with this value
+        self._leaves_by_pattern: List[List[int]] = []
+        pattern_ids: Dict[bytes, int] = {}
+        for param_node_idx, param_node in enumerate(hal_data):
+            leaf_nodes = extract_leaf_nodes(param_node)
+            for leaf_node_idx, (type, data) in enumerate(leaf_nodes):
+                leaf_idx = len(self.leaves)
+                self.leaves.append(((param_node_idx, leaf_node_idx), type, data))
+                if not is_matchable(data):
+                    continue
+                pattern = bytes(data)
+                if pattern not in pattern_ids:
+                    pattern_ids[pattern] = self._matcher.add(pattern)
+                    self._leaves_by_pattern.append([])
+                self._leaves_by_pattern[pattern_ids[pattern]].append(leaf_idx)
+        self._matcher.build()
+
+    @classmethod
+    def from_paths(cls, hal_recording_paths: List[str]) -> HalLeafIndex:
+        hal_data = []
+        for hal_recording_path in hal_recording_paths:
+            log.debug(hal_recording_path)
+            with open(hal_recording_path, "rb") as f:
+                deserialized = pickle.load(f)
+                if deserialized:
+                    hal_data.append(deserialized)
+        return cls(hal_data)
+
+    def find_all(self, buf: bytes) -> Dict[int, List[int]]:
+        """Returns the offsets of the non-overlapping occurrences of the
+        leaf values in `buf`, by leaf index."""
+        offsets: Dict[int, List[int]] = {}
+        for off, pattern_id in sorted(self._matcher.finditer(buf)):
+            size = len(self._matcher.pattern(pattern_id))
+            for leaf_idx in self._leaves_by_pattern[pattern_id]:
+                leaf_offsets = offsets.setdefault(leaf_idx, [])
+                if leaf_offsets and leaf_offsets[-1] + size > off:
+                    continue
+                leaf_offsets.append(off)
+        return offsets
+
+
 def matchify(
-    hal_recording_paths: List[str],
+    leaf_index: HalLeafIndex,
     ioctl_recording_path: str,
     match_count_d: Dict[int, Dict[str, int | bool]],
 ):
-    hal_data = []
-    for hal_recording_path in hal_recording_paths:
-        log.debug(hal_recording_path)
-        with open(hal_recording_path, "rb") as f:
-            deserialized = pickle.load(f)
-            # log.debug(deserialized)
-            if deserialized:
-                hal_data.append(deserialized)
-
     log.debug("---- File: {}".format(ioctl_recording_path))
     with open(ioctl_recording_path, "rb") as f:
         ioctl_seq = f.read()
 
+    offsets = leaf_index.find_all(ioctl_seq) if ioctl_seq else {}
     matches: List[SeedTemplateElement] = []
-    for param_node_idx, param_node in enumerate(hal_data):
-        leaf_nodes = extract_leaf_nodes(param_node)
-        for leaf_node_idx, leaf_node in enumerate(leaf_nodes):
-            data = leaf_node[1]
-            type = leaf_node[0]
-
-            hal_node_id = (param_node_idx, leaf_node_idx)
-            if hal_node_id not in match_count_d.keys():
-                match_count_d[hal_node_id] = {
-                    "cnt": 0,
-                    "type": type,
-                    "sz": len(data),
-                    "zero": False,
-                    "partial": False,
-                }
-
-            if ioctl_seq and data:
-                # we do not match individual bytes
-                if len(data) == 1:
-                    continue
-
-                # ignore zero sequences, we do not match
-                # a sequence that is only zeroes
-                unique = set(data)
-                if len(unique) == 1 and unique.pop() == 0:
-                    match_count_d[hal_node_id]["zero"] = True
-                    continue
+    for leaf_idx, (hal_node_id, type, data) in enumerate(leaf_index.leaves):
+        if hal_node_id not in match_count_d.keys():
+            match_count_d[hal_node_id] = {
+                "cnt": 0,
+                "type": type,
+                "sz": len(data),
+                "zero": False,
+                "partial": False,
+            }
+
+        if ioctl_seq and data:
+            # we do not match individual bytes
+            if len(data) == 1:
+                continue
 
-                # TODO: we are only looking for the first match here
-                #       keep it this way?
+            # ignore zero sequences, we do not match
+            # a sequence that is only zeroes
+            if not any(data):
+                match_count_d[hal_node_id]["zero"] = True
+                continue
 
-                # ignore partial matches, we only apply the type if
-                # it is entirely present within the sequence
-                off = ioctl_seq.find(data)
-                if off == -1:
-                    if match_count_d[hal_node_id]["cnt"] == 0:
-                        match_count_d[hal_node_id]["partial"] = True
-                    continue
+            # ignore partial matches, we only apply the type if
+            # it is entirely present within the sequence
+            if leaf_idx not in offsets:
+                if match_count_d[hal_node_id]["cnt"] == 0:
+                    match_count_d[hal_node_id]["partial"] = True
+                continue
 
-                size = len(data)
-                match_count_d[hal_node_id]["cnt"] += 1
-                if match_count_d[hal_node_id]["partial"]:
-                    match_count_d[hal_node_id]["partial"] = False
+            size = len(data)
+            match_count_d[hal_node_id]["cnt"] += 1
+            if match_count_d[hal_node_id]["partial"]:
+                match_count_d[hal_node_id]["partial"] = False
+            for off in offsets[leaf_idx]:
                 matches.append(SeedTemplateElement(off, off + size, type))
 
     # sort our matches so that the biggest matches are applied first
@@ -190,30 +201,47 @@ def matchify(
     return
 
 
+def load_leaf_index(hal_recording_dir: str) -> Optional[HalLeafIndex]:
+    hal_recording_paths = [
+        path
+        for path in find_files(hal_recording_dir, ".*")
+        if not path.endswith(b"match.stats")
+    ]
+    if not hal_recording_paths:
+        log.error("no typed hal dumps in '{}'.".format(hal_recording_dir))
+        return None
+    return HalLeafIndex.from_paths(hal_recording_paths)
+
+
 def handle_recordings(
-    hal_recording_dir: str,
+    leaf_index: HalLeafIndex,
     ioctl_recording_paths: List[str],
     match_count_d: Dict[int, Dict[str, int | bool]],
 ):
-    hal_recording_paths = find_files(hal_recording_dir, ".*")
-    if not hal_recording_paths:
-        log.error("no typed hal dumps in '{}'.".format(hal_recording_dir))
-        return None
     for ioctl_recording_path in ioctl_recording_paths:
-        matchify(hal_recording_paths, ioctl_recording_path, match_count_d)
+        matchify(leaf_index, ioctl_recording_path, match_count_d)
     return
 
 
 def main(tee: str, recordings_base_dir: str) -> None:
+    match_glob(tee, os.path.join(recordings_base_dir, "*"))
+
+
+def match_dir(tee: str, ioctl_dir: str) -> None:
+    """Matches the recordings of a single ioctl directory."""
+    match_glob(tee, ioctl_dir)
+
+
+def match_glob(tee: str, ioctl_dirs_glob: str) -> None:
     hal_recording_onenter_dirs: List[str] = []
     hal_recording_onleave_dirs: List[str] = []
 
     # find all the recordings of high-level functions
     # by convention, all high-level functions start with the 'hal_' prefix
     # seperate the onenter from the onleave recordings
-    for d in glob.glob(os.path.join(recordings_base_dir, "*/*/onenter/hal_*")):
+    for d in glob.glob(os.path.join(ioctl_dirs_glob, "*/onenter/hal_*")):
         hal_recording_onenter_dirs.append(d)
-    for d in glob.glob(os.path.join(recordings_base_dir, "*/*/onleave/hal_*")):
+    for d in glob.glob(os.path.join(ioctl_dirs_glob, "*/onleave/hal_*")):
         hal_recording_onleave_dirs.append(d)
 
     hal_recording_onenter_dirs.sort()
@@ -224,13 +252,14 @@ def main(tee: str, recordings_base_dir: str) -> None:
     # go through the onenter recordings
     for hal_recording_dir in hal_recording_onenter_dirs:
         seed = seedCls.deserialize_raw_from_path(os.path.dirname(hal_recording_dir))
+        leaf_index = load_leaf_index(hal_recording_dir)
         match_count_d = {}
         for idx, param in enumerate(seed.params):
             if not param.is_input():
                 continue
-            if not param.data or not param.data_paths:
+            if not param.data or not param.data_paths or leaf_index is None:
                 continue
-            handle_recordings(hal_recording_dir, param.data_paths, match_count_d)
+            handle_recordings(leaf_index, param.data_paths, match_count_d)
         stats_path = os.path.join(hal_recording_dir, "match.stats")
         with open(stats_path, "wb") as f:
             pickle.dump(match_count_d, f)
@@ -238,13 +267,14 @@ def main(tee: str, recordings_base_dir: str) -> None:
     # go through the onleave recordings
     for hal_recording_dir in hal_recording_onleave_dirs:
         seed = seedCls.deserialize_raw_from_path(os.path.dirname(hal_recording_dir))
+        leaf_index = load_leaf_index(hal_recording_dir)
         match_count_d = {}
         for param in seed.params:
             if not param.is_output():
                 continue
-            if not param.data or not param.data_paths:
+            if not param.data or not param.data_paths or leaf_index is None:
                 continue
-            handle_recordings(hal_recording_dir, param.data_paths, match_count_d)
+            handle_recordings(leaf_index, param.data_paths, match_count_d)
         stats_path = os.path.join(hal_recording_dir, "match.stats")
         with open(stats_path, "wb") as f:
             pickle.dump(match_count_d, f)
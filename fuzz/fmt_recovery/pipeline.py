@@ -0,0 +1,205 @@
+"""Incremental, parallel driver of the format-recovery stages.
+
+The stages (TYPIFY, MATCH, COMMON_SEQ, SZ_OFF and VAL_DEPS) only look at
+the recordings of one ioctl directory at a time, so the directories are
+processed independently in a pool of worker processes.
+
+Each directory records its progress in `PIPELINE_FILE`:
+
+    {"inputs": <hash>, "outputs": <hash>, "stages": [<completed stage>, ...]}
+
+`inputs` is the content hash of the recordings before the first stage ran,
+`outputs` the one after the last stage, both ignoring the files the stages
+derive (`*.types`, `match.stats`, ...). A directory whose recordings hash to
+either value and whose stages all completed is skipped. TYPIFY resets the
+`.types` files the later stages refine in place, so a directory with new or
+changed recordings, or one whose run was interrupted, reruns all stages.
+
+With a cache directory, e.g., the output of the previous preprocessing run,
+a directory is also skipped if the cache holds a completed directory of the
+same name and with the same inputs. Its results are copied from the cache.
+"""
+from __future__ import annotations
+import functools
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+log = logging.getLogger(__name__)
+
+PIPELINE_FILE = ".pipeline.json"
+# files created by the stages, they are no inputs
+DERIVED_SUFFIXES = (".types", "match.stats", "dependencies.pickle")
+
+# (name, function of the tee and the ioctl directory)
+Stage = Tuple[str, Callable[[str, str], None]]
+
+
+def default_stages(jobs: Optional[int] = None) -> List[Stage]:
+    """Returns the stages. `jobs` limits the processes of the stages that
+    run in parallel themselves, by default they use all CPUs."""
+    # the stages pull in heavy dependencies, import them on demand
+    from fuzz.fmt_recovery import typify
+    from fuzz.fmt_recovery import match
+    from fuzz.fmt_recovery import common_sequence
+    from fuzz.fmt_recovery import sz_off
+    from fuzz.fmt_recovery import find_value_deps
+
+    return [
+        ("TYPIFY", typify.typify),
+        ("MATCH", match.match_dir),
+        (
+            "COMMON_SEQ",
+            functools.partial(common_sequence.common_sequence, jobs=jobs),
+        ),
+        ("SZ_OFF", sz_off.sz_off),
+        ("VAL_DEPS", find_value_deps.find_value_deps),
+    ]
+
+
+def is_derived(name: str) -> bool:
+    return name == PIPELINE_FILE or name.endswith(DERIVED_SUFFIXES)
+
+
+def input_hash(ioctl_dir: str) -> str:
+    """Returns a hash of the names and contents of the recordings in
+    `ioctl_dir`."""
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(ioctl_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if is_derived(name):
+                continue
+            path = os.path.join(root, name)
+            h.update(os.path.relpath(path, ioctl_dir).encode() + b"\0")
+            with open(path, "rb") as f:
+                h.update(hashlib.sha1(f.read()).digest())
+    return h.hexdigest()
+
+
+def load_state(ioctl_dir: str) -> dict:
+    path = os.path.join(ioctl_dir, PIPELINE_FILE)
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except ValueError:
+        # cut short while writing
+        return {}
+
+
+def save_state(ioctl_dir: str, state: dict) -> None:
+    path = os.path.join(ioctl_dir, PIPELINE_FILE)
+    tmp_path = os.path.join(ioctl_dir, f"{PIPELINE_FILE}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def is_complete(state: dict, stages: Sequence[Stage]) -> bool:
+    return state.get("stages") == [name for name, _ in stages]
+
+
+def _from_cache(
+    ioctl_dir: str, digest: str, cache_dir: Optional[str], stages
+) -> bool:
+    if not cache_dir:
+        return False
+    cached_dir = os.path.join(cache_dir, os.path.basename(ioctl_dir))
+    state = load_state(cached_dir)
+    if not is_complete(state, stages) or state.get("inputs") != digest:
+        return False
+    shutil.rmtree(ioctl_dir)
+    shutil.copytree(cached_dir, ioctl_dir)
+    return True
+
+
+def process_dir(
+    tee: str,
+    ioctl_dir: str,
+    stages: Optional[Sequence[Stage]] = None,
+    cache_dir: Optional[str] = None,
+    force: bool = False,
+) -> List[str]:
+    """Runs the stages on `ioctl_dir` unless they are up to date. Returns
+    the names of the stages that ran."""
+    stages = default_stages() if stages is None else stages
+    digest = input_hash(ioctl_dir)
+    state = load_state(ioctl_dir)
+    if not force:
+        if is_complete(state, stages) and digest in (
+            state.get("inputs"),
+            state.get("outputs"),
+        ):
+            log.debug(f"{ioctl_dir} is up to date.")
+            return []
+        if _from_cache(ioctl_dir, digest, cache_dir, stages):
+            log.debug(f"{ioctl_dir} copied from the cache.")
+            return []
+
+    state = {"inputs": digest, "stages": []}
+    save_state(ioctl_dir, state)
+    for name, stage in stages:
+        log.info(f"{name}: {ioctl_dir}")
+        stage(tee, ioctl_dir)
+        state["stages"].append(name)
+        save_state(ioctl_dir, state)
+    state["outputs"] = input_hash(ioctl_dir)
+    save_state(ioctl_dir, state)
+    return [name for name, _ in stages]
+
+
+def _worker(job) -> Tuple[str, Optional[List[str]], Optional[str]]:
+    tee, ioctl_dir, stages, cache_dir, force = job
+    try:
+        ran = process_dir(tee, ioctl_dir, stages, cache_dir, force)
+    except Exception as e:
+        log.exception(f"Processing {ioctl_dir} failed.")
+        return ioctl_dir, None, str(e)
+    return ioctl_dir, ran, None
+
+
+def run_pipeline(
+    tee: str,
+    ioctl_seq_dir: str,
+    jobs: int = 1,
+    stages: Optional[Sequence[Stage]] = None,
+    cache_dir: Optional[str] = None,
+    force: bool = False,
+) -> Tuple[int, int, List[str]]:
+    """Processes all ioctl directories in `ioctl_seq_dir` with `jobs`
+    processes. Returns the number of directories processed, skipped, and
+    the directories that failed."""
+    ioctl_dirs = sorted(
+        os.path.join(ioctl_seq_dir, d)
+        for d in os.listdir(ioctl_seq_dir)
+        if os.path.isdir(os.path.join(ioctl_seq_dir, d))
+    )
+    if stages is None and jobs > 1:
+        # the dirs are processed in parallel already, and the workers of a
+        # pool cannot start processes of their own
+        stages = default_stages(jobs=1)
+    todo = [(tee, d, stages, cache_dir, force) for d in ioctl_dirs]
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            results = list(pool.imap_unordered(_worker, todo))
+    else:
+        results = [_worker(job) for job in todo]
+
+    nprocessed = nskipped = 0
+    failed = []
+    for ioctl_dir, ran, error in results:
+        if error is not None:
+            failed.append(ioctl_dir)
+        elif ran:
+            nprocessed += 1
+        else:
+            nskipped += 1
+    return nprocessed, nskipped, sorted(failed)
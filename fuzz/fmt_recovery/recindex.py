@@ -0,0 +1,80 @@
+"""Index of the ioctl recordings in an ioctl directory.
+
+The recordings of a TEE's ioctl parameters are laid out as
+
+    <ioctl_dir>/<dump id>/<onenter|onleave>/<param>
+
+with the recordings of the high-level functions in `hal_*` folders next to
+the params. The stages query the recordings by TEE, direction, param name
+and dump ID. The walks go through the shared `fuzz.dirindex.INDEX`, so the
+stages share its cached listings instead of walking the tree again.
+"""
+from __future__ import annotations
+import os
+
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from fuzz.dirindex import INDEX
+
+
+ONENTER = "onenter"
+ONLEAVE = "onleave"
+
+# tee -> whether a file name is the name of a param recording
+PARAM_NAMES: Dict[str, Callable[[str], bool]] = {
+    "qsee": lambda name: name in ("req", "resp", "shared"),
+    "tc": lambda name: name.startswith("param_"),
+    "optee": lambda name: name.startswith("param_"),
+}
+
+TYPES_EXT = ".types"
+
+
+class Recording(NamedTuple):
+    path: bytes
+    dump_id: str
+    direction: str
+    name: str
+
+
+def iter_recordings(tee: str, ioctl_dir: str) -> Iterator[Recording]:
+    """Yields the param recordings of `tee` in `ioctl_dir`, without their
+    `.types` files.
+
+    Raises:
+        ValueError: if `tee` is unknown.
+    """
+    if tee not in PARAM_NAMES:
+        raise ValueError(f"tee {tee} unknown.")
+    is_param = PARAM_NAMES[tee]
+    for path in INDEX.files(ioctl_dir):
+        dir_path, name = os.path.split(os.fsdecode(path))
+        if name.endswith(TYPES_EXT) or not is_param(name):
+            continue
+        dump_dir, direction = os.path.split(dir_path)
+        if direction not in (ONENTER, ONLEAVE):
+            continue
+        yield Recording(path, os.path.basename(dump_dir), direction, name)
+
+
+def recordings(
+    tee: str,
+    ioctl_dir: str,
+    direction: Optional[str] = None,
+    name: Optional[str] = None,
+    dump_id: Optional[str] = None,
+) -> List[Recording]:
+    """Returns the param recordings of `tee` in `ioctl_dir`. If given, only
+    the ones with the `direction`, param `name` and `dump_id`."""
+    return [
+        rec
+        for rec in iter_recordings(tee, ioctl_dir)
+        if (direction is None or rec.direction == direction)
+        and (name is None or rec.name == name)
+        and (dump_id is None or rec.dump_id == dump_id)
+    ]
+
+
+def recording_paths(tee: str, ioctl_dir: str, **kwargs) -> List[bytes]:
+    """Like `recordings()`, but returns the paths only."""
+    return [rec.path for rec in recordings(tee, ioctl_dir, **kwargs)]
@@ -0,0 +1,137 @@
+"""Common substrings of a buffer and many indexed buffers.
+
+`SubstringIndex` indexes the k-grams of many buffers, e.g., all responses of
+a recording, once. A buffer, e.g., a request, is streamed through the index
+once and yields the runs, i.e., the maximal common substrings of at least k
+bytes, shared with every indexed buffer.
+
+`matching_blocks()` decomposes the runs of a pair of buffers like
+`difflib.SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()`,
+but without the blocks shorter than k: the longest common substring is taken
+first, ties are broken by the lowest offset in `a` and then in `b`, and the
+parts before and after it are decomposed recursively.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+
+K = 4
+
+# offset in the indexed buffer, offset in the streamed buffer, size
+Run = Tuple[int, int, int]
+
+# compare this many bytes at once when extending a run
+_CHUNK = 64
+
+
+def _extend(a: bytes, i: int, b: bytes, j: int, size: int) -> int:
+    """Returns the size of the common substring at `a[i:]` and `b[j:]`,
+    knowing it is at least `size`."""
+    while a[i + size : i + size + _CHUNK] == b[j + size : j + size + _CHUNK]:
+        if i + size + _CHUNK > len(a) or j + size + _CHUNK > len(b):
+            return min(len(a) - i, len(b) - j)
+        size += _CHUNK
+    while i + size < len(a) and j + size < len(b) and a[i + size] == b[j + size]:
+        size += 1
+    return size
+
+
+def matching_blocks(runs: List[Run], alen: int, blen: int, k: int = K) -> List[Run]:
+    """Decomposes the `runs` of `a` (`alen` bytes) and `b` (`blen` bytes)
+    into non-crossing blocks of at least `k` bytes, sorted by offset."""
+    blocks = []
+    regions = [(0, alen, 0, blen)]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        best = None
+        for i, j, size in runs:
+            # the part of the run inside the region
+            lo = max(alo - i, blo - j, 0)
+            hi = min(ahi - i, bhi - j, size)
+            if hi - lo < k:
+                continue
+            if (
+                best is None
+                or hi - lo > best[2]
+                or (hi - lo == best[2] and (i + lo, j + lo) < best[:2])
+            ):
+                best = (i + lo, j + lo, hi - lo)
+        if best is None:
+            continue
+        i, j, size = best
+        blocks.append(best)
+        regions.append((alo, i, blo, j))
+        regions.append((i + size, ahi, j + size, bhi))
+    blocks.sort()
+
+    # like `SequenceMatcher`, collapse adjacent blocks
+    merged: List[Run] = []
+    for i, j, size in blocks:
+        if merged:
+            i1, j1, size1 = merged[-1]
+            if i1 + size1 == i and j1 + size1 == j:
+                merged[-1] = (i1, j1, size1 + size)
+                continue
+        merged.append((i, j, size))
+    return merged
+
+
+class SubstringIndex(object):
+    """k-gram index of buffers, identified by their keys."""
+
+    def __init__(self, k: int = K):
+        self.k = k
+        self._keys: List[Hashable] = []
+        self._bufs: List[bytes] = []
+        self._idx_by_key: Dict[Hashable, int] = {}
+        # k-gram -> (buffer index, offset)
+        self._grams: Dict[bytes, List[Tuple[int, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._bufs)
+
+    def __getitem__(self, key: Hashable) -> bytes:
+        return self._bufs[self._idx_by_key[key]]
+
+    def add(self, key: Hashable, buf: bytes) -> None:
+        if key in self._idx_by_key:
+            raise ValueError(f"{key} is already indexed.")
+        idx = len(self._bufs)
+        self._idx_by_key[key] = idx
+        self._keys.append(key)
+        self._bufs.append(buf)
+        for i in range(len(buf) - self.k + 1):
+            self._grams.setdefault(buf[i : i + self.k], []).append((idx, i))
+
+    def runs(
+        self, buf: bytes, accept: Optional[Callable[[Hashable], bool]] = None
+    ) -> Dict[Hashable, List[Run]]:
+        """Returns the runs `buf` shares with the indexed buffers whose keys
+        `accept` accepts, by key."""
+        k = self.k
+        accepted = [accept is None or accept(key) for key in self._keys]
+        runs: Dict[int, List[Run]] = {}
+        for j in range(len(buf) - k + 1):
+            hits = self._grams.get(buf[j : j + k])
+            if not hits:
+                continue
+            for idx, i in hits:
+                if not accepted[idx]:
+                    continue
+                other = self._bufs[idx]
+                if i and j and other[i - 1] == buf[j - 1]:
+                    # inside a run found at an earlier offset
+                    continue
+                size = _extend(other, i, buf, j, k)
+                runs.setdefault(idx, []).append((i, j, size))
+        return {self._keys[idx]: idx_runs for idx, idx_runs in runs.items()}
+
+    def matching_blocks(
+        self, buf: bytes, accept: Optional[Callable[[Hashable], bool]] = None
+    ) -> Dict[Hashable, List[Run]]:
+        """Like `runs()`, but decomposed into matching blocks."""
+        return {
+            key: matching_blocks(key_runs, len(self[key]), len(buf), self.k)
+            for key, key_runs in self.runs(buf, accept).items()
+        }
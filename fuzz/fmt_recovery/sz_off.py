@@ -5,7 +5,9 @@ import pickle
 import logging
 import string
 import hexdump
-from fuzz.utils import u32, find_files
+import numpy as np
+from typing import Dict, List, Tuple
+from fuzz.fmt_recovery.recindex import PARAM_NAMES, recording_paths
 from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
 
 logging.basicConfig()
@@ -50,13 +52,115 @@ def is_len_type_sequence(types, len, off):
 
 
 def is_printable(s):
-    for c in s:
-        if str(c) not in string.printable:
-            return False
-    return True
+    return all(c in PRINTABLE for c in s)
 
 
-def process_param(param_path):
+PRINTABLE = frozenset(string.printable.encode())
+_PRINTABLE_LUT = np.zeros(256, dtype=bool)
+_PRINTABLE_LUT[list(PRINTABLE)] = True
+
+# widths of the size and offset fields, the earlier ones are preferred if
+# fields of different widths overlap
+FIELD_WIDTHS = (4, 8, 2)
+
+
+def read_uints(buf: np.ndarray, offs: np.ndarray, width: int) -> np.ndarray:
+    """Returns the little-endian `width`-byte integers at `offs` in `buf`."""
+    vals = np.zeros(len(offs), dtype=np.uint64)
+    for i in range(width):
+        vals |= buf[offs + i].astype(np.uint64) << np.uint64(8 * i)
+    return vals
+
+
+def find_sz_off(
+    data: bytes,
+    types: Dict[int, Tuple[int, str]],
+    width: int = 4,
+    aligned: bool = True,
+) -> Tuple[List[SeedTemplateElement], List[SeedTemplateElement]]:
+    """Returns the `width`-byte length and offset fields in `data`.
+
+    All candidate fields are checked at once. The fields are either aligned
+    to their width or at any offset. `types` maps the offsets of the known
+    elements of `data` to their sizes and types.
+    """
+    n = len(data)
+    len_matches: List[SeedTemplateElement] = []
+    off_matches: List[SeedTemplateElement] = []
+    if n <= width:
+        return len_matches, off_matches
+
+    buf = np.frombuffer(data, dtype=np.uint8)
+    offs = np.arange(0, n - width, width if aligned else 1)
+    if aligned:
+        vals = np.frombuffer(data, dtype=f"<u{width}", count=len(offs))
+    else:
+        vals = read_uints(buf, offs, width)
+    # lengths and offsets beyond the data never match, the clipped values
+    # fit the signed index type
+    cands = np.minimum(vals, n + 1).astype(np.int64)
+
+    is_typed = np.zeros(n + 2, dtype=bool)
+    typed_size = np.zeros(n + 2, dtype=np.int64)
+    for start, (size, _) in types.items():
+        if start <= n:
+            is_typed[start] = True
+            typed_size[start] = size
+    untyped = ~is_typed[offs]
+
+    # offsets to known elements, with their lengths right before or after
+    is_off = untyped & (cands > 0) & (cands <= n) & (cands > offs)
+    is_off &= is_typed[cands]
+    hits = offs[is_off]
+    lengths = typed_size[cands[is_off]].astype(np.uint64)
+    prev = np.zeros(len(hits), dtype=bool)
+    has_prev = hits >= width
+    prev[has_prev] = (
+        read_uints(buf, hits[has_prev] - width, width) == lengths[has_prev]
+    )
+    nxt = np.zeros(len(hits), dtype=bool)
+    has_nxt = hits + 2 * width <= n
+    nxt[has_nxt] = (
+        read_uints(buf, hits[has_nxt] + width, width) == lengths[has_nxt]
+    )
+    for off, cand, is_prev, is_nxt in zip(
+        hits.tolist(), cands[is_off].tolist(), prev.tolist(), nxt.tolist()
+    ):
+        off_matches.append(SeedTemplateElement(off, off + width, "off_t"))
+        log.info("{:#x}@{:#x} is offset!".format(cand, off))
+        if is_prev:
+            len_matches.append(SeedTemplateElement(off - width, off, "size_t"))
+        if is_nxt:
+            len_matches.append(
+                SeedTemplateElement(off + width, off + 2 * width, "size_t")
+            )
+
+    # lengths of a succeeding printable string (minimum 3 printable chars)
+    rest = n - offs - width
+    is_str = untyped & (rest >= cands) & (cands >= 3)
+    nprintable = np.concatenate(([0], np.cumsum(_PRINTABLE_LUT[buf])))
+    starts = offs + width
+    ends = np.where(is_str, starts + cands, starts)
+    is_len = is_str & (nprintable[ends] - nprintable[starts] == cands)
+    # lengths of the rest of this blob or of the entire blob
+    others = untyped & ~is_str
+    is_len |= others & (rest == cands)
+    others &= rest != cands
+    is_len |= others & (cands == n)
+    others &= cands != n
+    # lengths of a succeeding type sequence
+    others &= is_typed[starts]
+    for idx in np.flatnonzero(others).tolist():
+        if is_len_type_sequence(types, int(cands[idx]), int(starts[idx])):
+            is_len[idx] = True
+
+    for off, cand in zip(offs[is_len].tolist(), cands[is_len].tolist()):
+        len_matches.append(SeedTemplateElement(off, off + width, "size_t"))
+        log.info("{}@{} is len!".format(cand, off + width))
+    return len_matches, off_matches
+
+
+def process_param(param_path, widths=FIELD_WIDTHS, aligned: bool = True):
     param_types_path = "{}.types".format(param_path.decode())
 
     # do we have the types?
@@ -68,131 +172,41 @@ def process_param(param_path):
             # structure: (offset, (size, type))
             types = {e.start: (e.size, e.type) for e in seed_tmpl_elems}
     else:
+        seed_template = None
         types = {}
 
     with open(param_path, "rb") as f:
         data = f.read()
 
     # find offset and corresponding length information
-    len_matches: List[SeedTemplateElement] = []
-    off_matches: List[SeedTemplateElement] = []
-    off = 0
-    while off + 4 < len(data):
-        # check if this member does not have a type itself yet
-        if off not in types.keys():
-            off_candidate = u32(data[off : off + 4])
-
-            if off_candidate > 0 and len(data) >= off_candidate:
-                # check if data with this offset exists
-                if off_candidate in types.keys() and off_candidate > off:
-                    off_matches.append(SeedTemplateElement(off, off + 4, "off_t"))
-                    log.info("{:#x}@{:#x} is offset!".format(off_candidate, off))
-                    # check previous and next 4 Bytes for length information
-                    if off >= 4:
-                        len_candidate = u32(data[off - 4 : off])
-                        length, _ = types[off_candidate]
-                        if len_candidate == length:
-                            len_matches.append(
-                                SeedTemplateElement(off - 4, off, "size_t")
-                            )
-                    if (off + 8) <= len(data):
-                        len_candidate = u32(data[off + 4 : off + 8])
-                        length, _ = types[off_candidate]
-                        if len_candidate == length:
-                            len_matches.append(
-                                SeedTemplateElement(off + 4, off + 8, "size_t")
-                            )
-        off += 4
-
-    # find additional length information
-    off = 0
-    while off + 4 < len(data):
-        # check if this member does not have a type itself yet
-        if off not in types.keys():
-            len_candidate = u32(data[off : off + 4])
-            # check if this length describes a succeeding
-            # printable string (minimum 3 printable chars)
-            if len(data[off + 4 :]) >= len_candidate and len_candidate >= 3:
-                s = data[off + 4 : off + 4 + len_candidate]
-                if is_printable(s):
-                    len_matches.append(SeedTemplateElement(off, off + 4, "size_t"))
-                    log.info("{}@{} is len!".format(len_candidate, off + 4))
-
-            # check if this length describes the rest length of this blob
-            elif len(data[off + 4 :]) == len_candidate:
-                len_matches.append(SeedTemplateElement(off, off + 4, "size_t"))
-                log.info("{}@{} is len!".format(len_candidate, off + 4))
-
-            # check if this length describes length of the entire blob
-            elif len(data) == len_candidate:
-                len_matches.append(SeedTemplateElement(off, off + 4, "size_t"))
-                log.info("{}@{} is len!".format(len_candidate, off + 4))
-
-            # check if this length describes succeeding type sequence
-            elif off + 4 in types.keys():
-                if is_len_type_sequence(types, len_candidate, off + 4):
-                    len_matches.append(SeedTemplateElement(off, off + 4, "size_t"))
-                    log.info("{}@{} is len!".format(len_candidate, off + 4))
-        off += 4
-
     matches: List[SeedTemplateElement] = []
-    matches.extend(len_matches)
-    matches.extend(off_matches)
+    for width in widths:
+        len_matches, off_matches = find_sz_off(data, types, width, aligned)
+        matches.extend(len_matches)
+        matches.extend(off_matches)
 
     for new_elem in matches:
         print(new_elem)
 
     if matches:
         # if we have matches, save to existing types if exists
-        if not os.path.exists(param_types_path):
-            with open(param_types_path, "wb") as f:
-                seed_template = SeedTemplate(len(data), matches)
-                pickle.dump(seed_template, f)
-        else:
-            for new_elem in matches:
-                print(new_elem)
-                with open(param_types_path, "rb") as f:
-                    seed_template: SeedTemplate = pickle.load(f)
-
-                try:
-                    seed_template.add_elem(new_elem)
-                except ValueError as e:
-                    log.warning(e)
-                    continue
-
-                with open(param_types_path, "wb") as f:
-                    pickle.dump(seed_template, f)
+        if seed_template is None:
+            seed_template = SeedTemplate(len(data))
+        for new_elem in matches:
+            try:
+                seed_template.add_elem(new_elem)
+            except ValueError as e:
+                log.warning(e)
+        with open(param_types_path, "wb") as f:
+            pickle.dump(seed_template, f)
 
 
 def sz_off(tee: str, dir_: str):
-    if tee == "tc":
-        param_paths = [
-            path
-            for path in find_files(dir_, ".*/param_.*")
-            if path and b"types" not in path
-        ]
-    elif tee == "qsee":
-        param_paths = [
-            path
-            for path in find_files(dir_, ".*/\(resp\|req\)")
-            if path and b"types" not in path
-        ]
-
-        shared_bufs = find_files(dir_, "shared")
-        if shared_bufs:
-            param_paths.extend(
-                [path for path in shared_bufs if path and b"types" not in path]
-            )
-    elif tee == "optee":
-        param_paths = [
-            path
-            for path in find_files(dir_, ".*/param_.*")
-            if path and b"types" not in path
-        ]
-    else:
+    if tee not in PARAM_NAMES:
         log.error("tee unknown {}".format(tee))
         sys.exit()
 
+    param_paths = recording_paths(tee, dir_)
     for param_path in param_paths:
         log.info("processing: {}".format(param_path))
         process_param(param_path)
@@ -3,7 +3,7 @@ import os
 import logging
 import pickle
 from fuzz.seed.seedtemplate import SeedTemplate
-from fuzz.utils import find_files
+from fuzz.fmt_recovery.recindex import PARAM_NAMES, recording_paths
 
 
 logging.basicConfig()
@@ -12,19 +12,10 @@ log.setLevel(logging.DEBUG)
 
 
 def typify(tee: str, ioctldump_dir: str):
-    if tee == "qsee":
-        # shouldn't match on 'ret' files
-        paths = find_files(ioctldump_dir, ".*/\(resp\|req\)")
-        shared = find_files(ioctldump_dir, ".*/shared")
-        if shared:
-            paths.extend(shared)
-    elif tee == "tc":
-        paths = find_files(ioctldump_dir, ".*/param_.*")
-    elif tee == "optee":
-        paths = find_files(ioctldump_dir, ".*/param_.*")
-    else:
+    if tee not in PARAM_NAMES:
         log.error("Unknown tee {}".format(tee))
         sys.exit()
+    paths = recording_paths(tee, ioctldump_dir)
 
     if not paths:
         log.error("no files found.")
@@ -1,6 +1,8 @@
 import argparse
 import logging
 from fuzz.runner.fuzzrunner import FuzzRunner
+from fuzz.seed.seedpack import COMPRESSIONS
+from fuzz.scheduler.scheduler import SCHEDULES
 
 
 FORMAT = (
@@ -21,6 +23,14 @@ def fuzz_adb_target(args):
         args.modelaware,
         args.device_id,
         args.reboot,
+        batch=args.batch,
+        persistent=args.persistent,
+        instance_id=args.instance,
+        sync_interval=args.sync,
+        compression=COMPRESSIONS[args.compress],
+        schedule=args.schedule,
+        trim_budget=args.trim_budget,
+        timeout_factor=args.timeout_factor,
     )
     return runner
 
@@ -36,6 +46,14 @@ def fuzz_tcp_target(args):
         args.modelaware,
         reboot=args.reboot,
         cov_enabled=args.coverage,
+        batch=args.batch,
+        persistent=args.persistent,
+        instance_id=args.instance,
+        sync_interval=args.sync,
+        compression=COMPRESSIONS[args.compress],
+        schedule=args.schedule,
+        trim_budget=args.trim_budget,
+        timeout_factor=args.timeout_factor,
     )
     return runner
 
@@ -72,6 +90,69 @@ def setup_args():
         action="store_true",
         help="Target indicates new coverage for run.",
     )
+    parent_parser.add_argument(
+        "-B",
+        "--batch",
+        action="store_true",
+        help="Send sequences without value dependencies in a single batch.",
+    )
+    parent_parser.add_argument(
+        "-P",
+        "--persistent",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Keep the TA session open for up to N sequences.",
+    )
+
+    parent_parser.add_argument(
+        "-I",
+        "--instance",
+        help="Name of this instance's output subfolder (default: device id).",
+    )
+
+    parent_parser.add_argument(
+        "-S",
+        "--sync",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="Import queue entries of sibling instances every SECONDS.",
+    )
+
+    parent_parser.add_argument(
+        "-Z",
+        "--compress",
+        choices=COMPRESSIONS.keys(),
+        default="none",
+        help="Compression of the stored sequences.",
+    )
+
+    parent_parser.add_argument(
+        "-p",
+        "--schedule",
+        choices=SCHEDULES.keys(),
+        default="uniform",
+        help="Power schedule picking the sequences to mutate.",
+    )
+
+    parent_parser.add_argument(
+        "-T",
+        "--trim-budget",
+        type=float,
+        default=0.1,
+        help="Share of the fuzzing time spent trimming new queue entries, "
+        "0 disables trimming.",
+    )
+
+    parent_parser.add_argument(
+        "-t",
+        "--timeout-factor",
+        type=float,
+        default=5.0,
+        help="Receive deadline of a command as multiple of its p99 latency, "
+        "0 keeps the fixed deadline.",
+    )
 
     # required arguments
     parent_parser.add_argument(
@@ -137,6 +218,10 @@ def main():
     arg_parser = setup_args()
     args = arg_parser.parse_args()
 
+    if args.coverage and args.persistent:
+        # the executor reports coverage per child, i.e., per session
+        arg_parser.error("--coverage cannot be combined with --persistent")
+
     runner = args.func(args)
 
     if args.duration:
@@ -2,13 +2,16 @@
 import os
 from io import BytesIO
 import logging
+import copy
 import struct
 import pickle
 import ctypes
 import hexdump
 import random
 
-from fuzz.utils import p32, u32, u64, p64
+from fuzz.utils import p32, u32, u64, p64, FolderFiles, write_files
+
+from typing import Dict, Mapping, Optional
 
 from . import tc
 from .tc import (
@@ -199,6 +202,13 @@ class TC_NS_ClientParam:
             return True
         return False
 
+    def clone(self):
+        """Returns a copy that can be mutated without affecting `self`.
+
+        The param contents are immutable and replaced on mutation, so they are
+        shared with the copy."""
+        return copy.copy(self)
+
     def mutate(self, mutate_func):
         if self._param_a:
             self._param_a = mutate_func(self._param_a, self._param_a_types)
@@ -539,16 +549,22 @@ class TC_NS_ClientContext:
 
     @classmethod
     def serialize_obj_to_path(cls, ctx, ctx_dir):
-        ctx_buf = cls._serialize_raw(ctx)
-        ctx_path = os.path.join(ctx_dir, cls.TC_NS_CLIENT_CONTEXT)
-        with open(ctx_path, "wb") as f:
-            f.write(ctx_buf)
+        write_files(ctx_dir, cls.serialize_obj_to_files(ctx))
+
+    def serialize_to_files(self) -> Dict[str, bytes]:
+        return self.serialize_obj_to_files(self)
+
+    @classmethod
+    def serialize_obj_to_files(cls, ctx) -> Dict[str, bytes]:
+        """Returns the raw dumps of `ctx` and its params by the names of the
+        files `serialize_obj_to_path()` stores them in."""
+        files = {cls.TC_NS_CLIENT_CONTEXT: cls._serialize_raw(ctx)}
 
         if ctx.params is None:
             # this should only be the case for non-success `ctx`s
             if ctx.code == TEEC_ReturnCode.TEEC_SUCCESS:
                 raise TcSerializationException("Successful ctx should have params")
-            return
+            return files
 
         for i, param in enumerate(ctx.params):
             param_type = tc.get_param_type(i, ctx.c_struct.paramTypes)
@@ -558,34 +574,24 @@ class TC_NS_ClientContext:
             if param_type in TC_NS_ClientParam.MEMREF_TYPES:
                 # store buffer
                 filename = cls.PARAMS[i][0]
-                param_path = os.path.join(ctx_dir, filename)
-                with open(param_path, "wb") as f:
-                    f.write(param._param_a)
+                files[filename] = param._param_a
 
                 # store buffer types
-                param_types_path = param_path + TC_NS_ClientContext.TYPES_EXT
                 if param._param_a_types:
-                    with open(param_types_path, "wb") as f:
-                        pickle.dump(param._param_a_types, f)
+                    files[filename + TC_NS_ClientContext.TYPES_EXT] = (
+                        pickle.dumps(param._param_a_types)
+                    )
 
                 # store size
-                filename = cls.PARAMS[i][2]
-                param_path = os.path.join(ctx_dir, filename)
-                with open(param_path, "wb") as f:
-                    f.write(param._param_c)
+                files[cls.PARAMS[i][2]] = param._param_c
             elif param_type in TC_NS_ClientParam.VALUE_TYPES:
                 # store a value
-                filename = cls.PARAMS[i][0]
-                param_path = os.path.join(ctx_dir, filename)
-                with open(param_path, "wb") as f:
-                    f.write(param._param_a)
+                files[cls.PARAMS[i][0]] = param._param_a
                 # store b value
-                filename = cls.PARAMS[i][1]
-                param_path = os.path.join(ctx_dir, filename)
-                with open(param_path, "wb") as f:
-                    f.write(param._param_b)
+                files[cls.PARAMS[i][1]] = param._param_b
             else:
                 raise TcSerializationException("Unknown param type")
+        return files
 
     def deserialize(self):
         return self.deserialize_obj(self)
@@ -688,12 +694,25 @@ class TC_NS_ClientContext:
         Returns:
             The deserialized context.
         """
-        ctx_path = os.path.join(ctx_dir, TC_NS_ClientContext.TC_NS_CLIENT_CONTEXT)
-        with open(ctx_path, "rb") as f:
-            ctx = TC_NS_ClientContext._deserialize_raw(f.read())
+        return cls.deserialize_raw_from_files(FolderFiles(ctx_dir), ctx_dir)
+
+    @classmethod
+    def deserialize_raw_from_files(
+        cls, files: Mapping[str, bytes], ctx_dir: Optional[str] = None
+    ):
+        """Like `deserialize_raw_from_path()`, but reads the raw dumps from
+        `files` (file name -> content).
+
+        Args:
+            `files`: the files of a context folder
+            `ctx_dir`: the folder `files` were read from, if any
+        """
+        ctx = TC_NS_ClientContext._deserialize_raw(
+            files[TC_NS_ClientContext.TC_NS_CLIENT_CONTEXT]
+        )
 
         if ctx.code == TEEC_ReturnCode.TEEC_SUCCESS:
-            ctx.params = ctx._load_params_from_folder(ctx_dir)
+            ctx.params = ctx._load_params_from_files(files, ctx_dir)
         else:
             ctx.params = []
             for i in range(TC_NS_ClientContext.NUM_PARAMS):
@@ -711,14 +730,15 @@ class TC_NS_ClientContext:
             ctx = pickle.load(f)
         return TC_NS_ClientContext.serialize_raw_with_params(ctx)
 
-    def _load_params_from_folder(self, _dir):
-        """Loads parameters from a folder and returns them.
+    def _load_params_from_files(self, files, _dir):
+        """Loads parameters from the files of a folder and returns them.
 
-        This functions loads parameter values from the files in folder_path.
+        This functions loads parameter values from `files`.
         It searches for the parameter expected by the context `self`.
 
         Args:
-            folder_path: path to folder containing raw params
+            files: the files of the folder containing raw params
+            _dir: path to folder containing raw params, if any
 
         Returns:
             List of `TC_NS_ClientParam` objects.
@@ -726,24 +746,19 @@ class TC_NS_ClientContext:
         params = []
         for i, param in enumerate(self.PARAMS):
             param_type = tc.get_param_type(i, self.c_struct.paramTypes)
-            param_a_path = os.path.join(_dir, param[0])
-            param_a_types_path = param_a_path + self.TYPES_EXT
+            param_a_path = os.path.join(_dir, param[0]) if _dir else None
+            param_a_types_name = param[0] + self.TYPES_EXT
             param_a_types = None
-            param_b_path = os.path.join(_dir, param[1])
-            param_c_path = os.path.join(_dir, param[2])
 
             if param_type is TEEC_ParamType.TEEC_NONE:
                 params.append(TC_NS_ClientParam(param_type, None, None, None))
             elif param_type in TC_NS_ClientParam.MEMREF_TYPES:
-                if os.path.exists(param_a_path):
+                if param[0] in files:
                     param_path = param_a_path
-                    with open(param_a_path, "rb") as f:
-                        param_a = f.read()
-                    with open(param_c_path, "rb") as f:
-                        param_c = f.read()
-                    if os.path.exists(param_a_types_path):
-                        with open(param_a_types_path, "rb") as f:
-                            param_a_types = pickle.load(f)
+                    param_a = files[param[0]]
+                    param_c = files[param[2]]
+                    if param_a_types_name in files:
+                        param_a_types = pickle.loads(files[param_a_types_name])
                 else:
                     param_path = None
                     param_a = None
@@ -754,17 +769,15 @@ class TC_NS_ClientContext:
                 client_param.data_paths = [param_path] if param_path else None
                 params.append(client_param)
             elif param_type in TC_NS_ClientParam.VALUE_TYPES:
-                if os.path.exists(param_a_path):
-                    with open(param_a_path, "rb") as f:
-                        param_a = f.read()
-                    with open(param_b_path, "rb") as f:
-                        param_b = f.read()
+                if param[0] in files:
+                    param_a = files[param[0]]
+                    param_b = files[param[1]]
                 else:
                     param_a = None
                     param_b = None
 
-                client_param.data_paths = [param_a_path] if param_a_path else None
                 client_param = TC_NS_ClientParam(param_type, param_a, param_b, None)
+                client_param.data_paths = [param_a_path] if param_a_path else None
 
                 params.append(client_param)
             else:
@@ -789,6 +802,14 @@ class TC_NS_ClientContext:
             valdep.src_sz,
         )
 
+    def clone(self):
+        """Returns a copy that can be mutated without affecting `self`."""
+        ctx = copy.copy(self)
+        ctx.c_struct = type(self.c_struct).from_buffer_copy(self.c_struct)
+        if self.params is not None:
+            ctx.params = [p.clone() if p else p for p in self.params]
+        return ctx
+
     def mutate(self, mutate_func):
         self.c_struct.cmd_id = u32(mutate_func(p32(self.c_struct.cmd_id), "uint32_t"))
         return
@@ -14,9 +14,12 @@ class SeedSequenceMutator:
     @staticmethod
     def mutate(seedseq: SeedSequence) -> None:
         if seedseq._seed_deps:
-            ioctl: IoctlCall = random.choice(seedseq._seed_deps)
+            ioctl_idx = random.randrange(0, len(seedseq._seed_deps))
+            ioctl: IoctlCall = seedseq._seed_deps[ioctl_idx]
 
             if ioctl.value_dependencies:
                 del_idx = random.randrange(0, len(ioctl.value_dependencies))
                 log.debug(f"Deleting ValueDependency at idx {del_idx}")
+                # the dependencies might be shared with other sequences
+                ioctl = seedseq.mutable_dependencies()[ioctl_idx]
                 del ioctl.value_dependencies[del_idx]
@@ -2,13 +2,19 @@ import struct
 import random
 import re
 import logging
+import functools
 from fuzz.seed.seedtemplate import SeedTemplate
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
+# typed fields `(start, size, type)` and untyped chunks `(start, end)`
+FieldTable = Tuple[List[Tuple[int, int, str]], List[Tuple[int, int]]]
+# mutates the field at `buf[off:off + size]` in place
+FieldMutator = Callable[[bytearray, int, int], None]
+
 
 class TemplateMutatorException(Exception):
     pass
@@ -56,16 +62,22 @@ class TemplateMutator:
 
     BYTE_TYPES = ["char*", "unsigned char*", "uint8_t*", "int8_t*"]
 
+    # `struct` formats and value masks for numeric fields by size
+    FMT = {1: "<B", 2: "<H", 4: "<I", 8: "<Q"}
+    MASK = {1: 0xFF, 2: 0xFFFF, 4: 0xFFFFFFFF, 8: 0xFFFFFFFFFFFFFFFF}
+
     def __init__(self, proto_module):
         import importlib
 
         self._proto = importlib.import_module(proto_module)
-        self.fpack = {
-            1: TemplateMutator._p8,
-            2: TemplateMutator._p16,
-            4: TemplateMutator._p32,
-            8: TemplateMutator._p64,
+        # values of the TA-specific enums by mangled type name
+        enums = self._proto.DESCRIPTOR.enum_types_by_name
+        self._enums: Dict[str, List[int]] = {
+            name: [v.number for v in enum_desc.values]
+            for name, enum_desc in enums.items()
         }
+        # field mutators by type name, see `_field_mutator()`
+        self._field_mutators: Dict[str, FieldMutator] = {}
 
     def mutate(self, data: bytes, type: Optional[SeedTemplate] = None) -> bytes:
         """Mutate `data` and return the mutated data.
@@ -79,28 +91,38 @@ class TemplateMutator:
         if type:
             assert isinstance(type, SeedTemplate), f"{type} not SeedTemplate"
 
+        buf = bytearray(data)
         if not type:
             # apply bit flips if we don't have a type
-            data = TemplateMutator._flip_random_bit(data)
+            TemplateMutator._flip_random_bit_into(buf, 0, len(buf))
         else:
-            data = self._mutate_complex(data, type)
-        return data
-
-    @staticmethod
-    def _p8(v: int) -> bytes:
-        return struct.pack("<B", v & 0xFF)
+            table = self._get_field_table(type, len(buf))
+            self._mutate_complex_into(buf, table)
+        return bytes(buf)
 
-    @staticmethod
-    def _p16(v: int) -> bytes:
-        return struct.pack("<H", v & 0xFFFF)
+    def mutate_batch(
+        self, data: bytes, type: Optional[SeedTemplate], k: int
+    ) -> List[bytes]:
+        """Returns `k` mutants of `data`.
 
-    @staticmethod
-    def _p32(v: int) -> bytes:
-        return struct.pack("<I", v & 0xFFFFFFFF)
+        Same as calling `mutate(data, type)` `k` times, but the field table
+        of `type` is only looked up once.
+        """
+        if not type:
+            table = None
+        else:
+            assert isinstance(type, SeedTemplate), f"{type} not SeedTemplate"
+            table = self._get_field_table(type, len(data))
 
-    @staticmethod
-    def _p64(v: int) -> bytes:
-        return struct.pack("<Q", v & 0xFFFFFFFFFFFFFFFF)
+        mutants = []
+        for _ in range(k):
+            buf = bytearray(data)
+            if table is None:
+                TemplateMutator._flip_random_bit_into(buf, 0, len(buf))
+            else:
+                self._mutate_complex_into(buf, table)
+            mutants.append(bytes(buf))
+        return mutants
 
     def _mangle_type_name(self, type_name: str) -> str:
         # TODO implement actual mangling
@@ -121,113 +143,102 @@ class TemplateMutator:
             out_type_name = " ".join(tokens)
         return out_type_name
 
-    def _mutate_complex(self, data: bytes, types: SeedTemplate) -> bytes:
-        # get first param's data and types
-        types = {e.start: (e.size, e.type) for e in types.listify()}
-        type_keys = list(types.keys())
-
-        # TODO: pre-compute this and add to `SeedTemplate`
-        untyped_chunks = []
-        off = 0
-        for k, v in types.items():
-            if off < k:
-                untyped_chunks.append((off, k))
-            off = k + v[0]
-
-        # we mutate at least 1 and up to `len(type_keys)` typed fields of `data`
-        ntypes = min(len(type_keys), 1 << random.randint(0, 5))
+    @staticmethod
+    def _get_field_table(types: SeedTemplate, size: int) -> FieldTable:
+        """Returns the typed fields and the untyped chunks of `types`.
+
+        Fields are clipped to `size`, the size of the data to be mutated.
+        """
+        fields = types.typed_chunks
+        if size < types.size:
+            fields = [
+                (start, min(sz, size - start), type_)
+                for start, sz, type_ in fields
+            ]
+        return fields, types.untyped_chunks
+
+    def _mutate_complex_into(self, buf: bytearray, table: FieldTable) -> None:
+        fields, untyped_chunks = table
+
+        # we mutate at least 1 and up to `len(fields)` typed fields of `data`
+        ntypes = min(len(fields), 1 << random.randint(0, 5))
         nnotypes = min(len(untyped_chunks), 1 << random.randint(0, 5))
         # log.info(f"Mutating {ntypes} typed fields of current `param`")
 
         for _ in range(0, ntypes):
-            type_idx = random.choice(type_keys)
-            sz = types[type_idx][0]
-            type_ = types[type_idx][1]
-            updated = self._mutate_field(data[type_idx : type_idx + sz], type_)
-            data = data[:type_idx] + updated + data[type_idx + sz :]
+            start, sz, type_ = random.choice(fields)
+            self._field_mutator(type_)(buf, start, sz)
 
         for _ in range(0, nnotypes):
             start, end = random.choice(untyped_chunks)
-            data = (
-                data[:start]
-                + TemplateMutator._flip_random_bit(data[start:end])
-                + data[end:]
-            )
-
-        return data
+            TemplateMutator._flip_random_bit_into(buf, start, end)
 
     @staticmethod
-    def _flip_random_bit(data: bytes) -> bytes:
-        target_byte = random.randint(0, len(data) - 1)
-        data_low = data[:target_byte]
-        b = struct.pack("<B", data[target_byte] ^ (0x1 << random.randint(0, 7)))
-        data_high = data[target_byte + 1 :]
-        out = data_low + b + data_high
-        assert len(data) == len(out)
-        return out
-
-    def _mutate_field(self, data: bytes, type_: str):
-        size = len(data)
+    def _flip_random_bit_into(buf: bytearray, start: int, end: int) -> None:
+        target_byte = random.randint(start, end - 1)
+        buf[target_byte] ^= 0x1 << random.randint(0, 7)
+
+    def _field_mutator(self, type_: str) -> FieldMutator:
+        """Returns the function mutating fields of type `type_`.
+
+        The function is resolved from the type name once and cached.
+        """
+        mutate_field = self._field_mutators.get(type_)
+        if mutate_field is None:
+            mutate_field = self._resolve_field_mutator(type_)
+            self._field_mutators[type_] = mutate_field
+        return mutate_field
+
+    def _resolve_field_mutator(self, type_: str) -> FieldMutator:
         mangled_type = self._mangle_type_name(type_)
         type_name = self._normalize_type(type_)
 
-        if mangled_type in self._proto.DESCRIPTOR.enum_types_by_name:
+        if mangled_type in self._enums:
             log.info(f"Type: {type_}")
             # handle TA-specific enum
-            enum_desc = self._proto.DESCRIPTOR.enum_types_by_name[mangled_type]
-            vals = [v for v in enum_desc.values]
-            val = random.choice(vals)
-            data = self.fpack[size](val.number)
+            return functools.partial(
+                TemplateMutator._mutate_enum, self._enums[mangled_type]
+            )
         elif type_name in self.NUMERIC_TYPES:
             # handle numeric types
-            # log.info("Mutating {}".format(type_))
-            if len(data) == 1:
-                char_magic_vals = [
-                    0x0,
-                    0x7F,
-                    0x80,
-                    0xFF,
-                    random.randint(0x1, 0xFE),
-                ]
-                data = self._p8(random.choice(char_magic_vals))
-            elif len(data) == 2:
-                short_magic_vals = [
-                    0x0,
-                    0x7FFF,
-                    0x8000,
-                    0xFFFF,
-                    random.randint(0x1, 0xFFFE),
-                ]
-                data = self._p16(random.choice(short_magic_vals))
-            elif len(data) == 4:
-                int_magic_vals = [
-                    0x0,
-                    0x7FFFFFFF,
-                    0x80000000,
-                    0xFFFFFFFF,
-                    random.randint(0x1, 0xFFFFFFFE),
-                ]
-                data = self._p32(random.choice(int_magic_vals))
-            elif len(data) == 8:
-                longlong_magic_vals = [
-                    0x0,
-                    0x7FFFFFFFFFFFFFFF,
-                    0x8000000000000000,
-                    0xFFFFFFFFFFFFFFFF,
-                    random.randint(0x1, 0xFFFFFFFFFFFFFFFE),
-                ]
-                data = self._p64(random.choice(longlong_magic_vals))
-            else:
-                raise NotImplementedError("Implement me!")
+            return TemplateMutator._mutate_numeric
         elif type_name == "bool":
-            assert len(data) == 1, "Expected `bool` to be of sz=1"
-            data = b"\x01" if data == b"\x00" else b"\x01"
+            return TemplateMutator._mutate_bool
         elif type_name in self.BYTE_TYPES or re.match(r".*\[\d+\]", type_name):
             # handle pointers to byte sequences
             # matches for array types (i.e., uint8_t[3])
-            data = self._flip_random_bit(data)
+            return TemplateMutator._mutate_bytes
         else:
             log.warn(f"Type `{type_name}` not found.")
-            data = self._flip_random_bit(data)
+            return TemplateMutator._mutate_bytes
 
-        return data
+    @staticmethod
+    def _mutate_enum(
+        vals: List[int], buf: bytearray, off: int, size: int
+    ) -> None:
+        val = random.choice(vals) & TemplateMutator.MASK[size]
+        struct.pack_into(TemplateMutator.FMT[size], buf, off, val)
+
+    @staticmethod
+    def _mutate_numeric(buf: bytearray, off: int, size: int) -> None:
+        if size not in TemplateMutator.FMT:
+            raise NotImplementedError("Implement me!")
+        mask = TemplateMutator.MASK[size]
+        magic_vals = [
+            0x0,
+            mask >> 1,
+            (mask >> 1) + 1,
+            mask,
+            random.randint(0x1, mask - 1),
+        ]
+        val = random.choice(magic_vals)
+        struct.pack_into(TemplateMutator.FMT[size], buf, off, val)
+
+    @staticmethod
+    def _mutate_bool(buf: bytearray, off: int, size: int) -> None:
+        assert size == 1, "Expected `bool` to be of sz=1"
+        buf[off] = 0x01
+
+    @staticmethod
+    def _mutate_bytes(buf: bytearray, off: int, size: int) -> None:
+        TemplateMutator._flip_random_bit_into(buf, off, off + size)
@@ -0,0 +1,130 @@
+"""Trimming of new queue entries, similar to AFL's trim stage.
+
+Every interaction of a sequence is a round trip to the executor on the
+device, so shorter sequences run proportionally faster. The trimmer tries
+candidates that are smaller than the sequence and keeps the ones the
+caller's `check` accepts, i.e., the ones producing the same coverage. In
+order, it tries to
+
+    1) drop trailing interactions, starting with half of the sequence,
+    2) drop single interactions no other interaction depends on, and
+    3) shrink the memref input data of interactions without value
+       dependencies, halving it while the data still has the same effect.
+"""
+from __future__ import annotations
+import logging
+
+from typing import Callable
+
+from fuzz.seed.seedsequence import SeedSequence
+
+
+log = logging.getLogger(__name__)
+
+
+class TrimAborted(Exception):
+    """Raised by a `check` to stop trimming, e.g., when the target stopped
+    responding."""
+
+    pass
+
+
+class SequenceTrimmer(object):
+    """Trims a `SeedSequence` running at most `max_execs` candidates.
+
+    `check` runs a candidate and returns `True` if it behaves like the
+    original sequence.
+    """
+
+    MIN_DATA_SIZE = 4
+
+    def __init__(
+        self, check: Callable[[SeedSequence], bool], max_execs: int = 64
+    ):
+        self._check = check
+        self._max_execs = max_execs
+        self.execs = 0
+
+    def _exhausted(self) -> bool:
+        return self.execs >= self._max_execs
+
+    def _try(self, candidate: SeedSequence) -> bool:
+        self.execs += 1
+        return self._check(candidate)
+
+    def trim(self, seedseq: SeedSequence) -> SeedSequence:
+        """Returns the smallest accepted candidate, `seedseq` itself if no
+        candidate was accepted. `seedseq` is not modified."""
+        best = seedseq
+        try:
+            best = self._trim_tail(best)
+            best = self._trim_calls(best)
+            best = self._trim_data(best)
+        except TrimAborted:
+            log.debug("Trimming aborted.")
+        return best
+
+    def _trim_tail(self, best: SeedSequence) -> SeedSequence:
+        # calls only depend on preceding calls, a tail can always go
+        step = len(best) // 2
+        while step and not self._exhausted():
+            if step >= len(best):
+                step //= 2
+                continue
+            candidate = best.clone()
+            candidate.remove_range(len(best) - step, len(best))
+            if self._try(candidate):
+                best = candidate
+            else:
+                step //= 2
+        return best
+
+    @staticmethod
+    def is_removable(seedseq: SeedSequence, idx: int) -> bool:
+        """`True` if the interaction at `idx` can be dropped without breaking
+        the value dependencies of `seedseq`.
+
+        Dependencies are resolved by the position of their source call, so
+        neither the call at `idx` nor any call after it may be a source."""
+        deps = seedseq.dependencies()
+        if not deps or not seedseq.has_value_dependencies():
+            return True
+        base = deps[0].dump_id
+        src_idxs = {
+            valdep.src_ioctl_call.dump_id - base
+            for valdep in deps.get_value_dependencies()
+        }
+        return all(src_idx < idx for src_idx in src_idxs)
+
+    def _trim_calls(self, best: SeedSequence) -> SeedSequence:
+        idx = len(best) - 1
+        while idx >= 0 and len(best) > 1 and not self._exhausted():
+            if self.is_removable(best, idx):
+                candidate = best.clone()
+                candidate.remove_range(idx, idx + 1)
+                if self._try(candidate):
+                    best = candidate
+            idx -= 1
+        return best
+
+    def _trim_data(self, best: SeedSequence) -> SeedSequence:
+        deps = best.dependencies()
+        for seed_idx in range(len(best)):
+            if deps and deps[seed_idx].value_dependencies:
+                # resolving a value dependency writes into the input data
+                continue
+            for param_idx, param in enumerate(best[seed_idx].input.params):
+                # only some TEEs support shrinking the data of a param
+                if not hasattr(param, "truncate_data") or not param.data:
+                    continue
+                size = len(param.data) // 2
+                while size >= self.MIN_DATA_SIZE and not self._exhausted():
+                    candidate = best.clone()
+                    candidate[seed_idx].input.params[param_idx].truncate_data(
+                        size
+                    )
+                    if not self._try(candidate):
+                        break
+                    best = candidate
+                    size //= 2
+        return best
@@ -2,16 +2,17 @@ from __future__ import annotations
 import os
 from io import BytesIO
 import logging
+import copy
 import functools
 import ctypes
 import pickle
 import random
 
 from . import optee
-from fuzz.utils import p32, u32, u64, p64
+from fuzz.utils import p32, u32, u64, p64, FolderFiles, write_files
 from fuzz.seed.seedtemplate import SeedTemplate
 
-from typing import List, Tuple, Any, Callable
+from typing import List, Tuple, Any, Callable, Dict, Mapping, Optional
 
 
 log = logging.getLogger(__file__)
@@ -168,6 +169,15 @@ class TeeIoctlParam(object):
         param.data = None
         return param
 
+    def clone(self) -> TeeIoctlParam:
+        """Returns a copy that can be mutated without affecting `self`.
+
+        Only the `c_struct` is copied. `data` is immutable and replaced on
+        mutation, the `SeedTemplate` is shared."""
+        param = copy.copy(self)
+        param.c_struct = cTeeIoctlParam.from_buffer_copy(self.c_struct)
+        return param
+
     def mutate(self, mutate_func: Callable[[Any], Any]):
         r = random.random()
 
@@ -206,6 +216,26 @@ class TeeIoctlParam(object):
             self.data = mutate_func(self.data)
         return
 
+    def set_data(self, data: bytes) -> None:
+        """Replaces the data of a memref with `data` of the same size."""
+        self.data = data
+
+    def truncate_data(self, size: int) -> None:
+        """Shrinks the data of a memref input to its first `size` bytes."""
+        self.data = self.data[:size]
+        # the signaled size must not exceed the buffer, see `mutate()`
+        self.c_struct.b = min(self.c_struct.b, size)
+        if self.types:
+            # the template is shared with the clones, build a clipped one
+            self.types = SeedTemplate(
+                len(self.data),
+                [
+                    elem
+                    for elem in self.types.listify()
+                    if elem.end <= len(self.data)
+                ],
+            )
+
     def __str__(self):
         out = ""
         out += "struct tee_ioctl_param\n"
@@ -336,6 +366,15 @@ class TeeIoctlInvokeArg(ctypes.Structure):
         `TeeIoctlInvokeArg`."""
         return (self.func, self.get_param_types(), self.ret, self.ret_origin)
 
+    def clone(self) -> TeeIoctlInvokeArg:
+        """Returns a copy that can be mutated without affecting `self`."""
+        invoke_arg = type(self)()
+        invoke_arg.c_struct = cTeeIoctlInvokeArg.from_buffer_copy(
+            self.c_struct
+        )
+        invoke_arg.params = [param.clone() for param in self.params]
+        return invoke_arg
+
     def mutate(self, mutate_func):
         # TODO: we do not mutate the cmd id in favor of leveraging known cmd ids
         # in combination with paramTypes, return status, and return origin as
@@ -419,51 +458,68 @@ class TeeIoctlInvokeArg(ctypes.Structure):
         Returns:
             The deserialized invoke arg.
         """
-        invoke_arg_path = os.path.join(invoke_arg_dir, cls.INVOKE_ARG_PREFIX)
-        with open(invoke_arg_path, "rb") as f:
-            invoke_arg = TeeIoctlInvokeArg._deserialize_raw(f.read())
-            for param in invoke_arg.c_struct.params:
-                p = TeeIoctlParam.deserialize_raw(bytes(param))
-                invoke_arg.params.append(p)
-
-        invoke_arg._load_params_from_folder(invoke_arg_dir)
+        return cls.deserialize_raw_from_files(
+            FolderFiles(invoke_arg_dir), invoke_arg_dir
+        )
+
+    @classmethod
+    def deserialize_raw_from_files(
+        cls, files: Mapping[str, bytes], invoke_arg_dir: Optional[str] = None
+    ) -> TeeIoctlInvokeArg:
+        """Like `deserialize_raw_from_path()`, but reads the raw dumps from
+        `files` (file name -> content).
+
+        Args:
+            `files`: the files of an invoke arg folder
+            `invoke_arg_dir`: the folder `files` were read from, if any
+        """
+        invoke_arg = TeeIoctlInvokeArg._deserialize_raw(
+            files[cls.INVOKE_ARG_PREFIX]
+        )
+        for param in invoke_arg.c_struct.params:
+            p = TeeIoctlParam.deserialize_raw(bytes(param))
+            invoke_arg.params.append(p)
+
+        invoke_arg._load_params_from_files(files, invoke_arg_dir)
         invoke_arg.sanity_check()
 
         return invoke_arg
 
-    def _load_params_from_folder(self, folder_path: str):
-        """Loads parameter contents and types from a folder.
+    def _load_params_from_files(
+        self, files: Mapping[str, bytes], folder_path: Optional[str]
+    ):
+        """Loads parameter contents and types from the files of a folder.
 
-        This functions loads parameter values from the files in folder_path.
+        This functions loads parameter values from `files`.
         It searches for the parameter expected by the invoke arg `self`.
 
         Args:
-            folder_path: path to folder containing raw params
+            files: the files of the folder containing raw params
+            folder_path: path to folder containing raw params, if any
         """
         for i, param in enumerate(self.params):
             if param.attr == optee.TEEC_ParamType.TEEC_NONE:
                 continue
 
             # get data
-            param_data_path = os.path.join(
-                folder_path, TeeIoctlInvokeArg.PARAMS[i][3]
-            )
-            if os.path.exists(param_data_path):
-                with open(param_data_path, "rb") as f:
-                    param.data = f.read()
-                param.data_paths = [param_data_path]
+            param_data_name = TeeIoctlInvokeArg.PARAMS[i][3]
+            if param_data_name in files:
+                param.data = files[param_data_name]
+                param.data_paths = (
+                    [os.path.join(folder_path, param_data_name)]
+                    if folder_path
+                    else []
+                )
             else:
                 param.data = None
                 param.data_paths = []
 
             # get types for data
             tmp_filename = "{}{}".format(
-                TeeIoctlInvokeArg.PARAMS[i][3], TeeIoctlInvokeArg.TYPES_EXT
+                param_data_name, TeeIoctlInvokeArg.TYPES_EXT
             )
-            param_data_types_path = os.path.join(folder_path, tmp_filename)
-            if os.path.exists(param_data_types_path):
-                with open(param_data_types_path, "rb") as f:
-                    param.types: SeedTemplate = pickle.load(f)
+            if tmp_filename in files:
+                param.types: SeedTemplate = pickle.loads(files[tmp_filename])
             else:
                 param.types = None
 
@@ -540,30 +596,33 @@ class TeeIoctlInvokeArg(ctypes.Structure):
 
     @classmethod
     def serialize_obj_to_path(cls, invoke_arg, invoke_arg_dir):
-        arg_buf = cls._serialize_raw(invoke_arg)
-        with open(
-            os.path.join(invoke_arg_dir, TeeIoctlInvokeArg.INVOKE_ARG_PREFIX),
-            "wb",
-        ) as f:
-            f.write(arg_buf)
+        write_files(invoke_arg_dir, cls.serialize_obj_to_files(invoke_arg))
+
+    def serialize_to_files(self) -> Dict[str, bytes]:
+        return self.serialize_obj_to_files(self)
+
+    @classmethod
+    def serialize_obj_to_files(cls, invoke_arg) -> Dict[str, bytes]:
+        """Returns the raw dumps of `invoke_arg` and its params by the names
+        of the files `serialize_obj_to_path()` stores them in."""
+        files = {}
+        files[TeeIoctlInvokeArg.INVOKE_ARG_PREFIX] = cls._serialize_raw(
+            invoke_arg
+        )
 
         for i, param in enumerate(invoke_arg.params):
             if param.attr == optee.TEEC_ParamType.TEEC_NONE:
                 continue
 
-            param_data_path = os.path.join(
-                invoke_arg_dir, TeeIoctlInvokeArg.PARAMS[i][3]
-            )
+            param_data_name = TeeIoctlInvokeArg.PARAMS[i][3]
 
             # store data
             if param.data:
-                with open(param_data_path, "wb") as f:
-                    f.write(param.data)
+                files[param_data_name] = bytes(param.data)
 
             # store types
             if param.types:
-                with open(f"{param_data_path}.types", "wb") as f:
-                    pickle.dump(param.types, f)
+                files[f"{param_data_name}.types"] = pickle.dumps(param.types)
 
             if param.types and (param.types.size != len(param.data)):
                 # sanity check, investigate during debug
@@ -572,6 +631,8 @@ class TeeIoctlInvokeArg(ctypes.Structure):
                 ipdb.set_trace()
                 # TODO: substitute with assertion
 
+        return files
+
     def sanity_check(self):
         for i, param in enumerate(self.params):
             if param.types and (param.types.size != len(param.data)):
@@ -10,12 +10,12 @@ log = logging.getLogger(__name__)
 
 class AdbOrchestrator(AdbProc):
 
-    def __init__(self, target_tee, port, device_id, log_dir):
+    def __init__(self, target_tee, port, device_id, log_dir, loop=None):
         args = f"{target_tee} {port}"
         executable_path = os.path.join(config.TARGET_EXECUTOR_DIR,
                                        config.TARGET_EXECUTOR_NAME)
         super(AdbOrchestrator, self).__init__("executor", executable_path,
-                                              args, device_id, log_dir)
+                                              args, device_id, log_dir, loop)
 
         self.port = port
 
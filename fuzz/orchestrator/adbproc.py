@@ -1,8 +1,10 @@
+import asyncio
 import logging
 import os
-import signal
+import select
 import shutil
 import glob
+import time
 from subprocess import TimeoutExpired
 from threading import Thread
 
@@ -18,7 +20,13 @@ class AdbProcExcpetion(Exception):
 
 
 class AdbProc(object):
-    def __init__(self, name, executable_path, args, device_id, log_dir):
+    # interval in seconds to poll the log file for new lines
+    LOG_POLL_INTERVAL = 0.05
+
+    def __init__(self, name, executable_path, args, device_id, log_dir,
+                 loop=None):
+        """`loop` is an asyncio event loop that copies the process' output to
+        the log file. Without a loop, a thread is started for this."""
 
         self.name = name
         self.executable_path = executable_path
@@ -62,14 +70,21 @@ class AdbProc(object):
                 new_id = 1
             shutil.move(self.log_path, f"{self.log_path}.{new_id}")
 
-        # logging thread
         self.logf = open(self.log_path, "ab")
-        self.logging_thread = Thread(target=self.log_to_file,
-                                     args=(self._adb_proc.stdout, self.logf))
-        self.logging_thread.daemon = True  # thread dies with the program
-        self.logging_thread.start()
+        self._loop = loop
+        if loop is not None:
+            self._log_fd = self._adb_proc.stdout.fileno()
+            loop.add_reader(self._log_fd, self._pump_log)
+        else:
+            # logging thread
+            self.logging_thread = Thread(target=self.log_to_file,
+                                         args=(self._adb_proc.stdout,
+                                               self.logf))
+            self.logging_thread.daemon = True  # thread dies with the program
+            self.logging_thread.start()
 
     def __del__(self):
+        self._stop_pump()
         self.logf.close()
         self._adb_proc.kill()
         self._adb_proc.stdout.close()
@@ -86,18 +101,60 @@ class AdbProc(object):
             if self.executable_path in out.decode():
                 adb.kill(pid, self.device_id)
 
+    def _stop_pump(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._log_fd)
+
+    def _pump_log(self):
+        """Copies the available output of the process to the log file."""
+        data = os.read(self._log_fd, 64 * 1024)
+        if not data:
+            # the process is gone
+            self._stop_pump()
+            return
+        self.logf.write(data)
+        self.logf.flush()
+
+    def _wait_log(self, timeout):
+        """Pumps the log while we block the event loop that would do so."""
+        ready, _, _ = select.select([self._log_fd], [], [], timeout)
+        if ready:
+            self._pump_log()
+
     def log_recv_until(self, s, timeout=5):
-        signal.signal(signal.SIGALRM, AdbProc.sig_unexpected_behavior)
-        signal.alarm(timeout)
+        """Blocks until `s` shows up in the log, raises `TimeoutExpired` if
+        it does not within `timeout` seconds."""
+        deadline = time.monotonic() + timeout
         with open(self.log_path, "rb") as logf:
             out = b""
-            while s not in out.decode():
-                out += logf.readline()
-        signal.alarm(0)
-
-    @staticmethod
-    def sig_unexpected_behavior(signum, frame):
-        raise TimeoutExpired("executor", 5)
+            while s.encode() not in out:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutExpired(self.name, timeout)
+                line = logf.readline()
+                if line:
+                    out += line
+                elif self._loop is not None:
+                    self._wait_log(min(remaining, self.LOG_POLL_INTERVAL))
+                else:
+                    time.sleep(min(remaining, self.LOG_POLL_INTERVAL))
+
+    async def wait_log(self, s, timeout=5):
+        """Like `log_recv_until()`, but waits without blocking the event
+        loop."""
+        deadline = time.monotonic() + timeout
+        with open(self.log_path, "rb") as logf:
+            out = b""
+            while s.encode() not in out:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutExpired(self.name, timeout)
+                line = logf.readline()
+                if line:
+                    out += line
+                else:
+                    await asyncio.sleep(
+                        min(remaining, self.LOG_POLL_INTERVAL))
 
     @staticmethod
     def log_to_file(out, logfile):
@@ -1,10 +1,11 @@
 import logging
 import os
+import copy
 import hexdump
-from typing import Union, List, Callable
+from typing import Union, List, Callable, Dict, Mapping, Optional
 from io import BytesIO
 
-from fuzz.utils import p32, u32, u64, p64, us32
+from fuzz.utils import p32, u32, u64, p64, us32, FolderFiles, write_files
 
 log = logging.getLogger(__file__)
 
@@ -30,11 +31,19 @@ class QseecomParam():
             paths.append(self._path)
         return paths
 
+    def clone(self):
+        """Returns a copy that can be mutated without affecting `self`."""
+        return copy.copy(self)
+
     def mutate(self, mutate_func: Callable):
         if self._data:
             self._data = mutate_func(self._data)
         return
 
+    def set_data(self, data: bytes):
+        """ Replace the data with `data` of the same size. """
+        self._data = data
+
     def is_input(self) -> bool:
         return self._is_input
 
@@ -64,6 +73,14 @@ class QseecomReq(object):
         self.params.append(self._req)
         self.params.append(self._resp)
 
+    def clone(self):
+        """Returns a copy that can be mutated without affecting `self`."""
+        req = copy.copy(self)
+        req._req = self._req.clone()
+        req._resp = self._resp.clone()
+        req.params = [req._req, req._resp]
+        return req
+
     def satisfy_dependency(self, dep, mutant_from):
         """Adjusts mutant concerning the dependency dep with data from mutant_from.
 
@@ -201,9 +218,11 @@ class QseecomSendCmdReq(QseecomReq):
     +serialize_obj()
     +deserialize_obj()
     +serialize_obj_to_path()
+    +serialize_obj_to_files()
     +deserialize_obj()
     +serialize()
     +serialize_to_path()
+    +serialize_to_files()
     +deserialize()
     +bool is_crash()
     +bool is_success()
@@ -245,17 +264,22 @@ class QseecomSendCmdReq(QseecomReq):
 
     @classmethod
     def deserialize_raw_from_path(cls, req_dir: str):
-        req_path = os.path.join(req_dir,
-                                QseecomSendCmdReq.QSEECOM_SEND_CMD_REQ_BUF)
-        resp_path = os.path.join(req_dir,
-                                 QseecomSendCmdReq.QSEECOM_SEND_CMD_RESP_BUF)
-        with open(req_path, "rb") as f:
-            req_buf = f.read()
-        with open(resp_path, "rb") as f:
-            resp_buf = f.read()
+        return cls.deserialize_raw_from_files(FolderFiles(req_dir), req_dir)
+
+    @classmethod
+    def deserialize_raw_from_files(cls,
+                                   files: Mapping[str, bytes],
+                                   req_dir: Optional[str] = None):
+        """Like `deserialize_raw_from_path()`, but reads the request and
+        response buffers from `files` (file name -> content)."""
+        req_buf = files[QseecomSendCmdReq.QSEECOM_SEND_CMD_REQ_BUF]
+        resp_buf = files[QseecomSendCmdReq.QSEECOM_SEND_CMD_RESP_BUF]
         obj = cls(req_buf, resp_buf)
-        obj._req._path = req_path
-        obj._resp._path = resp_path
+        if req_dir:
+            obj._req._path = os.path.join(
+                req_dir, QseecomSendCmdReq.QSEECOM_SEND_CMD_REQ_BUF)
+            obj._resp._path = os.path.join(
+                req_dir, QseecomSendCmdReq.QSEECOM_SEND_CMD_RESP_BUF)
         return obj
 
     @classmethod
@@ -293,14 +317,17 @@ class QseecomSendCmdReq(QseecomReq):
 
     @classmethod
     def serialize_obj_to_path(cls, send_cmd_obj, send_cmd_dir):
+        write_files(send_cmd_dir, cls.serialize_obj_to_files(send_cmd_obj))
 
-        ctx_path = os.path.join(send_cmd_dir, cls.QSEECOM_SEND_CMD_REQ_BUF)
-        with open(ctx_path, "wb") as f:
-            f.write(send_cmd_obj._req.data)
+    def serialize_to_files(self) -> Dict[str, bytes]:
+        return self.serialize_obj_to_files(self)
 
-        ctx_path = os.path.join(send_cmd_dir, cls.QSEECOM_SEND_CMD_RESP_BUF)
-        with open(ctx_path, "wb") as f:
-            f.write(send_cmd_obj._resp.data)
+    @classmethod
+    def serialize_obj_to_files(cls, send_cmd_obj) -> Dict[str, bytes]:
+        return {
+            cls.QSEECOM_SEND_CMD_REQ_BUF: send_cmd_obj._req.data,
+            cls.QSEECOM_SEND_CMD_RESP_BUF: send_cmd_obj._resp.data,
+        }
 
     def __str__(self) -> str:
         out = "QseecomSendCmdReq\n"
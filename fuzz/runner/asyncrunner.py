@@ -0,0 +1,377 @@
+"""asyncio counterparts of `Runner` and `SequenceRunner`.
+
+The blocking runners need one host process (or thread) per executor and
+enforce their deadlines with `select()` loops. The runners in this module
+are coroutines instead, so a single event loop drives any number of
+executors, e.g., several ports on one device or several devices:
+
+    async def main():
+        executors = []
+        for port in ports:
+            seqrunner = AsyncSequenceRunner("127.0.0.1", port)
+            await seqrunner.open()
+            runner = AsyncRunner("127.0.0.1", port + 1, session_meta)
+            executors.append((seqrunner, runner))
+        results = await run_on_executors(executors, seedseqs)
+
+Every operation has its own deadline: connecting (`CONNECT_TIMEOUT`),
+receiving the result of an interaction (`RECV_TIMEOUT`) and, optionally,
+running a whole sequence (`timeout` of `AsyncSequenceRunner.run()`). An
+expired deadline surfaces as `asyncio.TimeoutError`, like `socket.timeout`
+for the blocking runners, and the sequence runner reports it as
+`RunnerStatus.EXECUTOR_TIMEOUT`.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from fuzz.const import TEEZZ_CMD
+from fuzz.runner.runner import RunnerException, RunnerStatus
+from fuzz.runner.seqrunner import SequenceRunner
+from fuzz.seed.seedsequence import SeedSequence
+from fuzz.stats import STATS
+from fuzz.utils import u32, p32
+
+log = logging.getLogger(__name__)
+log.setLevel(logging.ERROR)
+
+
+class AsyncRunner:
+    """Like `Runner`, but on asyncio streams.
+
+    Use it with `async with` instead of `with`; `run()`, `close()` and
+    `terminate()` are coroutines and `run_batch()` is an async generator.
+    """
+
+    # deadline in seconds for connecting to the executor
+    CONNECT_TIMEOUT = 10.0
+    # deadline in seconds for receiving a status and response from the
+    # executor
+    RECV_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        host,
+        port,
+        session_meta,
+        batch=False,
+        persistent=0,
+        latency=None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._session_meta = session_meta
+        self.batch = batch
+        self.persistent = persistent
+        self.latency = latency
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = False
+        self._recycle = False
+        self._session_seqs = 0
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port),
+            self.CONNECT_TIMEOUT,
+        )
+
+    async def _disconnect(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self._reader = self._writer = None
+
+    async def _send(self, msg: bytes):
+        self._writer.write(msg)
+        await self._writer.drain()
+
+    async def __aenter__(self):
+        if self._connected:
+            # persistent mode, continue in the open session
+            return self
+        await self._connect()
+        session_meta = self._session_meta.serialize()
+        await self._send(
+            TEEZZ_CMD.TEEZZ_CMD_START + p32(len(session_meta)) + session_meta
+        )
+        self._connected = True
+        self._session_seqs = 0
+        return self
+
+    async def __aexit__(self, exc_type, *_):
+        self._session_seqs += 1
+        if (
+            exc_type is None
+            and not self._recycle
+            and self._session_seqs < self.persistent
+        ):
+            return
+        await self.close()
+
+    def recycle(self):
+        """Closes the session when the current sequence is done, see
+        `Runner.recycle()`."""
+        self._recycle = True
+
+    async def close(self):
+        """Ends the current session if there is one."""
+        if not self._connected:
+            return
+        try:
+            await self._send(TEEZZ_CMD.TEEZZ_CMD_END + p32(0))
+        except (BrokenPipeError, ConnectionResetError) as e:
+            log.warning(e)
+        await self._disconnect()
+        self._connected = False
+        self._recycle = False
+
+    async def terminate(self):
+        # the forkserver waits for the child of an open session to terminate
+        await self.close()
+        await self._connect()
+        await self._send(TEEZZ_CMD.TEEZZ_CMD_TERMINATE + p32(0))
+        await self._disconnect()
+
+    async def _recv_exact(self, sz) -> bytes:
+        try:
+            return await self._reader.readexactly(sz)
+        except asyncio.IncompleteReadError:
+            # the executor closed the connection, the data we wait for will
+            # never arrive. Reported like an unresponsive executor.
+            raise asyncio.TimeoutError("Connection closed by peer.")
+
+    async def _recv_response(self):
+        status = u32(await self._recv_exact(4))
+        log.debug(f"<--- status {status:#x}")
+
+        response = b""
+        if status == RunnerStatus.EXECUTOR_SUCCESS:
+            response = await self._recv_exact(
+                u32(await self._recv_exact(4))
+            )
+            log.debug(f"<--- response {len(response)} bytes")
+        elif status == RunnerStatus.EXECUTOR_ERROR:
+            response = None
+        else:
+            raise RunnerException("Target misbehaving.")
+
+        return status, response
+
+    async def _recv_result(self, timeout=None):
+        """receives `status` and `outp` of one interaction within `timeout`
+        seconds, `RECV_TIMEOUT` if `None`"""
+        return await asyncio.wait_for(
+            self._recv_response(), timeout or self.RECV_TIMEOUT
+        )
+
+    async def run(self, inp, timeout=None):
+        """Runs `inp` and returns `status` and `outp`, see `Runner.run()`."""
+        msg = TEEZZ_CMD.TEEZZ_CMD_SEND + p32(len(inp)) + inp
+        log.debug(f"---> {len(msg)} bytes.")
+        await self._send(msg)
+        return await self._recv_result(timeout)
+
+    async def run_batch(
+        self, inps, timeouts=None
+    ) -> AsyncIterator[Tuple[int, bytes]]:
+        """Runs all `inps` with a single round trip and yields `status` and
+        `outp` for each of them as soon as it arrives, see
+        `Runner.run_batch()`."""
+        payload = b"".join(p32(len(inp)) + inp for inp in inps)
+        msg = TEEZZ_CMD.TEEZZ_CMD_SEND_BATCH + p32(len(payload)) + payload
+        log.debug(f"---> {len(msg)} bytes ({len(inps)} inputs).")
+        await self._send(msg)
+        for timeout in timeouts or [None] * len(inps):
+            yield await self._recv_result(timeout)
+
+
+class AsyncSequenceRunner(SequenceRunner):
+    """Like `SequenceRunner`, but runs sequences on an `AsyncRunner`.
+
+    The connection to the forkserver's status port is opened by `open()`
+    instead of the constructor."""
+
+    def __init__(self, host: str, port: int):
+        self._host = host
+        self._port = port
+        self._init_state()
+        self._status_reader: Optional[asyncio.StreamReader] = None
+        self._status_writer: Optional[asyncio.StreamWriter] = None
+
+    def __del__(self):
+        # the status connection belongs to an event loop, see `close()`
+        pass
+
+    async def open(self):
+        self._status_reader, self._status_writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port),
+            AsyncRunner.CONNECT_TIMEOUT,
+        )
+
+    async def close(self):
+        if self._status_writer is None:
+            return
+        self._status_writer.close()
+        try:
+            await self._status_writer.wait_closed()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self._status_reader = self._status_writer = None
+
+    async def forkserver_status(self):
+        return u32(
+            await asyncio.wait_for(
+                self._status_reader.readexactly(4), AsyncRunner.RECV_TIMEOUT
+            )
+        )
+
+    async def run(
+        self,
+        runner: AsyncRunner,
+        seedseq: SeedSequence,
+        timeout: Optional[float] = None,
+    ):
+        """Runs `seedseq` on `runner` and returns its status.
+
+        `timeout` bounds the whole sequence in seconds, on top of the
+        deadline of every single interaction."""
+        self._start_seq(seedseq)
+        try:
+            return await asyncio.wait_for(
+                self._run(runner, seedseq), timeout
+            )
+        except asyncio.TimeoutError:
+            # the session was closed when the sequence got cancelled
+            STATS["#timeouts"] += 1
+            log.warning("Sequence timeout")
+            return RunnerStatus.EXECUTOR_TIMEOUT
+
+    async def _run(self, runner: AsyncRunner, seedseq: SeedSequence):
+        async with runner:
+            if runner.batch and not seedseq.has_value_dependencies():
+                status = await self._run_batch(runner, seedseq)
+            else:
+                status = await self._run_interactive(runner, seedseq)
+            if self._needs_recycle(status):
+                runner.recycle()
+        return status
+
+    @staticmethod
+    def _failure_status(e: Exception) -> int:
+        if isinstance(e, asyncio.TimeoutError):
+            STATS["#timeouts"] += 1
+            log.warning("Timeout")
+            return RunnerStatus.EXECUTOR_TIMEOUT
+        STATS["#errors"] += 1
+        log.warning(e)
+        return RunnerStatus.EXECUTOR_ERROR
+
+    async def _run_interactive(
+        self, runner: AsyncRunner, seedseq: SeedSequence
+    ):
+        status = RunnerStatus.EXECUTOR_SUCCESS
+        for seed, inp in self._serialize_seeds(seedseq):
+            response = None
+            timeout = self._recv_timeout(runner, seed)
+            tstart = time.monotonic()
+            try:
+                STATS["#interactions"] += 1
+                status, response = await runner.run(inp, timeout)
+            except (
+                asyncio.TimeoutError,
+                ConnectionResetError,
+                BrokenPipeError,
+            ) as e:
+                status = self._failure_status(e)
+            self._record_latency(
+                runner, seed, status, time.monotonic() - tstart, timeout
+            )
+
+            if not self._process_result(seed, status, response):
+                break
+        return status
+
+    async def _run_batch(self, runner: AsyncRunner, seedseq: SeedSequence):
+        seeds = []
+        inps = []
+        for seed, inp in self._serialize_seeds(seedseq):
+            seeds.append(seed)
+            inps.append(inp)
+
+        status = RunnerStatus.EXECUTOR_SUCCESS
+        timeouts = [self._recv_timeout(runner, seed) for seed in seeds]
+        results = runner.run_batch(inps, timeouts)
+        tstart = time.monotonic()
+        try:
+            for seed, timeout in zip(seeds, timeouts):
+                response = None
+                try:
+                    STATS["#interactions"] += 1
+                    status, response = await results.__anext__()
+                except (
+                    asyncio.TimeoutError,
+                    ConnectionResetError,
+                    BrokenPipeError,
+                ) as e:
+                    status = self._failure_status(e)
+                tend = time.monotonic()
+                self._record_latency(
+                    runner, seed, status, tend - tstart, timeout
+                )
+                tstart = tend
+
+                if not self._process_result(seed, status, response):
+                    break
+        finally:
+            await results.aclose()
+        return status
+
+
+class SequenceResult(NamedTuple):
+    status: int
+    coverage: Set[Tuple[Any]]
+    crashed: bool
+
+
+async def run_on_executors(
+    executors: List[Tuple[AsyncSequenceRunner, AsyncRunner]],
+    seedseqs: Iterable[SeedSequence],
+    timeout: Optional[float] = None,
+) -> List[SequenceResult]:
+    """Runs `seedseqs` on all `executors` concurrently and returns their
+    results in order.
+
+    Every executor runs one sequence at a time and takes the next sequence
+    as soon as it is done, so a slow or hanging executor does not hold up
+    the others. `timeout` bounds each sequence, see
+    `AsyncSequenceRunner.run()`."""
+    jobs: asyncio.Queue = asyncio.Queue()
+    for job in enumerate(seedseqs):
+        jobs.put_nowait(job)
+    results: List[Optional[SequenceResult]] = [None] * jobs.qsize()
+
+    async def worker(seqrunner: AsyncSequenceRunner, runner: AsyncRunner):
+        while not jobs.empty():
+            idx, seedseq = jobs.get_nowait()
+            status = await seqrunner.run(runner, seedseq, timeout)
+            results[idx] = SequenceResult(
+                status, seqrunner.coverage(), seqrunner.crashed()
+            )
+
+    await asyncio.gather(*(worker(*executor) for executor in executors))
+    return results
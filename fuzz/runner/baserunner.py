@@ -12,8 +12,11 @@ from fuzz.runner.sessionmeta import build_session_meta
 from fuzz.utils import mkdir_p
 from adb import adb
 from fuzz.config import HOST_EXECUTOR_PATH, TARGET_EXECUTOR_PATH
+from fuzz.runner import recovery
 from fuzz.stats import STATS
 
+from typing import Callable, Dict
+
 log = logging.getLogger(__file__)
 
 
@@ -34,17 +37,27 @@ class BaseRunnerException(Exception):
 
 class BaseRunner(object):
     def __init__(
-        self, target_tee, port, config, out_dir, device_id=None, reboot=False
+        self,
+        target_tee,
+        port,
+        config,
+        out_dir,
+        device_id=None,
+        reboot=False,
+        batch=False,
+        persistent=0,
+        instance_id=None,
     ):
         self._device_id = device_id
         self._target_tee = target_tee
         self._port = port
         self._config = json.load(config)
-        # we use tee- and device-specific subfolders
+        # we use tee- and device-specific subfolders, or instance-specific
+        # ones if several instances share a device or the tcp target
         self._out_dir = os.path.join(
             out_dir,
             self._target_tee,
-            self._device_id if self._device_id else "tcp",
+            instance_id or self._device_id or "tcp",
         )
         self._queue_dir = os.path.join(self._out_dir, "queue")
         self._crashes_dir = os.path.join(self._out_dir, "crashes")
@@ -88,7 +101,13 @@ class BaseRunner(object):
                 self._target_tee, self._port, self._device_id, self._out_dir
             )
         self._seqrunner = SequenceRunner("127.0.0.1", self._port)
-        self._runner = Runner("127.0.0.1", self._port + 1, self._session_meta)
+        self._runner = Runner(
+            "127.0.0.1",
+            self._port + 1,
+            self._session_meta,
+            batch=batch,
+            persistent=persistent,
+        )
 
         mkdir_p(self._out_dir)
 
@@ -115,32 +134,82 @@ class BaseRunner(object):
         hard_reset_ctr = 0
         while True:
             try:
-                # reboot the device
-                adb.reboot(self._device_id)
-
-                self.check_device()
-
-                # sync time between device and host
-                adb.set_date(self._device_id)
+                self._reboot_device()
                 break
             except Exception as e:
                 log.error(e)
                 if hard_reset_ctr >= 3:
                     raise
-                log.info("Device is inresponsive. Performing hard reset.")
-                STATS["#hardresets"] += 1
-                cmd = [
-                    "ssh",
-                    "resetpi-epfl",
-                    "/home/pi/teezzhardreset/longpress.sh",
-                ]
-                if subprocess.call(cmd):
-                    log.error(
-                        "Hard reset failed for {}.".format(self._device_id)
-                    )
+                self._hard_reset_device()
                 hard_reset_ctr += 1
         return
 
+    def _reboot_device(self):
+        adb.reboot(self._device_id)
+
+        self.check_device()
+
+        # sync time between device and host
+        adb.set_date(self._device_id)
+
+    def _hard_reset_device(self):
+        log.info("Device is inresponsive. Performing hard reset.")
+        STATS["#hardresets"] += 1
+        cmd = [
+            "ssh",
+            "resetpi-epfl",
+            "/home/pi/teezzhardreset/longpress.sh",
+        ]
+        if subprocess.call(cmd):
+            log.error("Hard reset failed for {}.".format(self._device_id))
+
+    def _stop_executor(self):
+        # the session does not survive
+        self._runner.close()
+        # trigger clean up of sequence runner and executor
+        self._seqrunner = None
+        self._executor = None
+
+    def _start_executor(self):
+        self._executor = AdbOrchestrator(
+            self._target_tee, self._port, self._device_id, self._out_dir
+        )
+        self._seqrunner = SequenceRunner("127.0.0.1", self._port)
+
+    def _reconnect(self):
+        """Reconnects to the running executor with a fresh session."""
+        # the forkserver accepts the status connection only once, so the
+        # sequence runner has to keep it
+        self._runner.close()
+
+    def _restart_executor(self):
+        self._stop_executor()
+        self._start_executor()
+
+    def _reboot(self):
+        self._stop_executor()
+        self._reboot_device()
+        self._start_executor()
+
+    def _hard_reset(self):
+        self._stop_executor()
+        self._hard_reset_device()
+        self._reboot_device()
+        self._start_executor()
+
+    def _recovery_tiers(self) -> Dict[str, Callable[[], None]]:
+        """Returns the recovery actions for this target, weakest first, see
+        `RecoveryPolicy`."""
+        if self._device_id is None:
+            # we cannot restart the executor of a tcp target
+            return {recovery.RECONNECT: self._reconnect}
+        return {
+            recovery.RECONNECT: self._reconnect,
+            recovery.RESTART: self._restart_executor,
+            recovery.REBOOT: self._reboot,
+            recovery.HARDRESET: self._hard_reset,
+        }
+
     @staticmethod
     def check_device_root_working(device_id):
         p = adb.subprocess_privileged("whoami", device_id)
@@ -0,0 +1,214 @@
+"""Coverage seen by a fuzzer, similar to AFL's virgin and hit-count maps.
+
+The coverage of a sequence consists of the coverage tuples of its
+interactions (see `coverage()` of the TEE data classes), e.g., the command,
+return code and return origin of an OP-TEE invocation. The map interns each
+tuple to an integer id on first sight and keeps, per id,
+
+    - the number of sequences that hit the tuple (rare tuples are the
+      interesting ones for scheduling), and
+    - the hit-count buckets the tuple was seen with, i.e., how often a
+      single sequence hit it, bucketed like AFL does (1, 2, 3, 4-7, 8-15,
+      16-31, 32-127, 128+).
+
+The map persists to two files in the output folder:
+
+    coverage.map:  {% for tuple in interned tuples %}
+                       u32 len(record) | pickled tuple
+    coverage.hits: u32 n | u32 hits[n] | u8 buckets[n]
+
+`coverage.map` is only appended to, a tuple is written once when it is
+interned. `coverage.hits` is rewritten by `save_hits()`, the caller decides
+how often.
+"""
+from __future__ import annotations
+import array
+import os
+import pickle
+import struct
+import logging
+
+from collections.abc import Mapping
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+
+log = logging.getLogger(__name__)
+
+# coverage of a sequence, the tuples it hit or the tuples and how often
+Coverage = Union[Iterable[Tuple[Any]], Mapping]
+
+_LEN = struct.Struct("<I")
+
+
+def bucket(count: int) -> int:
+    """Returns the hit-count bucket of `count` > 0 as a bit mask."""
+    if count <= 3:
+        return 1 << (count - 1)
+    if count < 8:
+        return 1 << 3
+    if count < 16:
+        return 1 << 4
+    if count < 32:
+        return 1 << 5
+    if count < 128:
+        return 1 << 6
+    return 1 << 7
+
+
+class CoverageMap(object):
+    """Interned coverage tuples with per-tuple hit counts.
+
+    `path` is the prefix of the files backing the map, `None` keeps the map
+    in memory only.
+    """
+
+    # results of `has_new()` and `update()`, like AFL's `has_new_bits()`
+    NOTHING_NEW = 0
+    NEW_BUCKETS = 1
+    NEW_TUPLES = 2
+
+    def __init__(self, path: Optional[str] = None):
+        self._ids: Dict[Tuple[Any], int] = {}
+        self._tuples: List[Tuple[Any]] = []
+        self._hits = array.array("I")
+        self._buckets = array.array("B")
+        self._map_path = f"{path}.map" if path else None
+        self._hits_path = f"{path}.hits" if path else None
+        self._map_f = None
+        if path:
+            self._load()
+            self._map_f = open(self._map_path, "ab")
+
+    def __len__(self) -> int:
+        return len(self._tuples)
+
+    def __contains__(self, t: Tuple[Any]) -> bool:
+        return t in self._ids
+
+    def __iter__(self) -> Iterator[Tuple[Any]]:
+        return iter(self._tuples)
+
+    def id(self, t: Tuple[Any]) -> int:
+        return self._ids[t]
+
+    def get_tuple(self, id: int) -> Tuple[Any]:
+        return self._tuples[id]
+
+    def hits(self, t: Tuple[Any]) -> int:
+        """Returns the number of sequences that hit `t`."""
+        id = self._ids.get(t)
+        return 0 if id is None else self._hits[id]
+
+    def _intern(self, t: Tuple[Any]) -> int:
+        id = len(self._tuples)
+        self._ids[t] = id
+        self._tuples.append(t)
+        self._hits.append(0)
+        self._buckets.append(0)
+        if self._map_f is not None:
+            buf = pickle.dumps(t)
+            self._map_f.write(_LEN.pack(len(buf)) + buf)
+        return id
+
+    @staticmethod
+    def _counts(coverage: Coverage) -> Mapping:
+        if isinstance(coverage, Mapping):
+            return coverage
+        return dict.fromkeys(coverage, 1)
+
+    def has_new(self, coverage: Coverage) -> int:
+        """Returns whether `coverage` hits new tuples or known tuples with a
+        new hit count, without recording it."""
+        ret = self.NOTHING_NEW
+        for t, count in self._counts(coverage).items():
+            id = self._ids.get(t)
+            if id is None:
+                return self.NEW_TUPLES
+            if not self._buckets[id] & bucket(count):
+                ret = self.NEW_BUCKETS
+        return ret
+
+    def new_tuples(self, coverage: Iterable[Tuple[Any]]) -> List[Tuple[Any]]:
+        return [t for t in coverage if t not in self._ids]
+
+    def update(self, coverage: Coverage) -> int:
+        """Records the coverage of a sequence, returns what was new like
+        `has_new()`."""
+        ret = self.NOTHING_NEW
+        for t, count in self._counts(coverage).items():
+            id = self._ids.get(t)
+            if id is None:
+                id = self._intern(t)
+                ret = self.NEW_TUPLES
+            b = bucket(count)
+            if not self._buckets[id] & b:
+                self._buckets[id] |= b
+                ret = max(ret, self.NEW_BUCKETS)
+            self._hits[id] += 1
+        if ret == self.NEW_TUPLES and self._map_f is not None:
+            self._map_f.flush()
+        return ret
+
+    def rarest(self, coverage: Iterable[Tuple[Any]]) -> int:
+        """Returns the lowest hit count of the known tuples in `coverage`,
+        0 if there are none."""
+        hits = [self._hits[self._ids[t]] for t in coverage if t in self._ids]
+        return min(hits) if hits else 0
+
+    def save_hits(self) -> None:
+        if self._hits_path is None:
+            return
+        tmp_path = os.path.join(
+            os.path.dirname(self._hits_path),
+            f".{os.path.basename(self._hits_path)}.tmp",
+        )
+        with open(tmp_path, "wb") as f:
+            f.write(_LEN.pack(len(self._hits)))
+            self._hits.tofile(f)
+            self._buckets.tofile(f)
+        os.replace(tmp_path, self._hits_path)
+
+    def _load(self) -> None:
+        if os.path.isfile(self._map_path):
+            with open(self._map_path, "rb") as f:
+                buf = f.read()
+            off = 0
+            while off + _LEN.size <= len(buf):
+                (length,) = _LEN.unpack_from(buf, off)
+                if off + _LEN.size + length > len(buf):
+                    break
+                off += _LEN.size
+                self._intern(pickle.loads(buf[off : off + length]))
+                off += length
+            if off != len(buf):
+                # a record cut short by a crash is dropped and overwritten
+                log.warning(f"Truncating {self._map_path} at {off}.")
+                with open(self._map_path, "r+b") as f:
+                    f.truncate(off)
+
+        if os.path.isfile(self._hits_path):
+            with open(self._hits_path, "rb") as f:
+                (n,) = _LEN.unpack(f.read(_LEN.size))
+                hits = array.array("I")
+                buckets = array.array("B")
+                hits.fromfile(f, n)
+                buckets.fromfile(f, n)
+            # tuples interned after the last save keep zero hits
+            n = min(n, len(self._tuples))
+            self._hits[:n] = hits[:n]
+            self._buckets[:n] = buckets[:n]
+
+    def close(self) -> None:
+        self.save_hits()
+        if self._map_f is not None:
+            self._map_f.close()
+            self._map_f = None
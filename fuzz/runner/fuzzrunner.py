@@ -1,30 +1,52 @@
 from __future__ import annotations
 import os
 import datetime
+import functools
 import json
 import logging
 import random
-import copy
 import time
 
+from collections import deque
 from .baserunner import BaseRunner
-from fuzz.runner.seqrunner import SequenceRunner
-from fuzz.runner.runner import RunnerStatus
+from fuzz.runner.runner import Runner, RunnerStatus
+from fuzz.runner.latency import LatencyTracker
+from fuzz.runner.recovery import (
+    RecoveryException,
+    RecoveryPolicy,
+    REBOOT,
+    RECONNECT,
+)
+from fuzz.runner.coveragemap import CoverageMap
 from fuzz.seed.seedsequence import SeedSequence
 from fuzz.seed.seed import Seed
+from fuzz.seed import seedpack
+from fuzz.seed.corpus import Corpus
+from fuzz.seed.corpussync import CorpusSync, META_NAME, dump_meta
 from fuzz.utils import mkdir_p
-from fuzz.orchestrator.adborchestrator import AdbOrchestrator
-from fuzz.stats import STATS
+from fuzz.stats import STATS, StatsWriter
 from fuzz.mutation.seedsequencemutator import SeedSequenceMutator
 from fuzz.mutation.templatemutator import TemplateMutator
+from fuzz.mutation.trimmer import SequenceTrimmer, TrimAborted
+from fuzz.scheduler.scheduler import make_scheduler
 
 from adb import adb
 
-from typing import List, Set, Tuple, Any
+from typing import Any, Dict, FrozenSet, Optional, Set, Tuple
 
 log = logging.getLogger(__name__)
 log.setLevel(logging.DEBUG)
 
+# seconds between saves of the stats and of the coverage hit counts
+STATS_INTERVAL = 5
+HITS_SAVE_INTERVAL = 60
+# pause after consecutive timeouts in seconds, doubled with every further
+# timeout up to the maximum
+TIMEOUT_BACKOFF = 0.5
+TIMEOUT_BACKOFF_MAX = 5.0
+# interactions between two health probes of the target
+PROBE_INTERVAL = 500
+
 
 class FuzzRunnerException(Exception):
     pass
@@ -43,9 +65,25 @@ class FuzzRunner(BaseRunner):
         device_id=None,
         reboot=False,
         cov_enabled=False,
+        batch=False,
+        persistent=0,
+        instance_id=None,
+        sync_interval=0,
+        compression=seedpack.COMPRESSION_NONE,
+        schedule="uniform",
+        trim_budget=0.1,
+        timeout_factor=5.0,
     ):
         super(FuzzRunner, self).__init__(
-            target_tee, port, config, out_dir, device_id, reboot
+            target_tee,
+            port,
+            config,
+            out_dir,
+            device_id,
+            reboot,
+            batch,
+            persistent,
+            instance_id,
         )
 
         # check config file for path to protobuf and create mutation engine
@@ -63,11 +101,51 @@ class FuzzRunner(BaseRunner):
         self._seeds.sort()
 
         self._is_seeding = True
-        self._population: List[SeedSequence] = []
-        self._coverages_seen: Set[Tuple[Any]] = set()
+        self._population = Corpus(
+            self._out_dir,
+            self._queue_dir,
+            self._get_seed_class(self._target_tee),
+        )
+        # picks the members of the population to mutate
+        self._scheduler = make_scheduler(schedule)
+        self._sync_scheduler()
+        # index of the member the current candidate was derived from
+        self._parent_idx = None
+        # coverage tuples seen so far
+        self._coverage_map = CoverageMap(
+            os.path.join(self._out_dir, "coverage")
+        )
+        self._last_hits_save = time.monotonic()
         self._timeout_ctr = 0
         self._prev_run_timed_out = False
-        self._needs_reset = False
+        # weakest recovery tier worth trying if the target needs recovery
+        self._recover_from: Optional[str] = None
+        self._probe_runs = 0
+        self._recovery = RecoveryPolicy(
+            self._recovery_tiers(),
+            self._probe,
+            os.path.join(self._out_dir, "recovery.json"),
+        )
+
+        # import queue entries of sibling instances every `sync_interval`
+        # seconds
+        self._sync_interval = sync_interval
+        self._sync = CorpusSync(self._out_dir) if sync_interval else None
+        self._last_sync = time.monotonic()
+        # queue entries, crashes, etc. are stored as packed sequences
+        self._compression = compression
+
+        # new queue entries are trimmed in a separate stage taking up to
+        # `trim_budget` of the fuzzing time
+        self._trim_budget = trim_budget
+        self._trim_queue = deque()
+        self._trim_time = 0.0
+
+        # receive deadlines adapt to the latencies of the commands
+        if timeout_factor:
+            self._runner.latency = LatencyTracker(
+                k=timeout_factor, max_timeout=Runner.RECV_TIMEOUT
+            )
 
         # time based fuzzing
         self._start_time = datetime.datetime.now()
@@ -77,33 +155,23 @@ class FuzzRunner(BaseRunner):
 
         # event logs go to this file
         self.event_log_path = os.path.join(self._out_dir, "event.log")
-        self._stats_path = os.path.join(self._out_dir, "stats.json")
+        # counters are persisted every `STATS_INTERVAL` seconds
+        self._stats = StatsWriter(self._out_dir, STATS_INTERVAL)
         self._cfg_path = os.path.join(self._out_dir, "fuzz.cfg")
         self._save_campaign_config()
         self._load_stats()
 
     def _load_stats(self):
-        if os.path.isfile(self._stats_path):
-            with open(self._stats_path, "r") as f:
-                stats = json.load(f)
-            STATS["#sequences"] = stats["#sequences"]
-            STATS["#interactions"] = stats["#interactions"]
-            STATS["#successes"] = stats["#successes"]
-            STATS["#errors"] = stats["#errors"]
-            STATS["#timeouts"] = stats["#timeouts"]
-            STATS["#crashtimeouts"] = stats["#crashtimeouts"]
-            STATS["#factoryresets"] = stats["#factoryresets"]
-            STATS["#hardresets"] = stats["#hardresets"]
-            STATS["#resets"] = stats["#resets"]
-            STATS["#crashes"] = stats["#crashes"]
-            STATS["#newcov"] = stats["#newcov"]
-            STATS["#ta_successes"] = stats["#ta_successes"]
-            STATS["#ta_fails"] = stats["#ta_fails"]
-            self._elapsed_prev_run = datetime.timedelta(
-                seconds=stats["elapsed_time"]
-            )
-            # decode list of lists to set of tuples again
-            self._coverages_seen = set([tuple(t) for t in stats["cov_seen"]])
+        stats = self._stats.load()
+        if not stats:
+            return
+        self._elapsed_prev_run = datetime.timedelta(
+            seconds=stats["elapsed_time"]
+        )
+        if "cov_seen" in stats and not len(self._coverage_map):
+            # coverage of a run from before the coverage map existed
+            for t in stats["cov_seen"]:
+                self._coverage_map.update([tuple(t)])
 
     def get_stats(self):
         return {
@@ -112,6 +180,7 @@ class FuzzRunner(BaseRunner):
             "#successes": STATS["#successes"],
             "#errors": STATS["#errors"],
             "#timeouts": STATS["#timeouts"],
+            "#adaptivetimeouts": STATS["#adaptivetimeouts"],
             "#crashtimeouts": STATS["#crashtimeouts"],
             "#hardresets": STATS["#hardresets"],
             "#factoryresets": STATS["#factoryresets"],
@@ -120,18 +189,22 @@ class FuzzRunner(BaseRunner):
             "#newcov": STATS["#newcov"],
             "#ta_successes": STATS["#ta_successes"],
             "#ta_fails": STATS["#ta_fails"],
+            "#synced": STATS["#synced"],
+            "#trimmed": STATS["#trimmed"],
         }
 
     def print_stats(self):
         log.info(self.get_stats())
 
-    def _save_stats(self, elapsed_time: int):
-        stats = self.get_stats()
-        stats["elapsed_time"] = elapsed_time
-        # encode set of tuples to list of list to make it digestible for JSON
-        stats["cov_seen"] = list(self._coverages_seen)
-        with open(self._stats_path, "w") as f:
-            f.write(json.dumps(stats))
+    def _save_stats(self, elapsed_time: float):
+        extra = {"#covtuples": len(self._coverage_map)}
+        if self._runner.latency is not None:
+            extra.update(self._runner.latency.stats())
+        self._stats.flush(elapsed_time, extra)
+        # new tuples are persisted right away, hit counts only now and then
+        if time.monotonic() - self._last_hits_save >= HITS_SAVE_INTERVAL:
+            self._coverage_map.save_hits()
+            self._last_hits_save = time.monotonic()
 
     def _save_campaign_config(self):
         self._config["device_id"] = self._device_id
@@ -146,8 +219,9 @@ class FuzzRunner(BaseRunner):
         if not self._population:
             raise FuzzRunnerException("No seed candidates.")
 
-        # we randomly choose a member of the populaton (a `SeedSequence`)
-        seedseq = copy.deepcopy(random.choice(self._population))
+        # the scheduler chooses a member of the populaton (a `SeedSequence`)
+        self._parent_idx = self._scheduler.choose()
+        seedseq = self._population[self._parent_idx].clone()
 
         assert (
             len(seedseq) != 0
@@ -160,7 +234,8 @@ class FuzzRunner(BaseRunner):
                 SeedSequenceMutator.mutate(seedseq)
 
         # make the number of mutations dependent on the length of the sequence
-        nmutations = random.randint(1, len(seedseq))
+        # and the energy of its member
+        nmutations = self._scheduler.nmutations(self._parent_idx, len(seedseq))
         log.info(f"Mutating current SeedSequence {nmutations} times.")
         for _ in range(nmutations):
             seed: Seed = random.choice(seedseq)
@@ -184,32 +259,130 @@ class FuzzRunner(BaseRunner):
                 self._seeds[self._seed_idx],
             )
             self._seed_idx += 1
+            self._parent_idx = None
         else:
             self._is_seeding = False
             # mutating
             candidate = self._create_candidate()
         return candidate
 
-    def _add_seed(self, seedseq: SeedSequence) -> None:
-        self._population.append(seedseq)
+    def _add_seed(
+        self,
+        seedseq: SeedSequence,
+        coverage: Set[Tuple[Any]],
+        suffix="",
+        exec_time: Optional[float] = None,
+    ) -> int:
         t = int(self.elapsed_time().total_seconds())
-        name = f"id:{self._queue_id:08d},time:{t:08d}"
-        seq_dir = os.path.join(self._queue_dir, name)
-        self._store_seedseq(seedseq, seq_dir)
+        name = f"id:{self._queue_id:08d},time:{t:08d}{suffix}"
+        seq_path = os.path.join(self._queue_dir, name)
+        digest = seedseq.digest()
+        if self._sync:
+            self._sync.add_known(digest)
+        meta = {META_NAME: dump_meta(coverage, digest)}
+        size = self._store_seedseq(seedseq, seq_path, meta)
+        idx = self._population.append(seedseq, name, size, coverage, digest)
+        self._scheduler.add(len(seedseq), exec_time)
+        self._population.set_energy(idx, self._scheduler.energy(idx))
         self._queue_id += 1
+        return idx
+
+    def _trim_due(self) -> bool:
+        return bool(self._trim_queue) and (
+            self._trim_time
+            < self._trim_budget * self.elapsed_time().total_seconds()
+        )
+
+    def _has_coverage(
+        self, coverage: FrozenSet[Tuple[Any]], seedseq: SeedSequence
+    ) -> bool:
+        """Runs `seedseq`, `True` if it produces exactly `coverage`."""
+        try:
+            status = self._seqrunner.run(self._runner, seedseq)
+        except ConnectionRefusedError as e:
+            log.warning(e)
+            raise TrimAborted()
+        if status != RunnerStatus.EXECUTOR_SUCCESS:
+            # leave the handling of an unresponsive target to `run()`
+            raise TrimAborted()
+        return (
+            not self._seqrunner.crashed()
+            and self._seqrunner.coverage() == coverage
+        )
+
+    def _trim_stage(self) -> None:
+        """Trims the oldest untrimmed queue entry."""
+        idx = self._trim_queue.popleft()
+        info = self._population.info(idx)
+        seedseq = self._population[idx]
+        tstart = time.monotonic()
+        trimmer = SequenceTrimmer(
+            functools.partial(self._has_coverage, info.coverage),
+            max_execs=2 * len(seedseq) + 16,
+        )
+        trimmed = trimmer.trim(seedseq)
+        self._trim_time += time.monotonic() - tstart
+        if trimmed is seedseq:
+            return
+
+        log.info(
+            f"Trimmed {info.name} from {len(seedseq)} to {len(trimmed)} "
+            f"interactions in {trimmer.execs} execs."
+        )
+        STATS["#trimmed"] += 1
+        digest = trimmed.digest()
+        if self._sync:
+            self._sync.add_known(digest)
+        meta = {META_NAME: dump_meta(info.coverage, digest)}
+        seq_path = os.path.join(self._queue_dir, info.name)
+        size = self._store_seedseq(trimmed, seq_path, meta)
+        self._population.replace(idx, trimmed, size)
+
+    def _sync_scheduler(self) -> None:
+        """Adds the members of the population the scheduler does not know
+        yet, i.e., the ones from a previous run."""
+        for idx in range(len(self._scheduler), len(self._population)):
+            self._scheduler.add(energy=self._population.energy(idx))
+
+    def _report_parent(
+        self, exec_time: float, found: bool = False, timed_out: bool = False
+    ) -> None:
+        """Tells the scheduler how the mutant of the current parent did."""
+        if self._parent_idx is None:
+            return
+        self._scheduler.report(self._parent_idx, exec_time, found, timed_out)
+        self._population.set_energy(
+            self._parent_idx, self._scheduler.energy(self._parent_idx)
+        )
+
+    def _sync_corpus(self) -> None:
+        """Imports new queue entries of sibling instances."""
+        self._last_sync = time.monotonic()
+        for entry in self._sync.pull(self._coverage_map):
+            try:
+                seedseq = SeedSequence.load_sequence(
+                    self._get_seed_class(self._target_tee), entry.path
+                )
+            except Exception as e:
+                log.warning(f"Cannot import {entry.path}: {e}")
+                continue
+            self._coverage_map.update(entry.meta.coverage)
+            STATS["#synced"] += 1
+            suffix = f",sync:{entry.sibling},src:{entry.id:08d}"
+            self._add_seed(seedseq, entry.meta.coverage, suffix)
 
     def _add_crash(self, seedseq: SeedSequence):
         t = int(self.elapsed_time().total_seconds())
         name = f"id:{self._crash_id:08d},time:{t:08d}"
-        seq_dir = os.path.join(self._crashes_dir, name)
-        self._store_seedseq(seedseq, seq_dir)
+        seq_path = os.path.join(self._crashes_dir, name)
+        self._store_seedseq(seedseq, seq_path)
         self._crash_id += 1
 
     def _add_timeout(self, seedseq: SeedSequence):
         t = int(self.elapsed_time().total_seconds())
         name = f"id:{self._hang_id:08d},time:{t:08d}"
-        seq_dir = os.path.join(self._timeouts_dir, name)
-        self._store_seedseq(seedseq, seq_dir)
+        seq_path = os.path.join(self._timeouts_dir, name)
+        self._store_seedseq(seedseq, seq_path)
         self._hang_id += 1
 
     def _add_cov(self, seedseq: SeedSequence):
@@ -217,13 +390,20 @@ class FuzzRunner(BaseRunner):
         h += f",time:{int(self.elapsed_time().total_seconds()):08d}"
         h += f",seq:{self._seqrunner.total_seqs:06d}"
         h += f",run:{self._seqrunner.total_runs:08d}"
-        seq_dir = os.path.join(self._cov_dir, h)
-        self._store_seedseq(seedseq, seq_dir)
+        seq_path = os.path.join(self._cov_dir, h)
+        self._store_seedseq(seedseq, seq_path)
         self._cov_id += 1
 
-    def _store_seedseq(self, seedseq: SeedSequence, storage_dir: str):
-        mkdir_p(storage_dir)
-        seedseq.store_sequence(storage_dir)
+    def _store_seedseq(
+        self,
+        seedseq: SeedSequence,
+        storage_path: str,
+        extra_files: Optional[Dict[str, bytes]] = None,
+    ) -> int:
+        mkdir_p(os.path.dirname(storage_path))
+        return seedseq.store_packed(
+            storage_path, self._compression, extra_files
+        )
 
     def run(self):
         """run fuzzer"""
@@ -236,6 +416,7 @@ class FuzzRunner(BaseRunner):
 
         # signal.signal(signal.SIGALRM, sig_handler)
         # signal.alarm(300)
+        tstart = time.monotonic()
         try:
             status = self._seqrunner.run(self._runner, self.current_seq)
         except ConnectionRefusedError as e:
@@ -250,6 +431,7 @@ class FuzzRunner(BaseRunner):
 
             ipdb.set_trace()
             status = RunnerStatus.EXECUTOR_TIMEOUT
+        exec_time = time.monotonic() - tstart
 
         # we need this for the coverage available on optee
         if self._cov_enabled and status == RunnerStatus.EXECUTOR_SUCCESS:
@@ -260,47 +442,75 @@ class FuzzRunner(BaseRunner):
         # signal.alarm(0)
 
         if status == RunnerStatus.EXECUTOR_TIMEOUT:
+            self._report_parent(exec_time, timed_out=True)
             if self._device_id and not adb.is_device_present(self._device_id):
                 # the device likely rebooted due to a crash
                 STATS["#crashtimeouts"] += 1
-                self._needs_reset = True
+                self._recover_from = REBOOT
                 self._add_timeout(self.current_seq)
 
             if self._prev_run_timed_out:
                 self._timeout_ctr += 1
-                time.sleep(5)
+                time.sleep(
+                    min(
+                        TIMEOUT_BACKOFF * 2 ** (self._timeout_ctr - 2),
+                        TIMEOUT_BACKOFF_MAX,
+                    )
+                )
             else:
                 self._timeout_ctr = 1
 
             if self._timeout_ctr == 5:
                 self._timeout_ctr = 0
-                self._needs_reset = True
+                self._recover_from = self._recover_from or RECONNECT
             self._prev_run_timed_out = True
             return
 
         if status != RunnerStatus.EXECUTOR_SUCCESS:
+            self._report_parent(exec_time)
             return
 
         elif self._seqrunner.crashed():
             log.debug("Crash")
             STATS["#crashes"] += 1
             self._add_crash(self.current_seq)
-        elif self._is_seeding or self._seqrunner.coverage().difference(
-            self._coverages_seen
+            self._report_parent(exec_time, found=True)
+        elif (
+            self._coverage_map.update(self._seqrunner.coverage_counts())
+            == CoverageMap.NEW_TUPLES
+            or self._is_seeding
         ):
-            # update coverage and add seed when
-            # 1) we're still seeding, or
-            # 2) we have not seen this coverage before
-            self._coverages_seen.update(self._seqrunner.coverage())
+            # add seed when
+            # 1) we have not seen this coverage before, or
+            # 2) we're still seeding
+            # sequences only hitting known tuples more often than before are
+            # not worth a queue entry
             log.debug("Appending")
             STATS["#newcov"] += 1
-            self._add_seed(self.current_seq)
+            idx = self._add_seed(
+                self.current_seq,
+                self._seqrunner.coverage(),
+                exec_time=exec_time,
+            )
+            if self._trim_budget:
+                self._trim_queue.append(idx)
+            self._report_parent(exec_time, found=True)
+        else:
+            self._report_parent(exec_time)
 
         self._prev_run_timed_out = False
         return
 
-    def _terminate(self):
-        self._runner.terminate()
+    def _terminate(self, executor_alive: bool = True):
+        """Saves the stats and hits and terminates the executor, unless it
+        is known to be gone."""
+        self._stats.close()
+        self._coverage_map.close()
+        if executor_alive:
+            try:
+                self._runner.terminate()
+            except OSError as e:
+                log.error(f"Cannot terminate the executor: {e}")
         del self._seqrunner
         return
 
@@ -318,21 +528,68 @@ class FuzzRunner(BaseRunner):
             datetime.datetime.now() - self._start_time
         ) + self._elapsed_prev_run
 
-    def _target_needs_reset(self):
-        if self._device_id is None:
-            # we do not reset non-adb devices for now
+    def _probe(self) -> bool:
+        """Runs a known-good canary sequence, the first queue entry, in a
+        fresh session. `True` if the target ran it without failing or
+        crashing. Before there is a queue entry, an executor accepting a
+        session counts as healthy."""
+        self._runner.close()
+        if not self._population:
+            with self._runner:
+                self._runner.recycle()
+            return True
+        canary = self._population[0].clone()
+        status = self._seqrunner.run(self._runner, canary)
+        self._runner.close()
+        if status != RunnerStatus.EXECUTOR_SUCCESS:
             return False
-        if self._needs_reset:
-            self._needs_reset = False
+        if self._seqrunner.coverage() != self._population.info(0).coverage:
+            log.debug("The canary hit different coverage.")
+        return not self._seqrunner.crashed()
+
+    def _target_needs_reset(self):
+        if self._recover_from is not None:
             return True
-        return self._seqrunner.total_runs > 500
+        if STATS["#interactions"] - self._probe_runs < PROBE_INTERVAL:
+            return False
+        # probe the target's health now and then instead of resetting it
+        self._probe_runs = STATS["#interactions"]
+        try:
+            healthy = self._probe()
+        except (ConnectionError, OSError) as e:
+            log.warning(e)
+            healthy = False
+        if not healthy:
+            log.warning("The target failed the health probe.")
+            self._recover_from = RECONNECT
+        return not healthy
+
+    def _recover(self) -> bool:
+        """Restores the health of the target. `False` if that failed and
+        fuzzing cannot go on."""
+        STATS["#resets"] += 1
+        try:
+            tier = self._recovery.recover(self._recover_from)
+        except RecoveryException as e:
+            if self._device_id is not None:
+                log.error(f"{e} Stopping.")
+                return False
+            # reconnecting is all we can do for a tcp target, the executor
+            # may come back on its own, so keep going and probe again later
+            log.error(f"{e} Continuing.")
+        else:
+            log.info(f"The target recovered with {tier}.")
+        self._recover_from = None
+        self._probe_runs = STATS["#interactions"]
+        return True
 
     def _seed(self):
         self._seeding_start = datetime.datetime.now()
         try:
             while self._is_seeding:
                 self.run()
-                self.print_stats()
+                if self._stats.due():
+                    self.print_stats()
         except KeyboardInterrupt:
             self._terminate()
         self._seeding_end = datetime.datetime.now()
@@ -346,17 +603,16 @@ class FuzzRunner(BaseRunner):
 
     def _load_queue(self) -> None:
 
-        # load seeds stored in `self._queue_dir` from previous run
-        q_entries = [
-            os.path.join(self._queue_dir, e)
-            for e in os.listdir(self._queue_dir)
-        ]
-        for q_entry in q_entries:
-            candidate = SeedSequence.load_sequence(
-                self._get_seed_class(self._target_tee), q_entry
-            )
-            self._population.append(candidate)
-            self._seed_idx += 1
+        # the population already knows the seeds stored in `self._queue_dir`
+        # from the previous run, they are loaded when picked
+        self._population.sync_with_queue()
+        self._sync_scheduler()
+        self._seed_idx += len(self._population)
+        if self._sync:
+            for idx in range(len(self._population)):
+                digest = self._population.info(idx).digest
+                if digest:
+                    self._sync.add_known(digest)
         self._is_seeding = False
 
     def runt(self, duration: int) -> None:
@@ -377,6 +633,7 @@ class FuzzRunner(BaseRunner):
         d = datetime.timedelta(seconds=(duration))
 
         fuzz_rounds = 0
+        recovered = True
         # try:
         while d.total_seconds() > self.elapsed_time().total_seconds():
             t_remaining = (
@@ -384,26 +641,34 @@ class FuzzRunner(BaseRunner):
             )
             t1 = datetime.datetime.now()
             if self._target_needs_reset():
-                STATS["#resets"] += 1
-                self.reset_device()
-                # spin up the executor again
-                self._executor = AdbOrchestrator(
-                    self._target_tee, self._port, self._device_id, self._out_dir
-                )
-                # connect the sequence runner again
-                self._seqrunner = SequenceRunner("127.0.0.1", self._port)
+                recovered = self._recover()
+                if not recovered:
+                    break
 
-            self.run()
+            if self._trim_due():
+                self._trim_stage()
+            else:
+                self.run()
+            if (
+                self._sync
+                and time.monotonic() - self._last_sync >= self._sync_interval
+            ):
+                self._sync_corpus()
             t2 = datetime.datetime.now()
             tdiff = t2 - t1
             fuzz_rounds += 1
-            log.info(
+            log.debug(
                 f"#{fuzz_rounds}: Sequence (len={len(self.current_seq)}) took {tdiff.total_seconds()}"
             )
-            self.print_stats()
-            log.info(f"time remaining: {t_remaining}")
-            self._save_stats(self.elapsed_time().total_seconds())
-        self._terminate()
+            if self._stats.due():
+                elapsed_time = self.elapsed_time().total_seconds()
+                execs = STATS["#interactions"] / elapsed_time
+                log.info(f"execs/sec: {execs:.2f}")
+                self.print_stats()
+                log.info(f"time remaining: {t_remaining}")
+                self._save_stats(elapsed_time)
+        self._save_stats(self.elapsed_time().total_seconds())
+        self._terminate(executor_alive=recovered)
         # except KeyboardInterrupt:
         #    self._terminate()
         # except Exception as e:
@@ -0,0 +1,105 @@
+"""Latency tracking and adaptive receive deadlines.
+
+A hanging interaction costs the fuzzer the full receive deadline of the
+runner (`Runner.RECV_TIMEOUT`), although most TA commands answer within
+milliseconds. The tracker keeps a window of recent latencies per command,
+i.e., the `func` of an OP-TEE invoke arg or the `cmd_id` of a TC context,
+and derives the deadline for the next interaction with this command from
+them:
+
+    timeout = clamp(k * p99(latencies), min_timeout, max_timeout)
+
+Commands with fewer than `min_samples` latencies get `max_timeout`. An
+interaction that times out is recorded with its deadline as latency. A
+command that is slower now and then thus pushes its percentile up until its
+deadline fits, or `max_timeout` is reached.
+"""
+from __future__ import annotations
+import math
+
+from collections import deque
+from typing import Any, Deque, Dict, Hashable, Optional
+
+
+def latency_key(inp: Any) -> Hashable:
+    """Returns the command `inp` (an input of a seed) invokes, `None` for
+    targets without command ids."""
+    for attr in ("func", "cmd_id"):
+        key = getattr(inp, attr, None)
+        if key is not None:
+            return key
+    return None
+
+
+def percentile(samples, p: float) -> float:
+    """Returns the `p`-th percentile (0-100) of the sorted `samples`,
+    nearest-rank method."""
+    rank = max(math.ceil(p / 100 * len(samples)), 1)
+    return samples[rank - 1]
+
+
+class LatencyTracker(object):
+    """Recent latencies (in seconds) and receive deadlines per command."""
+
+    def __init__(
+        self,
+        k: float = 5.0,
+        p: float = 99.0,
+        min_timeout: float = 0.25,
+        max_timeout: float = 10.0,
+        window: int = 256,
+        min_samples: int = 16,
+    ):
+        self.k = k
+        self.p = p
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self._window = window
+        self._min_samples = min_samples
+        self._samples: Dict[Hashable, Deque[float]] = {}
+        # deadlines are derived on demand, a record invalidates them
+        self._timeouts: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, key: Hashable, latency: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self._window)
+        samples.append(latency)
+        self._timeouts.pop(key, None)
+
+    def record_timeout(self, key: Hashable, timeout: float) -> None:
+        """Records an interaction that did not finish within `timeout`."""
+        self.record(key, timeout)
+
+    def timeout(self, key: Hashable) -> float:
+        """Returns the receive deadline in seconds for the next interaction
+        invoking command `key`."""
+        timeout = self._timeouts.get(key)
+        if timeout is None:
+            timeout = self._timeouts[key] = self._derive(key)
+        return timeout
+
+    def _derive(self, key: Hashable) -> float:
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self._min_samples:
+            return self.max_timeout
+        timeout = self.k * percentile(sorted(samples), self.p)
+        return min(max(timeout, self.min_timeout), self.max_timeout)
+
+    def is_adaptive(self, timeout: Optional[float]) -> bool:
+        """`True` if `timeout` is below the fixed deadline."""
+        return timeout is not None and timeout < self.max_timeout
+
+    def stats(self) -> Dict[str, float]:
+        """Returns the range of the current deadlines in milliseconds."""
+        timeouts = [self.timeout(key) for key in self._samples]
+        if not timeouts:
+            return {"#latencykeys": 0}
+        return {
+            "#latencykeys": len(timeouts),
+            "timeout_min_ms": round(min(timeouts) * 1000, 1),
+            "timeout_max_ms": round(max(timeouts) * 1000, 1),
+        }
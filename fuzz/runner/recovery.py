@@ -0,0 +1,136 @@
+"""Tiered recovery of an unhealthy target.
+
+A target that stops answering can be brought back in several ways, from
+cheap to expensive, e.g., reconnecting to the executor, restarting the
+executor, rebooting the device or hard-resetting it. Which of them works
+depends on the device and the TA, so the policy measures the cost (in
+seconds) and the success rate of every tier and escalates by expected cost:
+
+    expected cost = mean cost / success rate
+
+Starting with the weakest tier, it attempts the tier with the lowest
+expected cost among the remaining ones. If the target is still unhealthy
+afterwards, only stronger tiers remain. A tier that rarely helps is thus
+skipped, while a cheap tier that usually helps is always tried first. Before
+a tier was attempted, its cost is assumed to be `PRIOR_COSTS[tier]`.
+
+The measurements are kept in `recovery.json` in the output folder, so they
+carry over to the next run.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+import time
+
+from typing import Callable, Dict, Optional
+
+
+log = logging.getLogger(__name__)
+
+# tiers from weakest to strongest
+RECONNECT = "reconnect"
+RESTART = "restart"
+REBOOT = "reboot"
+HARDRESET = "hardreset"
+
+PRIOR_COSTS = {
+    RECONNECT: 1.0,
+    RESTART: 5.0,
+    REBOOT: 90.0,
+    HARDRESET: 180.0,
+}
+
+
+class RecoveryException(Exception):
+    pass
+
+
+class RecoveryPolicy(object):
+    """Restores the health of a target with the cheapest working tier.
+
+    `tiers` maps tier names to their actions, weakest first. `probe` returns
+    `True` if the target is healthy. If `path` is given, the measurements
+    are loaded from and saved to this file."""
+
+    def __init__(
+        self,
+        tiers: Dict[str, Callable[[], None]],
+        probe: Callable[[], bool],
+        path: Optional[str] = None,
+    ):
+        self._actions = tiers
+        self._tiers = list(tiers)
+        self._probe = probe
+        self._path = path
+        # tier -> attempts, successes and the summed cost in seconds
+        self._stats: Dict[str, Dict[str, float]] = {
+            tier: {"attempts": 0, "successes": 0, "cost": 0.0}
+            for tier in self._tiers
+        }
+        if path and os.path.isfile(path):
+            with open(path, "r") as f:
+                for tier, stats in json.load(f).items():
+                    if tier in self._stats:
+                        self._stats[tier].update(stats)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return self._stats
+
+    def expected_cost(self, tier: str) -> float:
+        """Returns the expected time to restore the target with `tier`."""
+        stats = self._stats[tier]
+        # the prior counts as one attempt, the success rate starts at 1/2
+        mean_cost = (stats["cost"] + PRIOR_COSTS.get(tier, 0.0)) / (
+            stats["attempts"] + 1
+        )
+        success_rate = (stats["successes"] + 1) / (stats["attempts"] + 2)
+        return mean_cost / success_rate
+
+    def _attempt(self, tier: str) -> bool:
+        log.info(f"Recovering the target: {tier}")
+        tstart = time.monotonic()
+        try:
+            self._actions[tier]()
+            healthy = self._probe()
+        except Exception as e:
+            log.error(f"Recovery {tier} failed: {e}")
+            healthy = False
+        cost = time.monotonic() - tstart
+
+        stats = self._stats[tier]
+        stats["attempts"] += 1
+        stats["successes"] += healthy
+        stats["cost"] += cost
+        self._save()
+        log.info(
+            f"Recovery {tier} {'succeeded' if healthy else 'failed'} "
+            f"after {cost:.1f}s"
+        )
+        return healthy
+
+    def recover(self, weakest: Optional[str] = None) -> str:
+        """Escalates until the target is healthy again and returns the tier
+        that restored it. Tiers weaker than `weakest` are not attempted.
+
+        Raises:
+            RecoveryException: if not even the strongest tier helped.
+        """
+        start = self._tiers.index(weakest) if weakest in self._tiers else 0
+        while start < len(self._tiers):
+            tier = min(self._tiers[start:], key=self.expected_cost)
+            if self._attempt(tier):
+                return tier
+            start = self._tiers.index(tier) + 1
+        raise RecoveryException("No recovery tier restored the target.")
+
+    def _save(self) -> None:
+        if not self._path:
+            return
+        tmp_path = os.path.join(
+            os.path.dirname(self._path),
+            f".{os.path.basename(self._path)}.tmp",
+        )
+        with open(tmp_path, "w") as f:
+            json.dump(self._stats, f)
+        os.replace(tmp_path, self._path)
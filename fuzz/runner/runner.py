@@ -1,9 +1,9 @@
 import socket
 import logging
-import select
 import time
 
 from fuzz.const import TEEZZ_CMD
+from fuzz.runner.sockreader import SocketReader
 from fuzz.utils import u32, u64, p32
 
 log = logging.getLogger(__name__)
@@ -21,21 +21,51 @@ class RunnerStatus:
 
 
 class Runner:
-    def __init__(self, host, port, session_meta) -> None:
+    # deadline in seconds for connecting to the executor
+    CONNECT_TIMEOUT = 10.0
+    # deadline in seconds for receiving a status and response from the
+    # executor
+    RECV_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        host,
+        port,
+        session_meta,
+        batch=False,
+        persistent=0,
+        latency=None,
+    ) -> None:
         self._host = host
         self._port = port
         self._session_meta = session_meta
         self._terminate = False
+        # ship all interactions of a sequence in one `TEEZZ_CMD_SEND_BATCH`
+        self.batch = batch
+        # keep the executor's child and its TA session alive for up to
+        # `persistent` sequences. `0` opens a new session for every sequence.
+        self.persistent = persistent
+        self._connected = False
+        self._recycle = False
+        # number of sequences run in the current session
+        self._session_seqs = 0
+        # `LatencyTracker` deriving the receive deadline of each interaction,
+        # `None` uses `RECV_TIMEOUT` for all of them
+        self.latency = latency
 
     def _connect(self):
         self.socket = socket.socket()
         self.socket.connect((self._host, self._port))
-        self.socket.settimeout(10.0)
+        self.socket.settimeout(self.CONNECT_TIMEOUT)
+        self._reader = SocketReader(self.socket)
 
     def _disconnect(self):
         self.socket.close()
 
     def __enter__(self):
+        if self._connected:
+            # persistent mode, continue in the open session
+            return self
         self._connect()
         msg = (
             TEEZZ_CMD.TEEZZ_CMD_START
@@ -43,63 +73,77 @@ class Runner:
             + self._session_meta.serialize()
         )
         self.socket.sendall(msg)
+        self._connected = True
+        self._session_seqs = 0
         return self
 
-    def __exit__(self, *_):
+    def __exit__(self, exc_type, *_):
+        self._session_seqs += 1
+        if (
+            exc_type is None
+            and not self._recycle
+            and self._session_seqs < self.persistent
+        ):
+            return
+        self.close()
+
+    def recycle(self):
+        """Closes the session when the current sequence is done.
+
+        The executor's child handling the session terminates and the next
+        sequence is run in a freshly forked child with a new TA session."""
+        self._recycle = True
+
+    def close(self):
+        """Ends the current session if there is one."""
+        if not self._connected:
+            return
         try:
             msg = TEEZZ_CMD.TEEZZ_CMD_END + p32(0)
             self.socket.sendall(msg)
-        except BrokenPipeError as e:
+        except (BrokenPipeError, ConnectionResetError) as e:
             log.warn(e)
         self._disconnect()
+        self._connected = False
+        self._recycle = False
 
     def terminate(self):
+        # the forkserver waits for the child of an open session to terminate
+        self.close()
         self._connect()
         msg = TEEZZ_CMD.TEEZZ_CMD_TERMINATE + p32(0)
         self.socket.sendall(msg)
         self._disconnect()
 
-    def _recv_exact(self, sz):
-        out = b""
-        self.socket.setblocking(0)
-        tstart = time.time()
-        while len(out) != sz:
-            if tstart + 10.0 < time.time():
-                raise socket.timeout()
-            ready = select.select([self.socket], [], [], 10)
-            if ready[0]:
-                out += self.socket.recv(sz - len(out))
-        return out
-
-    def _recv_chunk(self):
-        """returns a chunk of data sent from remote."""
+    def _recv_exact(self, sz, deadline):
+        return self._reader.read_exact(
+            sz, timeout=deadline - time.monotonic()
+        )
+
+    def _recv_chunk(self, deadline):
+        """returns a chunk of data sent from remote.
+
+        The chunk is a `memoryview` into the receive buffer that is only valid
+        until the next receive on this runner."""
         # receive the size
-        content = b""
-        sz_raw = self._recv_exact(4)
-        sz = u32(sz_raw)
+        sz = u32(self._recv_exact(4, deadline))
         # log.debug(f"Receiving chunk of size {sz}")
-
-        if sz > 0:
-            content = self._recv_exact(sz)
+        content = self._recv_exact(sz, deadline)
         assert len(content) == sz, "recv too short"
         return content
 
-    def run(self, inp):
-        """Runs `inp` and returns `status` and `outp`"""
-        self.socket.setblocking(1)
-        msg = TEEZZ_CMD.TEEZZ_CMD_SEND + p32(len(inp)) + inp
-        log.debug(f"---> {len(msg)} bytes.")
-        self.socket.sendall(msg)
-
+    def _recv_result(self, timeout=None):
+        """receives `status` and `outp` of one interaction within `timeout`
+        seconds, `RECV_TIMEOUT` if `None`"""
+        deadline = time.monotonic() + (timeout or self.RECV_TIMEOUT)
         # first, receive the 4-byte status
-        status = self._recv_exact(4)
-        status = u32(status)
+        status = u32(self._recv_exact(4, deadline))
         log.debug(f"<--- status {status:#x}")
 
         response = b""
         if status == RunnerStatus.EXECUTOR_SUCCESS:
             log.debug("---- waiting for response")
-            response = self._recv_chunk()
+            response = self._recv_chunk(deadline)
             log.debug(f"<--- response {len(response)} bytes")
         elif status == RunnerStatus.EXECUTOR_ERROR:
             response = None
@@ -107,3 +151,30 @@ class Runner:
             raise RunnerException("Target misbehaving.")
 
         return status, response
+
+    def run(self, inp, timeout=None):
+        """Runs `inp` and returns `status` and `outp`.
+
+        `timeout` is the deadline in seconds for the result, `RECV_TIMEOUT`
+        if `None`."""
+        self.socket.setblocking(1)
+        msg = TEEZZ_CMD.TEEZZ_CMD_SEND + p32(len(inp)) + inp
+        log.debug(f"---> {len(msg)} bytes.")
+        self.socket.sendall(msg)
+        return self._recv_result(timeout)
+
+    def run_batch(self, inps, timeouts=None):
+        """Runs all `inps` with a single round trip and yields `status` and
+        `outp` for each of them as soon as it arrives.
+
+        The executor executes the inputs in order and stops at the first one
+        it fails to execute. Reading results beyond this point raises
+        `socket.timeout`. `timeouts` are the deadlines for the results of the
+        `inps`, each counting from the previous result."""
+        self.socket.setblocking(1)
+        payload = b"".join(p32(len(inp)) + inp for inp in inps)
+        msg = TEEZZ_CMD.TEEZZ_CMD_SEND_BATCH + p32(len(payload)) + payload
+        log.debug(f"---> {len(msg)} bytes ({len(inps)} inputs).")
+        self.socket.sendall(msg)
+        for timeout in timeouts or [None] * len(inps):
+            yield self._recv_result(timeout)
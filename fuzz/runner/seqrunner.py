@@ -1,7 +1,10 @@
 import logging
 import socket
+import time
 from fuzz.utils import u32
+from fuzz.runner.latency import latency_key
 from fuzz.runner.runner import RunnerStatus, Runner
+from fuzz.runner.sockreader import SocketReader
 from fuzz.stats import STATS
 
 from ..seed.seedsequence import SeedSequence
@@ -9,15 +12,26 @@ from ..seed.seedsequence import SeedSequence
 log = logging.getLogger(__file__)
 log.setLevel(logging.ERROR)
 
-from typing import Set, Tuple, Any
+from collections import Counter
+from typing import Dict, Optional, Set, Tuple, Any
 
 
 class SequenceRunner(object):
     def __init__(self, host: str, port: int):
         self._host = host
         self._port = port
-        self._coverage: Set[Tuple[Any]] = set()
+        self._init_state()
+
+        self._socket = socket.socket()
+        self._socket.connect((self._host, self._port))
+        self._reader = SocketReader(self._socket, bufsize=64)
+
+    def _init_state(self):
+        # coverage tuples of the last sequence and how often they were hit
+        self._coverage: Dict[Tuple[Any], int] = Counter()
         self._crashed = False
+        # coverage tuple of the interaction that crashed
+        self._crash_coverage = None
         self.seq_status_codes = []
         self._total_seqs = 0
         self._total_runs = 0
@@ -25,18 +39,9 @@ class SequenceRunner(object):
         # of observed seq responses, `False` otherwise
         self._seq_replayable = True
 
-        self._socket = socket.socket()
-        self._socket.connect((self._host, self._port))
-
     def __del__(self):
         self._socket.close()
 
-    def _recv_exact(self, sz: int):
-        out = b""
-        while len(out) != sz:
-            out += self._socket.recv(1)
-        return out
-
     @property
     def total_runs(self):
         return self._total_runs
@@ -46,75 +51,182 @@ class SequenceRunner(object):
         return self._total_seqs
 
     def forkserver_status(self):
-        return u32(self._recv_exact(4))
+        return u32(self._reader.read_exact(4))
 
     def coverage(self) -> Set[Tuple[Any]]:
+        return set(self._coverage)
+
+    def coverage_counts(self) -> Dict[Tuple[Any], int]:
         return self._coverage
 
     def crashed(self):
         return self._crashed
 
-    def run(self, runner: Runner, seedseq: SeedSequence):
+    def crash_coverage(self) -> Optional[Tuple[Any]]:
+        return self._crash_coverage
+
+    def _start_seq(self, seedseq: SeedSequence):
         assert len(seedseq) > 0, "No seeds"
         self._total_seqs += 1
-        self._coverage = set()
+        self._coverage = Counter()
         self.seq_status_codes = []  #  reset status codes
         self._crashed = False
+        self._crash_coverage = None
         self._seq_replayable = True
         STATS["#sequences"] += 1
 
+    def _needs_recycle(self, status) -> bool:
+        # in persistent mode, the TA's state carries over to the next
+        # sequence. We start over with a fresh session if the target
+        # failed or crashed, or if the TA behaves differently than
+        # recorded, i.e., its state probably drifted.
+        return (
+            status != RunnerStatus.EXECUTOR_SUCCESS
+            or self._crashed
+            or not self._seq_replayable
+        )
+
+    def _serialize_seeds(self, seedseq: SeedSequence):
+        """Yields the seeds of `seedseq` to run and their serialized
+        inputs."""
+        for seed in seedseq:
+            self._total_runs += 1
+            inp = seed.input.serialize()
+
+            # TODO: remove when missing input buffer for input memref types
+            # is fixed.
+            if not inp:
+                continue
+            yield seed, inp
+
+    @staticmethod
+    def _recv_timeout(runner: Runner, seed) -> Optional[float]:
+        if runner.latency is None:
+            return None
+        return runner.latency.timeout(latency_key(seed.input))
+
+    @staticmethod
+    def _record_latency(
+        runner: Runner, seed, status, latency: float, timeout
+    ):
+        if runner.latency is None:
+            return
+        key = latency_key(seed.input)
+        if status == RunnerStatus.EXECUTOR_SUCCESS:
+            runner.latency.record(key, latency)
+        elif status == RunnerStatus.EXECUTOR_TIMEOUT:
+            if runner.latency.is_adaptive(timeout):
+                STATS["#adaptivetimeouts"] += 1
+            runner.latency.record_timeout(key, timeout)
+
+    def run(self, runner: Runner, seedseq: SeedSequence):
+        self._start_seq(seedseq)
+
         # the `__enter__()` and `__exit__()` methods of the runner are
         # responsible for opening and closing the connection to the executor
         # on the device.
         with runner:
-            # the `__next__()` method of the `SeedSequence` iterator object
-            # takes care of resolving value dependencies if present in this seq
-            for idx, seed in enumerate(seedseq):
-                self._total_runs += 1
-                inp = seed.input.serialize()
-
-                # TODO: remove when missing input buffer for input memref types
-                # is fixed.
-                if not inp:
-                    continue
-
-                try:
-                    STATS["#interactions"] += 1
-                    status, response = runner.run(inp)
-                except socket.timeout:
-                    STATS["#timeouts"] += 1
-                    log.warn("Timeout")
-                    status = RunnerStatus.EXECUTOR_TIMEOUT
-                except ConnectionResetError as e:
-                    STATS["#errors"] += 1
-                    log.warn(e)
-                    status = RunnerStatus.EXECUTOR_ERROR
-
-                if status == RunnerStatus.EXECUTOR_SUCCESS:
-                    STATS["#successes"] += 1
-
-                    self.seq_status_codes.append(seed.output.status_code)
-                    prev_out = seed.output
-                    prev_is_success = prev_out.is_success()
-
-                    seed.output = seed.input.deserialize_obj(response)
-                    if seed.output.is_success() != prev_is_success:
-                        self._seq_replayable = False
-
-                    self._coverage.add(seed.output.coverage)
-                    if seed.output.is_success():
-                        STATS["#ta_successes"] += 1
-                    else:
-                        STATS["#ta_fails"] += 1
-
-                    if seed.output.is_crash():
-                        # import ipdb
-                        # ipdb.set_trace()
-                        self._crashed = True
-                        break
-                else:
-                    self.seq_status_codes.append(None)
-                    STATS["#errors"] += 1
-                    # break if runner failed
-                    break
+            if runner.batch and not seedseq.has_value_dependencies():
+                status = self._run_batch(runner, seedseq)
+            else:
+                status = self._run_interactive(runner, seedseq)
+            if self._needs_recycle(status):
+                runner.recycle()
         return status
+
+    def _run_interactive(self, runner: Runner, seedseq: SeedSequence):
+        # the `__next__()` method of the `SeedSequence` iterator object
+        # takes care of resolving value dependencies if present in this seq
+        for seed, inp in self._serialize_seeds(seedseq):
+            response = None
+            timeout = self._recv_timeout(runner, seed)
+            tstart = time.monotonic()
+            try:
+                STATS["#interactions"] += 1
+                status, response = runner.run(inp, timeout)
+            except socket.timeout:
+                STATS["#timeouts"] += 1
+                log.warn("Timeout")
+                status = RunnerStatus.EXECUTOR_TIMEOUT
+            except (ConnectionResetError, BrokenPipeError) as e:
+                STATS["#errors"] += 1
+                log.warn(e)
+                status = RunnerStatus.EXECUTOR_ERROR
+            self._record_latency(
+                runner, seed, status, time.monotonic() - tstart, timeout
+            )
+
+            if not self._process_result(seed, status, response):
+                break
+        return status
+
+    def _run_batch(self, runner: Runner, seedseq: SeedSequence):
+        # without value dependencies, no input depends on a previous output
+        # and we can ship the whole sequence to the executor at once.
+        seeds = []
+        inps = []
+        for seed, inp in self._serialize_seeds(seedseq):
+            seeds.append(seed)
+            inps.append(inp)
+
+        status = RunnerStatus.EXECUTOR_SUCCESS
+        timeouts = [self._recv_timeout(runner, seed) for seed in seeds]
+        results = runner.run_batch(inps, timeouts)
+        tstart = time.monotonic()
+        for seed, timeout in zip(seeds, timeouts):
+            response = None
+            try:
+                STATS["#interactions"] += 1
+                status, response = next(results)
+            except socket.timeout:
+                STATS["#timeouts"] += 1
+                log.warn("Timeout")
+                status = RunnerStatus.EXECUTOR_TIMEOUT
+            except (ConnectionResetError, BrokenPipeError) as e:
+                STATS["#errors"] += 1
+                log.warn(e)
+                status = RunnerStatus.EXECUTOR_ERROR
+            # the executor runs the inputs back to back, the time between two
+            # results is the latency of the latter
+            tend = time.monotonic()
+            self._record_latency(runner, seed, status, tend - tstart, timeout)
+            tstart = tend
+
+            # `response` points into the runner's receive buffer, it has to be
+            # consumed before we fetch the next result.
+            if not self._process_result(seed, status, response):
+                break
+        return status
+
+    def _process_result(self, seed, status, response) -> bool:
+        """Records the result of running `seed`.
+
+        Returns `False` if the remaining seeds of the sequence should not be
+        run."""
+        if status != RunnerStatus.EXECUTOR_SUCCESS:
+            self.seq_status_codes.append(None)
+            STATS["#errors"] += 1
+            # break if runner failed
+            return False
+
+        STATS["#successes"] += 1
+
+        self.seq_status_codes.append(seed.output.status_code)
+        prev_out = seed.output
+        prev_is_success = prev_out.is_success()
+
+        seed.output = seed.input.deserialize_obj(response)
+        if seed.output.is_success() != prev_is_success:
+            self._seq_replayable = False
+
+        self._coverage[seed.output.coverage] += 1
+        if seed.output.is_success():
+            STATS["#ta_successes"] += 1
+        else:
+            STATS["#ta_fails"] += 1
+
+        if seed.output.is_crash():
+            self._crashed = True
+            self._crash_coverage = seed.output.coverage
+            return False
+        return True
@@ -0,0 +1,102 @@
+import socket
+import select
+import time
+import logging
+
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class SocketReader:
+    """Buffered reader on top of a connected socket.
+
+    Incoming data is received with `recv_into` into a preallocated
+    `bytearray`. Reads are served as `memoryview` slices of this buffer, so a
+    chunk of `n` bytes costs neither `n` syscalls nor repeated copying.
+
+    NOTE: a `memoryview` returned by `read_exact` is only valid until the next
+    call to `read_exact`. Callers need to consume (i.e., deserialize or copy)
+    it before reading again.
+    """
+
+    DEFAULT_BUFSIZE = 64 * 1024
+
+    def __init__(self, sock: socket.socket, bufsize: int = DEFAULT_BUFSIZE):
+        self._sock = sock
+        self._buf = bytearray(bufsize)
+        self._view = memoryview(self._buf)
+        # unconsumed data lives in `self._buf[self._start:self._end]`
+        self._start = 0
+        self._end = 0
+
+    @property
+    def buffered(self) -> int:
+        """Number of received but not yet consumed bytes."""
+        return self._end - self._start
+
+    def _make_room(self, sz: int) -> None:
+        """Make sure `sz` bytes fit into the buffer starting at `_start`."""
+        nbuffered = self._end - self._start
+        if sz <= len(self._buf) - self._start:
+            return
+        if sz <= len(self._buf) // 2:
+            # move the unconsumed bytes to the front of the buffer
+            self._view[:nbuffered] = self._buf[self._start : self._end]
+        else:
+            # the chunk does not fit, allocate a larger buffer that leaves room
+            # for the headers around the next chunk of this size. Views we
+            # handed out before still reference the old buffer.
+            bufsize = len(self._buf)
+            while bufsize < 2 * sz:
+                bufsize <<= 1
+            buf = bytearray(bufsize)
+            buf[:nbuffered] = self._buf[self._start : self._end]
+            self._buf = buf
+            self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = nbuffered
+
+    def _fill(self, deadline: Optional[float]) -> None:
+        """Receive as many bytes as available (at least one)."""
+        if deadline is not None:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise socket.timeout()
+            ready, _, _ = select.select([self._sock], [], [], remaining)
+            if not ready:
+                raise socket.timeout()
+
+        nread = self._sock.recv_into(self._view[self._end :])
+        if nread == 0:
+            # the executor closed the connection. We report this the same way
+            # as an unresponsive executor, i.e., the data we wait for will
+            # never arrive.
+            raise socket.timeout("Connection closed by peer.")
+        self._end += nread
+
+    def read_exact(self, sz: int, timeout: Optional[float] = None) -> memoryview:
+        """Returns a view on exactly `sz` bytes received from the socket.
+
+        Args:
+            sz (int): number of bytes to read
+            timeout (Optional[float]): overall deadline for this read in
+                seconds. Blocks according to the socket's settings if `None`.
+
+        Raises:
+            socket.timeout: if the deadline expired or the connection was
+                closed before `sz` bytes arrived.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+
+        if self._start == self._end:
+            # nothing buffered, rewind to use the whole buffer
+            self._start = self._end = 0
+
+        self._make_room(sz)
+        while self._end - self._start < sz:
+            self._fill(deadline)
+
+        out = self._view[self._start : self._start + sz]
+        self._start += sz
+        return out
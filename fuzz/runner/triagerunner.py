@@ -1,8 +1,22 @@
 import logging
+import os
 import signal
+import time
+
+from collections import Counter
+from typing import List, NamedTuple, Optional, Tuple
 
 from .baserunner import BaseRunner
+from fuzz.orchestrator.adborchestrator import AdbOrchestrator
+from fuzz.orchestrator.tzlog import TzLog
+from fuzz.runner.runner import RunnerStatus
+from fuzz.runner.seqrunner import SequenceRunner
 from fuzz.seed.seedsequence import SeedSequence
+from fuzz.triaging.ddmin import DeltaDebugger, ResultCache
+from fuzz.triaging.signature import coverage_signature, log_signature
+from fuzz.utils import mkdir_p
+
+from adb import adb
 
 log = logging.getLogger(__name__)
 
@@ -11,13 +25,27 @@ class TriageRunnerException(Exception):
     pass
 
 
+class ReplayResult(NamedTuple):
+    crash: str
+    runs: int
+    reproduced: int
+    # `None` if the crash did not reproduce
+    signature: Optional[str]
+    frames: Tuple[str, ...]
+
+
 class TriageRunner(BaseRunner):
     """A runner aimed at reproducing crashing sequences."""
 
+    # seconds to wait for the TEE log after the last replay
+    TZLOG_GRACE = 2
+
     def __init__(self, target_tee, port, config, out_dir, device_id=None, reboot=False):
         super(TriageRunner, self).__init__(
             target_tee, port, config, out_dir, device_id, reboot
         )
+        # number of device reboots caused by replays
+        self._restarts = 0
 
     def run(self, crash_seq):
         """run triage"""
@@ -39,6 +67,212 @@ class TriageRunner(BaseRunner):
 
         return
 
+    @staticmethod
+    def _read_logs(log_dir: str) -> str:
+        """Returns the TEE logs in `log_dir`, oldest first."""
+        names = [n for n in os.listdir(log_dir) if n.startswith("tzlog.log")]
+        # rotated logs are `tzlog.log.1`, `tzlog.log.2`, ..., the current one
+        # is the newest
+        names.sort(
+            key=lambda n: int(n.rsplit(".", 1)[1]) if n[-1].isdigit() else 1 << 32
+        )
+        text = []
+        for name in names:
+            with open(os.path.join(log_dir, name), "r", errors="replace") as f:
+                text.append(f.read())
+        return "\n".join(text)
+
+    def _restart_target(self):
+        """Reboots the device and reconnects to a fresh executor."""
+        self._restarts += 1
+        self._runner.close()
+        self.reset_device()
+        self._executor = AdbOrchestrator(
+            self._target_tee, self._port, self._device_id, self._out_dir
+        )
+        self._seqrunner = SequenceRunner("127.0.0.1", self._port)
+
+    def _device_died(self) -> bool:
+        if self._device_id and not adb.is_device_present(self._device_id):
+            # the device rebooted, bring it back up for the next replay
+            self._restart_target()
+            return True
+        return False
+
+    def _reproduces(self, seedseq: SeedSequence) -> bool:
+        """Runs `seedseq`, `True` if the TA crashed or the device died.
+
+        Raises:
+            TriageRunnerException: if the executor refuses connections while
+                the device is up. The replay then tells nothing about the
+                crash, it must neither count nor be cached.
+        """
+        try:
+            status = self._seqrunner.run(self._runner, seedseq)
+        except ConnectionRefusedError as e:
+            if self._device_died():
+                return True
+            raise TriageRunnerException(f"The executor is gone: {e}")
+        if self._seqrunner.crashed():
+            return True
+        if status == RunnerStatus.EXECUTOR_SUCCESS:
+            return False
+        return self._device_died()
+
+    def replay(self, crash_seq_dir: str, times: int, log_dir: str) -> ReplayResult:
+        """Replays the crash in `crash_seq_dir` `times` times.
+
+        On adb targets, the TEE log is captured to `log_dir` and the crash is
+        identified by the backtrace logged most often. Otherwise, or without a
+        backtrace, by the interaction that crashed."""
+        crash_seq = SeedSequence.load_sequence(
+            self._get_seed_class(self._target_tee), crash_seq_dir
+        )
+        tzlog = TzLog(self._device_id, log_dir) if self._device_id else None
+        reproduced = 0
+        crash_coverages = Counter()
+        for _ in range(times):
+            restarts = self._restarts
+            if self._reproduces(crash_seq.clone()):
+                reproduced += 1
+                if self._seqrunner.crash_coverage() is not None:
+                    crash_coverages[self._seqrunner.crash_coverage()] += 1
+            if tzlog is not None and restarts != self._restarts:
+                # the device rebooted and took the log reader with it, the
+                # new reader rotates the log of the old one
+                tzlog = TzLog(self._device_id, log_dir)
+
+        signature = None
+        if tzlog is not None:
+            # give the log reader a moment to catch up
+            time.sleep(self.TZLOG_GRACE)
+            del tzlog
+        if reproduced:
+            if self._device_id:
+                signature = log_signature(self._read_logs(log_dir))
+            if signature is None and crash_coverages:
+                signature = coverage_signature(
+                    crash_coverages.most_common(1)[0][0]
+                )
+        log.info(f"{crash_seq_dir}: reproduced {reproduced}/{times}")
+        return ReplayResult(
+            crash_seq_dir,
+            times,
+            reproduced,
+            signature.id if signature else None,
+            signature.frames if signature else (),
+        )
+
+    def _diffs(
+        self, seedseq: SeedSequence, original: SeedSequence
+    ) -> List[Tuple[int, int, int]]:
+        """Returns the bytes in which the params of `seedseq` differ from the ones
+        of `original` as (seed, param, offset) tuples. Only params of the same
+        size whose data can be replaced are compared."""
+        diffs = []
+        for seed_idx in range(len(seedseq)):
+            params = seedseq[seed_idx].input.params
+            orig_params = original[seed_idx].input.params
+            for param_idx, (param, orig) in enumerate(zip(params, orig_params)):
+                if not hasattr(param, "set_data"):
+                    continue
+                if not param.data or not orig.data:
+                    continue
+                if len(param.data) != len(orig.data):
+                    continue
+                diffs.extend(
+                    (seed_idx, param_idx, off)
+                    for off, (a, b) in enumerate(zip(param.data, orig.data))
+                    if a != b
+                )
+        return diffs
+
+    @staticmethod
+    def _apply_diffs(
+        seedseq: SeedSequence,
+        original: SeedSequence,
+        diffs: List[Tuple[int, int, int]],
+    ) -> SeedSequence:
+        """Returns a copy of `seedseq` whose compared params hold the data of
+        `original` except for the bytes in `diffs`."""
+        candidate = seedseq.clone()
+        data = {}
+        for seed_idx, param_idx, off in diffs:
+            key = (seed_idx, param_idx)
+            if key not in data:
+                data[key] = bytearray(original[seed_idx].input.params[param_idx].data)
+            data[key][off] = seedseq[seed_idx].input.params[param_idx].data[off]
+        for (seed_idx, param_idx), buf in data.items():
+            candidate[seed_idx].input.params[param_idx].set_data(bytes(buf))
+        return candidate
+
+    def minimize(
+        self, crash_seq_dir: str, original_seq_dir: Optional[str] = None
+    ) -> SeedSequence:
+        """Reduces the crash in `crash_seq_dir` to a minimal subsequence that
+        still crashes and, given the sequence the crash was mutated from, to the
+        minimal byte differences to that sequence.
+
+        Every replay is cached in the output folder, running the same
+        minimization again resumes it without replaying what was tested before.
+        """
+        seed_cls = self._get_seed_class(self._target_tee)
+        crash_seq = SeedSequence.load_sequence(seed_cls, crash_seq_dir)
+        name = os.path.basename(os.path.normpath(crash_seq_dir))
+        min_dir = os.path.join(self._out_dir, "minimized")
+        mkdir_p(min_dir)
+        cache = ResultCache(
+            os.path.join(min_dir, f".{name}-{crash_seq.digest()[:16]}.cache")
+        )
+        if len(cache):
+            log.info(f"Resuming minimization with {len(cache)} cached replays.")
+
+        # 1) the interactions that are needed
+        calls = DeltaDebugger(
+            lambda config: self._reproduces(crash_seq.subsequence(config)),
+            cache,
+            "calls",
+        )
+        kept = calls.ddmin(range(len(crash_seq)))
+        minimized = crash_seq.subsequence(kept)
+        log.info(
+            f"Reduced {name} from {len(crash_seq)} to {len(minimized)} "
+            f"interactions in {calls.execs} replays."
+        )
+
+        # 2) the mutated bytes that are needed
+        execs = calls.execs
+        if original_seq_dir:
+            original = SeedSequence.load_sequence(seed_cls, original_seq_dir)
+            if len(original) != len(crash_seq):
+                log.warning("The original sequence does not match the crash.")
+            else:
+                original = original.subsequence(kept)
+                diffs = self._diffs(minimized, original)
+                if diffs:
+                    data = DeltaDebugger(
+                        lambda config: self._reproduces(
+                            self._apply_diffs(
+                                minimized, original, [diffs[i] for i in config]
+                            )
+                        ),
+                        cache,
+                        "bytes",
+                    )
+                    needed = data.ddmin(range(len(diffs)))
+                    minimized = self._apply_diffs(
+                        minimized, original, [diffs[i] for i in needed]
+                    )
+                    execs += data.execs
+                    log.info(
+                        f"Reduced {len(diffs)} differing bytes to {len(needed)} "
+                        f"in {data.execs} replays."
+                    )
+
+        minimized.store_packed(os.path.join(min_dir, name))
+        log.info(f"Minimized {name} with {execs} replays.")
+        return minimized
+
     def _terminate(self):
         # self._runner.terminate()
         del self._seqrunner
@@ -1,6 +1,5 @@
 import os
 import logging
-import copy
 
 from .baserunner import BaseRunner
 from fuzz.runner.runner import RunnerStatus
@@ -71,7 +70,7 @@ class ValDepRunner(BaseRunner):
                 continue
 
             # copy initial sequence and obtain status codes for each call
-            probe_seq = copy.deepcopy(self.current_seq)
+            probe_seq = self.current_seq.clone()
             original_status_codes = self._probe(probe_seq)
 
             # obtain value dependencies for the sequence and iteratively remove
@@ -79,8 +78,8 @@ class ValDepRunner(BaseRunner):
             val_deps = self.current_seq._seed_deps.get_value_dependencies()
             num_removed_valdeps = 0
             for vd in val_deps:
-                prev_probe_seq = copy.deepcopy(self.current_seq)
-                probe_seq._seed_deps.remove_value_dependency(vd)
+                prev_probe_seq = self.current_seq.clone()
+                probe_seq.mutable_dependencies().remove_value_dependency(vd)
                 status_codes = self._probe(probe_seq)
                 if status_codes != original_status_codes:
                     # if the status codes differ, we removed a required val dep.
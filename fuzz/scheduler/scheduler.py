@@ -0,0 +1,214 @@
+from __future__ import annotations
+import bisect
+import itertools
+import random
+import logging
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+log = logging.getLogger(__name__)
+
+
+class SchedulerException(Exception):
+    pass
+
+
+@dataclass
+class EntryStats:
+    """What we know about a member of the population."""
+
+    # number of interactions, `None` if unknown
+    seqlen: Optional[int] = None
+    # seconds the entry took to run when it was added, `None` if unknown
+    exec_time: Optional[float] = None
+    # number of times the entry was picked for mutation
+    picks: int = 0
+    # number of mutants that produced new coverage or crashed
+    finds: int = 0
+    # number of mutants that timed out
+    timeouts: int = 0
+    energy: float = 1.0
+
+
+class Scheduler(object):
+    """Decides which member of the population is mutated next and how often.
+
+    Members are identified by their index in the population. Subclasses
+    assign energy to members in `_energy()`, members are picked with
+    probability proportional to their energy.
+    """
+
+    def __init__(self):
+        self._entries: List[EntryStats] = []
+        # cumulative energies, `None` if outdated
+        self._cum_energy: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, idx: int) -> EntryStats:
+        return self._entries[idx]
+
+    def add(
+        self,
+        seqlen: Optional[int] = None,
+        exec_time: Optional[float] = None,
+        energy: Optional[float] = None,
+    ) -> int:
+        """Adds a member to the population, returns its index.
+
+        `energy` is the energy of a member from a previous run, if any."""
+        entry = EntryStats(seqlen, exec_time)
+        self._entries.append(entry)
+        entry.energy = self._energy(entry) if energy is None else energy
+        self._cum_energy = None
+        return len(self._entries) - 1
+
+    def _cumulative_energy(self) -> List[float]:
+        if self._cum_energy is None:
+            self._cum_energy = list(
+                itertools.accumulate(e.energy for e in self._entries)
+            )
+        return self._cum_energy
+
+    def choose(self) -> int:
+        """Returns the index of the member to mutate next."""
+        if not self._entries:
+            raise SchedulerException("No members to choose from.")
+        cum_energy = self._cumulative_energy()
+        r = random.random() * cum_energy[-1]
+        idx = bisect.bisect_right(cum_energy, r)
+        idx = min(idx, len(self._entries) - 1)
+        self._entries[idx].picks += 1
+        return idx
+
+    def nmutations(self, idx: int, seqlen: int) -> int:
+        """Returns the number of mutations for a mutant of member `idx`."""
+        return random.randint(1, seqlen)
+
+    def report(
+        self, idx: int, exec_time: float, found: bool, timed_out: bool
+    ):
+        """Updates member `idx` after running one of its mutants.
+
+        `found` is `True` if the mutant produced new coverage or crashed."""
+        entry = self._entries[idx]
+        if found:
+            entry.finds += 1
+        if timed_out:
+            entry.timeouts += 1
+        if entry.exec_time is None and not timed_out:
+            entry.exec_time = exec_time
+        energy = self._energy(entry)
+        if energy != entry.energy:
+            entry.energy = energy
+            self._cum_energy = None
+
+    def energy(self, idx: int) -> float:
+        return self._entries[idx].energy
+
+    def _energy(self, entry: EntryStats) -> float:
+        return 1.0
+
+
+class UniformScheduler(Scheduler):
+    """Picks members uniformly at random, mutates a sequence of `n`
+    interactions between 1 and `n` times."""
+
+    def choose(self) -> int:
+        if not self._entries:
+            raise SchedulerException("No members to choose from.")
+        idx = random.randrange(len(self._entries))
+        self._entries[idx].picks += 1
+        return idx
+
+    def report(
+        self, idx: int, exec_time: float, found: bool, timed_out: bool
+    ):
+        entry = self._entries[idx]
+        entry.finds += int(found)
+        entry.timeouts += int(timed_out)
+
+
+class FastScheduler(Scheduler):
+    """Power schedule favoring fast and productive members.
+
+    Similar to AFL's performance score and AFLFast's schedules, a member's
+    energy is
+
+        perf * (1 + finds) / sqrt(1 + picks) * 0.5 ** timeouts
+
+    where `perf` rates the member's execution time relative to the average
+    of the population from 0.25 (slow) to 3 (fast). Every timeout halves
+    the energy, a timeout likely costs us a device reset. Members are picked
+    proportionally to their energy and mutated more often the more energy
+    they have compared to the average.
+    """
+
+    MIN_ENERGY = 1e-3
+    MAX_MUTATIONS_FACTOR = 4
+
+    def __init__(self):
+        super().__init__()
+        # execution times of the members we ran, also used to estimate the
+        # time per interaction of the members we did not run yet
+        self._total_time = 0.0
+        self._total_seqlen = 0
+        self._ntimes = 0
+
+    def add(self, seqlen=None, exec_time=None, energy=None) -> int:
+        if exec_time is not None and seqlen:
+            self._total_time += exec_time
+            self._total_seqlen += seqlen
+            self._ntimes += 1
+        return super().add(seqlen, exec_time, energy)
+
+    def report(self, idx, exec_time, found, timed_out):
+        entry = self._entries[idx]
+        if entry.exec_time is None and not timed_out and entry.seqlen:
+            self._total_time += exec_time
+            self._total_seqlen += entry.seqlen
+            self._ntimes += 1
+        super().report(idx, exec_time, found, timed_out)
+
+    def _avg_time(self) -> Optional[float]:
+        return self._total_time / self._ntimes if self._ntimes else None
+
+    def _perf(self, entry: EntryStats) -> float:
+        avg_time = self._avg_time()
+        if avg_time is None:
+            return 1.0
+        exec_time = entry.exec_time
+        if exec_time is None:
+            if not entry.seqlen:
+                return 1.0
+            exec_time = entry.seqlen * self._total_time / self._total_seqlen
+        if exec_time <= 0:
+            return 3.0
+        return min(max(avg_time / exec_time, 0.25), 3.0)
+
+    def _energy(self, entry: EntryStats) -> float:
+        energy = self._perf(entry)
+        energy *= (1 + entry.finds) / (1 + entry.picks) ** 0.5
+        energy *= 0.5 ** entry.timeouts
+        return max(energy, self.MIN_ENERGY)
+
+    def nmutations(self, idx: int, seqlen: int) -> int:
+        avg_energy = self._cumulative_energy()[-1] / len(self._entries)
+        factor = self._entries[idx].energy / avg_energy
+        n = round(random.randint(1, seqlen) * factor)
+        return min(max(n, 1), self.MAX_MUTATIONS_FACTOR * seqlen)
+
+
+SCHEDULES = {
+    "uniform": UniformScheduler,
+    "fast": FastScheduler,
+}
+
+
+def make_scheduler(schedule: str) -> Scheduler:
+    if schedule not in SCHEDULES:
+        raise SchedulerException(f"Unknown schedule {schedule}.")
+    return SCHEDULES[schedule]()
@@ -0,0 +1,268 @@
+"""On-disk index of a fuzzer's queue and the population built on top of it.
+
+Resuming a campaign used to deserialize every queue entry. The index lets
+`Corpus` know the queue entries without touching them: members of the
+population are loaded when they are picked and kept in an LRU cache.
+
+The index consists of two files next to the queue folder:
+
+    corpus.idx: magic "TZIX" | u32 version | u32 record size
+                {% for entry in queue %}
+                    u32 queue id | u32 size of the packed entry
+                    u64 offset   | u32 length   (of the entry's info in .dat)
+                    f32 energy
+    corpus.dat: pickled (name, coverage, digest) of every entry
+
+Both files are only appended to, except for the energy that is updated in
+place. `corpus.idx` is memory-mapped.
+"""
+from __future__ import annotations
+import mmap
+import os
+import pickle
+import struct
+import logging
+
+from collections import OrderedDict
+from typing import Any, FrozenSet, NamedTuple, Optional, Tuple
+
+from fuzz.seed import seedpack
+from fuzz.seed.corpussync import queue_entry_id, read_meta
+from fuzz.seed.seedsequence import SeedSequence
+
+
+log = logging.getLogger(__name__)
+
+
+class CorpusIndexException(Exception):
+    pass
+
+
+class IndexRecord(NamedTuple):
+    id: int
+    size: int
+    offset: int
+    length: int
+    energy: float
+
+
+class EntryInfo(NamedTuple):
+    name: str
+    coverage: FrozenSet[Tuple[Any]]
+    digest: Optional[str]
+
+
+class CorpusIndex(object):
+    """Memory-mapped table of the entries of a queue."""
+
+    MAGIC = b"TZIX"
+    VERSION = 1
+    HEADER = struct.Struct("<4sII")
+    RECORD = struct.Struct("<IIQIf")
+
+    def __init__(self, index_path: str, data_path: str):
+        self._index_path = index_path
+        self._data_path = data_path
+        self._index_mm: Optional[mmap.mmap] = None
+        self._data_mm: Optional[mmap.mmap] = None
+        self._len = 0
+
+        exists = os.path.isfile(index_path) and os.path.isfile(data_path)
+        self._index_f = open(index_path, "r+b" if exists else "w+b")
+        self._data_f = open(data_path, "r+b" if exists else "w+b")
+        if not exists or not self._check_header():
+            self._reset()
+        self._remap()
+
+    def _check_header(self) -> bool:
+        header = self._index_f.read(self.HEADER.size)
+        if len(header) != self.HEADER.size:
+            return False
+        magic, version, record_size = self.HEADER.unpack(header)
+        if (magic, version, record_size) != (
+            self.MAGIC,
+            self.VERSION,
+            self.RECORD.size,
+        ):
+            log.warning(f"Rebuilding incompatible index {self._index_path}.")
+            return False
+        return True
+
+    def _reset(self):
+        self._index_f.truncate(0)
+        self._index_f.seek(0)
+        self._index_f.write(
+            self.HEADER.pack(self.MAGIC, self.VERSION, self.RECORD.size)
+        )
+        self._index_f.flush()
+        self._data_f.truncate(0)
+
+    def _remap(self):
+        for mm in (self._index_mm, self._data_mm):
+            if mm is not None:
+                mm.close()
+        index_sz = os.fstat(self._index_f.fileno()).st_size
+        data_sz = os.fstat(self._data_f.fileno()).st_size
+        # a record cut short by a crash is ignored and overwritten
+        self._len = (index_sz - self.HEADER.size) // self.RECORD.size
+        self._index_mm = mmap.mmap(self._index_f.fileno(), index_sz)
+        self._data_mm = (
+            mmap.mmap(self._data_f.fileno(), data_sz, access=mmap.ACCESS_READ)
+            if data_sz
+            else None
+        )
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _record_off(self, idx: int) -> int:
+        if not 0 <= idx < self._len:
+            raise IndexError(idx)
+        return self.HEADER.size + idx * self.RECORD.size
+
+    def record(self, idx: int) -> IndexRecord:
+        return IndexRecord(
+            *self.RECORD.unpack_from(self._index_mm, self._record_off(idx))
+        )
+
+    def info(self, idx: int) -> EntryInfo:
+        rec = self.record(idx)
+        buf = self._data_mm[rec.offset : rec.offset + rec.length]
+        return EntryInfo(*pickle.loads(buf))
+
+    def append(self, size: int, info: EntryInfo, energy=1.0) -> int:
+        """Adds the queue entry `info.name` of `size` bytes, returns its
+        index."""
+        buf = pickle.dumps(tuple(info))
+        offset = self._data_f.seek(0, os.SEEK_END)
+        self._data_f.write(buf)
+        self._data_f.flush()
+
+        rec = self.RECORD.pack(
+            queue_entry_id(info.name), size, offset, len(buf), energy
+        )
+        self._index_f.seek(self.HEADER.size + self._len * self.RECORD.size)
+        self._index_f.write(rec)
+        self._index_f.flush()
+        self._remap()
+        return self._len - 1
+
+    def set_energy(self, idx: int, energy: float):
+        off = self._record_off(idx) + self.RECORD.size - 4
+        struct.pack_into("<f", self._index_mm, off, energy)
+
+    def set_size(self, idx: int, size: int):
+        off = self._record_off(idx) + 4
+        struct.pack_into("<I", self._index_mm, off, size)
+
+    def close(self):
+        for mm in (self._index_mm, self._data_mm):
+            if mm is not None:
+                mm.close()
+        self._index_mm = self._data_mm = None
+        self._index_f.close()
+        self._data_f.close()
+
+
+class Corpus(object):
+    """Population of the sequences in `queue_dir`.
+
+    Supports `len()` and indexing, so `random.choice()` works on it like on
+    a list. Sequences are loaded from the queue when accessed, the
+    `cache_size` most recently used ones are kept in memory.
+    """
+
+    INDEX_NAME = "corpus.idx"
+    DATA_NAME = "corpus.dat"
+
+    def __init__(
+        self, out_dir: str, queue_dir: str, seed_cls, cache_size: int = 128
+    ):
+        self._queue_dir = queue_dir
+        self._seed_cls = seed_cls
+        self._cache_size = cache_size
+        self._cache: OrderedDict[int, SeedSequence] = OrderedDict()
+        os.makedirs(out_dir, exist_ok=True)
+        self._index = CorpusIndex(
+            os.path.join(out_dir, self.INDEX_NAME),
+            os.path.join(out_dir, self.DATA_NAME),
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, idx: int) -> SeedSequence:
+        if idx < 0:
+            idx += len(self)
+        seedseq = self._cache.get(idx)
+        if seedseq is not None:
+            self._cache.move_to_end(idx)
+            return seedseq
+        path = os.path.join(self._queue_dir, self._index.info(idx).name)
+        seedseq = SeedSequence.load_sequence(self._seed_cls, path)
+        self._cache_put(idx, seedseq)
+        return seedseq
+
+    def _cache_put(self, idx: int, seedseq: SeedSequence):
+        self._cache[idx] = seedseq
+        self._cache.move_to_end(idx)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def info(self, idx: int) -> EntryInfo:
+        return self._index.info(idx)
+
+    def energy(self, idx: int) -> float:
+        return self._index.record(idx).energy
+
+    def set_energy(self, idx: int, energy: float):
+        self._index.set_energy(idx, energy)
+
+    def append(
+        self,
+        seedseq: SeedSequence,
+        name: str,
+        size: int,
+        coverage: FrozenSet[Tuple[Any]],
+        digest: Optional[str] = None,
+    ) -> int:
+        """Adds `seedseq`, already stored as `name` in the queue."""
+        idx = self._index.append(
+            size, EntryInfo(name, frozenset(coverage), digest)
+        )
+        self._cache_put(idx, seedseq)
+        return idx
+
+    def replace(self, idx: int, seedseq: SeedSequence, size: int):
+        """Replaces member `idx` with `seedseq`, e.g., after trimming it. The
+        queue entry has to be overwritten already."""
+        self._index.set_size(idx, size)
+        self._cache_put(idx, seedseq)
+
+    def sync_with_queue(self) -> int:
+        """Indexes queue entries missing from the index, e.g., after a
+        crash or in queues written before the index existed. Returns the
+        number of added entries."""
+        if not os.path.isdir(self._queue_dir):
+            return 0
+        names = [n for n in os.listdir(self._queue_dir) if n.startswith("id:")]
+        if len(names) == len(self._index):
+            return 0
+        indexed = {self._index.info(i).name for i in range(len(self._index))}
+        missing = sorted(
+            (n for n in names if n not in indexed), key=queue_entry_id
+        )
+        for name in missing:
+            path = os.path.join(self._queue_dir, name)
+            try:
+                meta = read_meta(path)
+                coverage, digest = meta.coverage, meta.digest
+            except FileNotFoundError:
+                coverage, digest = frozenset(), None
+            size = os.path.getsize(path) if seedpack.is_packed(path) else 0
+            self._index.append(size, EntryInfo(name, coverage, digest))
+        log.info(f"Indexed {len(missing)} queue entries.")
+        return len(missing)
+
+    def close(self):
+        self._index.close()
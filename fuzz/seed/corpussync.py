@@ -0,0 +1,163 @@
+"""Sync of queue entries between fuzzer instances sharing an output folder.
+
+Instances of a campaign write to sibling folders (`out/<tee>/<instance>`).
+Like AFL's `-M`/`-S` sync, every instance periodically scans the queues of
+its siblings for entries it has not seen yet and imports them. Next to the
+sequence, each queue entry stores `meta.pickle` with the coverage tuples the
+entry produced and the digest of its inputs. In a sequence folder, the meta
+file is written last, so entries without it are incomplete and skipped until
+the next sync. Packed sequences are written atomically and hold the meta file
+as well.
+"""
+from __future__ import annotations
+import os
+import pickle
+import logging
+
+from fuzz.seed import seedpack
+
+from typing import Any, FrozenSet, Iterable, List, NamedTuple, Set, Tuple
+
+
+log = logging.getLogger(__name__)
+
+META_NAME = "meta.pickle"
+# subfolder of an instance's output folder holding the next queue id to look
+# at for every sibling
+SYNCED_DIR = ".synced"
+
+
+class QueueEntryMeta(NamedTuple):
+    coverage: FrozenSet[Tuple[Any]]
+    digest: str
+
+
+class SyncedEntry(NamedTuple):
+    sibling: str
+    # queue id of the entry in the sibling's queue
+    id: int
+    path: str
+    meta: QueueEntryMeta
+
+
+def dump_meta(coverage: Iterable[Tuple[Any]], digest: str) -> bytes:
+    return pickle.dumps(tuple(QueueEntryMeta(frozenset(coverage), digest)))
+
+
+def write_meta(path: str, coverage: Iterable[Tuple[Any]], digest: str):
+    """Writes the meta file of the queue entry folder `path`."""
+    tmp_path = os.path.join(path, f".{META_NAME}")
+    with open(tmp_path, "wb") as f:
+        f.write(dump_meta(coverage, digest))
+    os.replace(tmp_path, os.path.join(path, META_NAME))
+
+
+def read_meta(path: str) -> QueueEntryMeta:
+    """Reads the meta file of the queue entry `path`, raises
+    `FileNotFoundError` if there is none."""
+    if seedpack.is_packed(path):
+        files = seedpack.load(path)
+        if META_NAME not in files:
+            raise FileNotFoundError(f"No {META_NAME} in {path}")
+        return QueueEntryMeta(*pickle.loads(files[META_NAME]))
+    with open(os.path.join(path, META_NAME), "rb") as f:
+        return QueueEntryMeta(*pickle.load(f))
+
+
+def queue_entry_id(name: str) -> int:
+    """Returns the id of the queue entry `name` (`id:00000042,...`)."""
+    return int(name.split(",", 1)[0][len("id:") :])
+
+
+class CorpusSync(object):
+    """Imports new queue entries of the siblings of the instance writing to
+    `out_dir`.
+
+    Entries are deduplicated by the digest of their inputs and skipped if
+    their coverage does not add anything to the coverage seen so far.
+    """
+
+    def __init__(self, out_dir: str):
+        self._out_dir = os.path.normpath(out_dir)
+        self._root = os.path.dirname(self._out_dir)
+        self._name = os.path.basename(self._out_dir)
+        self._synced_dir = os.path.join(self._out_dir, SYNCED_DIR)
+        self._digests: Set[str] = set()
+
+    def add_known(self, digest: str) -> bool:
+        """Remembers `digest`, returns `False` if it was known before."""
+        if digest in self._digests:
+            return False
+        self._digests.add(digest)
+        return True
+
+    def _siblings(self) -> List[str]:
+        return sorted(
+            d
+            for d in os.listdir(self._root)
+            if d != self._name
+            and os.path.isdir(os.path.join(self._root, d, "queue"))
+        )
+
+    def _next_id(self, sibling: str) -> int:
+        try:
+            with open(os.path.join(self._synced_dir, sibling), "r") as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _set_next_id(self, sibling: str, next_id: int):
+        os.makedirs(self._synced_dir, exist_ok=True)
+        with open(os.path.join(self._synced_dir, sibling), "w") as f:
+            f.write(str(next_id))
+
+    def _new_entries(self, sibling: str) -> List[SyncedEntry]:
+        queue_dir = os.path.join(self._root, sibling, "queue")
+        next_id = self._next_id(sibling)
+        entries = []
+        names = sorted(
+            (queue_entry_id(name), name)
+            for name in os.listdir(queue_dir)
+            if name.startswith("id:")
+        )
+        for idx, (id, name) in enumerate(names):
+            if id < next_id:
+                continue
+            path = os.path.join(queue_dir, name)
+            try:
+                meta = read_meta(path)
+            except FileNotFoundError:
+                if idx == len(names) - 1:
+                    # still being written, retry with the next sync
+                    break
+                # stored by an older version
+                next_id = id + 1
+                continue
+            next_id = id + 1
+            # entries the sibling imported itself came from us or from
+            # another sibling we sync with directly
+            if ",sync:" in name:
+                continue
+            entries.append(SyncedEntry(sibling, id, path, meta))
+        self._set_next_id(sibling, next_id)
+        return entries
+
+    def pull(self, coverage_seen: Set[Tuple[Any]]) -> List[SyncedEntry]:
+        """Returns the sibling queue entries worth importing.
+
+        `coverage_seen` is the coverage of this instance. It is not updated,
+        but entries are checked against the coverage of the ones returned
+        before them."""
+        coverage = set(coverage_seen)
+        entries = []
+        for sibling in self._siblings():
+            for entry in self._new_entries(sibling):
+                if not self.add_known(entry.meta.digest):
+                    continue
+                if entry.meta.coverage <= coverage:
+                    continue
+                coverage.update(entry.meta.coverage)
+                entries.append(entry)
+        if entries:
+            log.info(f"Importing {len(entries)} queue entries from siblings.")
+        return entries
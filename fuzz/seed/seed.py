@@ -3,6 +3,8 @@ import os
 
 from fuzz.utils import mkdir_p
 
+from typing import Dict, Mapping
+
 
 class Seed(object):
     def __init__(self, seed_translator_cls, id, input, output):
@@ -20,6 +22,33 @@ class Seed(object):
         output = seed_translator_cls.deserialize_raw_from_path(output_path)
         return cls(seed_translator_cls, id, input, output)
 
+    @classmethod
+    def load_seed_from_files(
+        cls, seed_translator_cls, id: int, files: Mapping[str, bytes]
+    ) -> Seed:
+        """Loads a seed from the files of its folder (relative path ->
+        content), see `to_files()`."""
+        input_files = {}
+        output_files = {}
+        for name, data in files.items():
+            subdir, filename = name.split("/", 1)
+            if subdir == "onenter":
+                input_files[filename] = data
+            elif subdir == "onleave":
+                output_files[filename] = data
+        input = seed_translator_cls.deserialize_raw_from_files(input_files)
+        output = seed_translator_cls.deserialize_raw_from_files(output_files)
+        return cls(seed_translator_cls, id, input, output)
+
+    def clone(self) -> Seed:
+        """Returns a copy of this seed whose input can be mutated.
+
+        The output is shared, running a seed replaces its output instead of
+        modifying it."""
+        return Seed(
+            self.seed_translator_cls, self._id, self.input.clone(), self.output
+        )
+
     def store_seed(self, path: str) -> None:
         input_path = os.path.join(path, "onenter")
         output_path = os.path.join(path, "onleave")
@@ -28,3 +57,12 @@ class Seed(object):
         self.input.serialize_to_path(input_path)
         self.output.serialize_to_path(output_path)
         return
+
+    def to_files(self) -> Dict[str, bytes]:
+        """Returns the files `store_seed()` writes by their relative path."""
+        files = {}
+        for name, data in self.input.serialize_to_files().items():
+            files[f"onenter/{name}"] = data
+        for name, data in self.output.serialize_to_files().items():
+            files[f"onleave/{name}"] = data
+        return files
@@ -0,0 +1,219 @@
+"""Single-file storage of a `SeedSequence`.
+
+The legacy layout of a sequence is a folder per seed with `onenter/` and
+`onleave/` subfolders holding one file per param, plus pickles for types and
+dependencies. A packed sequence holds the same files, keyed by their path
+relative to the sequence folder, in one length-prefixed file:
+
+    magic "TZSQ" | u8 version | u8 compression | body
+
+    body (compressed if `compression` != 0):
+        u32 nfiles
+        {% for file in files %}
+            u16 len(name) | name (utf-8, `/`-separated) | u32 len(data) | data
+
+Converting between both layouts is lossless:
+
+    python -m fuzz.seed.seedpack pack SEQ_DIR SEQ_FILE [-c zlib]
+    python -m fuzz.seed.seedpack unpack SEQ_FILE SEQ_DIR
+    python -m fuzz.seed.seedpack pack -r QUEUE_DIR PACKED_QUEUE_DIR
+"""
+import argparse
+import logging
+import os
+import struct
+import zlib
+
+from typing import Dict
+
+from fuzz.utils import mkdir_p
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"TZSQ"
+VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+COMPRESSIONS = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+}
+
+_HEADER = struct.Struct("<4sBB")
+_NAME_LEN = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+
+class SeedPackException(Exception):
+    pass
+
+
+def _compress(body: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_NONE:
+        return body
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(body, 1)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise SeedPackException("zstd compression needs `zstandard`.")
+        return zstandard.ZstdCompressor().compress(body)
+    raise SeedPackException(f"Unknown compression {compression}.")
+
+
+def _decompress(body: bytes, compression: int) -> bytes:
+    if compression == COMPRESSION_NONE:
+        return body
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(body)
+    if compression == COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise SeedPackException("zstd compression needs `zstandard`.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise SeedPackException(f"Unknown compression {compression}.")
+
+
+def pack(files: Dict[str, bytes], compression=COMPRESSION_NONE) -> bytes:
+    """Returns `files` (relative path -> content) in the packed format."""
+    chunks = [_U32.pack(len(files))]
+    for name, data in files.items():
+        bname = name.encode()
+        chunks.append(_NAME_LEN.pack(len(bname)))
+        chunks.append(bname)
+        chunks.append(_U32.pack(len(data)))
+        chunks.append(data)
+    body = _compress(b"".join(chunks), compression)
+    return _HEADER.pack(MAGIC, VERSION, compression) + body
+
+
+def unpack(buf: bytes) -> Dict[str, bytes]:
+    """Returns the files (relative path -> content) packed in `buf`."""
+    magic, version, compression = _HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise SeedPackException("Not a packed sequence.")
+    if version != VERSION:
+        raise SeedPackException(f"Unsupported version {version}.")
+    body = memoryview(_decompress(buf[_HEADER.size :], compression))
+
+    files = {}
+    (nfiles,) = _U32.unpack_from(body)
+    off = _U32.size
+    for _ in range(nfiles):
+        (name_len,) = _NAME_LEN.unpack_from(body, off)
+        off += _NAME_LEN.size
+        name = bytes(body[off : off + name_len]).decode()
+        off += name_len
+        (data_len,) = _U32.unpack_from(body, off)
+        off += _U32.size
+        files[name] = bytes(body[off : off + data_len])
+        off += data_len
+    if off != len(body):
+        raise SeedPackException("Trailing data after the last file.")
+    return files
+
+
+def is_packed(path: str) -> bool:
+    return os.path.isfile(path)
+
+
+def store(
+    path: str, files: Dict[str, bytes], compression=COMPRESSION_NONE
+) -> int:
+    """Atomically writes `files` to the packed sequence at `path`, returns
+    its size."""
+    tmp_path = os.path.join(
+        os.path.dirname(path), f".{os.path.basename(path)}.tmp"
+    )
+    buf = pack(files, compression)
+    with open(tmp_path, "wb") as f:
+        f.write(buf)
+    os.replace(tmp_path, path)
+    return len(buf)
+
+
+def load(path: str) -> Dict[str, bytes]:
+    with open(path, "rb") as f:
+        return unpack(f.read())
+
+
+def read_tree(path: str) -> Dict[str, bytes]:
+    """Returns the files below the folder `path` by their relative path."""
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            file_path = os.path.join(root, name)
+            rel_path = os.path.relpath(file_path, path).replace(os.sep, "/")
+            with open(file_path, "rb") as f:
+                files[rel_path] = f.read()
+    return files
+
+
+def write_tree(path: str, files: Dict[str, bytes]):
+    """Writes `files` (relative path -> content) below the folder `path`."""
+    for name, data in files.items():
+        file_path = os.path.join(path, *name.split("/"))
+        mkdir_p(os.path.dirname(file_path))
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+
+def _convert(src: str, dst: str, unpack: bool, compression: int):
+    if unpack:
+        write_tree(dst, load(src))
+    else:
+        store(dst, read_tree(src), compression)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(
+        description="Convert sequences between the folder and the packed "
+        "single-file layout."
+    )
+    parser.add_argument("mode", choices=["pack", "unpack"])
+    parser.add_argument("src", help="Sequence to convert.")
+    parser.add_argument("dst", help="Path of the converted sequence.")
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="Convert all sequences in the folder `src`, e.g., a queue.",
+    )
+    parser.add_argument(
+        "-c",
+        "--compression",
+        choices=COMPRESSIONS.keys(),
+        default="none",
+        help="Compression of packed sequences.",
+    )
+    args = parser.parse_args()
+    unpack = args.mode == "unpack"
+    compression = COMPRESSIONS[args.compression]
+
+    if not args.recursive:
+        _convert(args.src, args.dst, unpack, compression)
+        return
+
+    mkdir_p(args.dst)
+    nconverted = 0
+    for name in sorted(os.listdir(args.src)):
+        src = os.path.join(args.src, name)
+        if name.startswith(".") or is_packed(src) != unpack:
+            continue
+        _convert(src, os.path.join(args.dst, name), unpack, compression)
+        nconverted += 1
+    log.info(f"Converted {nconverted} sequences.")
+
+
+if __name__ == "__main__":
+    main()
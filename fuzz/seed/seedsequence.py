@@ -1,13 +1,16 @@
 from __future__ import annotations
+import copy
 import os
 import pickle
+import hashlib
 import logging
 
 from fuzz.utils import mkdir_p
+from fuzz.seed import seedpack
 from fuzz.seed.seed import Seed
-from fuzz.apidependency import IoctlCallSequence
+from fuzz.apidependency import IoctlCallSequence, ValueDependencies
 
-from typing import List, Optional
+from typing import Dict, List, Mapping, Optional, Sequence
 
 
 log = logging.getLogger(__name__)
@@ -20,6 +23,8 @@ class SeedSequence:
         self._idx = 0
         self._seeds: List[Seed] = seeds
         self._seed_deps = seed_deps
+        # `False` if `_seed_deps` is shared with a clone of this sequence
+        self._owns_deps = True
         self._dir = None
         if self._seed_deps:
             assert len(self._seeds) == len(
@@ -28,6 +33,13 @@ class SeedSequence:
 
     @classmethod
     def load_sequence(cls, seed_translator_cls, path: str) -> SeedSequence:
+        if seedpack.is_packed(path):
+            seed_sequence = cls.load_sequence_from_files(
+                seed_translator_cls, seedpack.load(path)
+            )
+            seed_sequence._dir = path
+            return seed_sequence
+
         # load seeds from fs and sort them
         seed_paths = [
             os.path.join(path, d) for d in os.listdir(path) if "pickle" not in d
@@ -54,6 +66,135 @@ class SeedSequence:
 
         return seed_sequence
 
+    @classmethod
+    def load_sequence_from_files(
+        cls, seed_translator_cls, files: Mapping[str, bytes]
+    ) -> SeedSequence:
+        """Loads a sequence from the files of its folder (relative path ->
+        content), see `to_files()`."""
+        seed_files: Dict[str, Dict[str, bytes]] = {}
+        for name, data in files.items():
+            if "/" not in name:
+                continue
+            seed_dir, seed_name = name.split("/", 1)
+            seed_files.setdefault(seed_dir, {})[seed_name] = data
+
+        seeds: List[Seed] = [
+            Seed.load_seed_from_files(seed_translator_cls, int(d), f)
+            for d, f in seed_files.items()
+        ]
+        seeds.sort(key=lambda o: o._id)
+
+        if "dependencies.pickle" in files:
+            seed_deps = pickle.loads(files["dependencies.pickle"])
+        else:
+            seed_deps = None
+        return cls(seeds, seed_deps)
+
+    def clone(self) -> SeedSequence:
+        """Returns a copy of this sequence for mutation.
+
+        The seeds are cloned. The value dependencies are shared until one of
+        the sequences requests them via `mutable_dependencies()`."""
+        seedseq = SeedSequence(
+            [seed.clone() for seed in self._seeds], self._seed_deps
+        )
+        seedseq._dir = self._dir
+        seedseq._owns_deps = False
+        self._owns_deps = False
+        return seedseq
+
+    def mutable_dependencies(self) -> Optional[IoctlCallSequence]:
+        """Returns the value dependencies of this sequence for modification.
+
+        Dependencies shared with another sequence are copied first."""
+        if self._seed_deps and not self._owns_deps:
+            self._seed_deps = self._seed_deps.copy()
+        self._owns_deps = True
+        return self._seed_deps
+
+    def dependencies(self) -> Optional[IoctlCallSequence]:
+        """Returns the value dependencies of this sequence, read-only."""
+        return self._seed_deps
+
+    def remove_range(self, start: int, end: int) -> None:
+        """Removes the interactions from `start` to `end` (exclusive).
+
+        The value dependencies of the remaining interactions are not updated,
+        the caller has to make sure none of them refers to a removed one."""
+        del self._seeds[start:end]
+        if self._seed_deps:
+            deps = self.mutable_dependencies()
+            for call in deps[start:end]:
+                if call.dump_id in deps.dump_ids:
+                    deps.dump_ids.remove(call.dump_id)
+            del deps[start:end]
+
+    def subsequence(self, indices: Sequence[int]) -> SeedSequence:
+        """Returns a copy holding only the interactions at `indices`.
+
+        Value dependencies are resolved by the position of their source, so
+        the kept calls are renumbered. Dependencies on dropped calls are
+        dropped, their destination keeps the recorded value."""
+        indices = sorted(indices)
+        seeds = [self._seeds[idx].clone() for idx in indices]
+        if not self._seed_deps:
+            seedseq = SeedSequence(seeds)
+            seedseq._dir = self._dir
+            return seedseq
+
+        base = self._seed_deps[0].dump_id
+        deps = IoctlCallSequence()
+        # dump id of a kept call -> its renumbered copy
+        calls = {}
+        for pos, idx in enumerate(indices):
+            call = self._seed_deps[idx].copy()
+            calls[call.dump_id] = call
+            call.dump_id = base + pos
+            deps.append(call)
+        for call in deps:
+            valdeps = []
+            for valdep in call.value_dependencies:
+                src = calls.get(valdep.src_ioctl_call.dump_id)
+                if src is None:
+                    continue
+                valdep = copy.copy(valdep)
+                valdep.src_ioctl_call = src
+                valdeps.append(valdep)
+            call.value_dependencies = ValueDependencies(valdeps)
+        seedseq = SeedSequence(seeds, deps)
+        seedseq._dir = self._dir
+        return seedseq
+
+    def to_files(self) -> Dict[str, bytes]:
+        """Returns the files `store_sequence()` writes by their relative
+        path."""
+        files = {}
+        for idx, seed in enumerate(self._seeds):
+            for name, data in seed.to_files().items():
+                files[f"{idx}/{name}"] = data
+
+        if self._seed_deps:
+            assert len(self._seeds) == len(
+                self._seed_deps
+            ), "seeds vs seed deps mismatch"
+            files["dependencies.pickle"] = pickle.dumps(self._seed_deps)
+        return files
+
+    def store_packed(
+        self,
+        path: str,
+        compression: int = seedpack.COMPRESSION_NONE,
+        extra_files: Optional[Dict[str, bytes]] = None,
+    ) -> int:
+        """Stores this sequence in the single file `path`, see
+        `fuzz.seed.seedpack`. `extra_files` are stored alongside. Returns the
+        size of the file."""
+        files = self.to_files()
+        if extra_files:
+            files.update(extra_files)
+        return seedpack.store(path, files, compression)
+
     def store_sequence(self, path: str):
         for idx, seed in enumerate(self._seeds):
             seed_dir = os.path.join(path, str(idx))
@@ -77,6 +218,21 @@ class SeedSequence:
     def __getitem__(self, key: int) -> Seed:
         return self._seeds[key]
 
+    def digest(self) -> str:
+        """Returns a hash of the inputs of this sequence."""
+        h = hashlib.sha1()
+        for seed in self._seeds:
+            data = bytes(seed.input.serialize())
+            h.update(len(data).to_bytes(4, "little"))
+            h.update(data)
+        return h.hexdigest()
+
+    def has_value_dependencies(self) -> bool:
+        """`True` if an input of this sequence depends on a previous output."""
+        if not self._seed_deps:
+            return False
+        return any(call.value_dependencies for call in self._seed_deps)
+
     def _satisfy(self) -> None:
         if not self._seed_deps:
             return
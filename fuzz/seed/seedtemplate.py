@@ -1,7 +1,8 @@
 from __future__ import annotations
+import bisect
 from dataclasses import dataclass
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import logging
 
@@ -13,6 +14,8 @@ log.setLevel(logging.DEBUG)
 
 @dataclass
 class SeedTemplateElement:
+    __slots__ = ("start", "end", "type")
+
     start: int
     end: int
     type: str
@@ -27,28 +30,55 @@ class SeedTemplateElement:
         return self.end - self.start
 
     def is_collision(self, elem: SeedTemplateElement):
-        if self.start > elem.start and self.end >= elem.end:
-            return False
-        elif self.end <= elem.start and self.end < elem.end:
+        if self.end <= elem.start or elem.end <= self.start:
             return False
-        else:
-            log.debug(f"Collision detected: {self} collides with {elem}")
-            return True
+        log.debug(f"Collision detected: {self} collides with {elem}")
+        return True
+
+    def __getstate__(self):
+        return (self.start, self.end, self.type)
+
+    def __setstate__(self, state):
+        if isinstance(state, dict):
+            # pickled before we used `__slots__`
+            state = (state["start"], state["end"], state["type"])
+        self.start, self.end, self.type = state
 
 
 class SeedTemplate:
+    """Layout of typed fields in a buffer of `total_size` bytes.
+
+    Elements do not overlap and are kept sorted by their start offset, so
+    inserting an element only needs to check its neighbours for collisions.
+    """
+
     def __init__(
         self,
         total_size: int,
         init_list: Optional(List[SeedTemplateElement]) = None,
     ):
-        self._elements = dict()
+        self._starts: List[int] = []
+        self._elements: List[SeedTemplateElement] = []
         self._size = total_size
+        self._chunks = None
 
         if init_list:
             for elem in init_list:
                 self.add_elem(elem)
 
+    def __getstate__(self):
+        return {"_size": self._size, "_elements": self._elements}
+
+    def __setstate__(self, state):
+        self._size = state["_size"]
+        elements = state["_elements"]
+        if isinstance(elements, dict):
+            # pickled before we kept the elements sorted, keyed by start
+            elements = [elements[k] for k in sorted(elements.keys())]
+        self._elements = elements
+        self._starts = [elem.start for elem in elements]
+        self._chunks = None
+
     @property
     def size(self):
         return self._size
@@ -63,18 +93,46 @@ class SeedTemplate:
 
             ipdb.set_trace()
 
-        # go through all the types and check if we have a collision
-        for elem in self._elements.values():
+        # only the neighbours of the insertion point can collide
+        idx = bisect.bisect_left(self._starts, new_elem.start)
+        for elem in self._elements[max(idx - 1, 0) : idx + 1]:
             if elem.is_collision(new_elem):
                 raise ValueError("Already existing range with different type!")
-        self._elements[new_elem.start] = new_elem
+        self._starts.insert(idx, new_elem.start)
+        self._elements.insert(idx, new_elem)
+        self._chunks = None
 
     def listify(self):
         # return list of values sorted by key
-        return [self._elements[k] for k in sorted(self._elements.keys())]
+        return list(self._elements)
+
+    def _build_chunks(self):
+        typed = []
+        untyped = []
+        off = 0
+        for elem in self._elements:
+            if off < elem.start:
+                untyped.append((off, elem.start))
+            typed.append((elem.start, elem.end - elem.start, elem.type))
+            off = elem.end
+        self._chunks = (typed, untyped)
+
+    @property
+    def typed_chunks(self) -> List[Tuple[int, int, str]]:
+        """`(start, size, type)` of all elements, sorted by `start`."""
+        if self._chunks is None:
+            self._build_chunks()
+        return self._chunks[0]
+
+    @property
+    def untyped_chunks(self) -> List[Tuple[int, int]]:
+        """`(start, end)` of the untyped gaps preceding the elements."""
+        if self._chunks is None:
+            self._build_chunks()
+        return self._chunks[1]
 
     def __str__(self):
         out = ""
-        for elem in self._elements.values():
+        for elem in self._elements:
             out += f"{elem}\n"
         return out
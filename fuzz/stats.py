@@ -1,3 +1,10 @@
+import json
+import os
+import time
+
+from typing import Any, Dict
+
+
 STATS = {
     "#interactions": 0,
     "#sequences": 0,
@@ -5,6 +12,8 @@ STATS = {
     "#errors": 0,
     "#resets": 0,
     "#timeouts": 0,
+    # timeouts hit with a deadline below `Runner.RECV_TIMEOUT`
+    "#adaptivetimeouts": 0,
     "#crashtimeouts": 0,
     "#crashes": 0,
     "#factoryresets": 0,
@@ -13,5 +22,94 @@ STATS = {
     "#ta_successes": 0,
     "#ta_fails": 0,
     "#valuedepsuccess": 0,
-    "#valuedepfail": 0
+    "#valuedepfail": 0,
+    "#synced": 0,
+    "#trimmed": 0,
 }
+
+
+class StatsWriter(object):
+    """Persists `STATS` of the fuzzer writing to `out_dir`.
+
+    `stats.json` holds the latest counters and is replaced atomically on
+    every `flush()`. `plot_data` is a CSV time series of the counters like
+    AFL's `plot_data`, a row is appended on every `flush()`. Flushing is
+    cheap, but fast targets run many sequences per second, so callers flush
+    when `due()` says so, i.e., every `interval` seconds.
+    """
+
+    STATS_NAME = "stats.json"
+    PLOT_NAME = "plot_data"
+    PLOT_FIELDS = (
+        "elapsed_time",
+        "#sequences",
+        "#interactions",
+        "#crashes",
+        "#newcov",
+        "#timeouts",
+        "#resets",
+        "#synced",
+        "#covtuples",
+        "execs_per_sec",
+    )
+
+    def __init__(self, out_dir: str, interval: float = 5.0):
+        self._stats_path = os.path.join(out_dir, self.STATS_NAME)
+        self._plot_path = os.path.join(out_dir, self.PLOT_NAME)
+        self._interval = interval
+        self._last_due = time.monotonic()
+        self._plot_f = None
+
+    def load(self) -> Dict[str, Any]:
+        """Restores the counters of a previous run into `STATS`, returns
+        everything `stats.json` holds, an empty dict if there is none."""
+        if not os.path.isfile(self._stats_path):
+            return {}
+        with open(self._stats_path, "r") as f:
+            stats = json.load(f)
+        for key in STATS:
+            if key in stats:
+                STATS[key] = stats[key]
+        return stats
+
+    def due(self) -> bool:
+        """`True` once every `interval` seconds."""
+        now = time.monotonic()
+        if now - self._last_due < self._interval:
+            return False
+        self._last_due = now
+        return True
+
+    def flush(self, elapsed_time: float, extra: Dict[str, Any] = None):
+        """Writes the current counters, `extra` holds further stats of the
+        caller, e.g., `#covtuples`."""
+        stats = dict(STATS)
+        stats.update(extra or {})
+        stats["elapsed_time"] = elapsed_time
+        stats["execs_per_sec"] = (
+            STATS["#interactions"] / elapsed_time if elapsed_time else 0.0
+        )
+
+        tmp_path = os.path.join(
+            os.path.dirname(self._stats_path), f".{self.STATS_NAME}.tmp"
+        )
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps(stats))
+        os.replace(tmp_path, self._stats_path)
+
+        if self._plot_f is None:
+            new = not os.path.isfile(self._plot_path)
+            self._plot_f = open(self._plot_path, "a")
+            if new:
+                self._plot_f.write(f"# {','.join(self.PLOT_FIELDS)}\n")
+        row = []
+        for field in self.PLOT_FIELDS:
+            value = stats.get(field, "")
+            row.append(f"{value:.2f}" if isinstance(value, float) else value)
+        self._plot_f.write(",".join(map(str, row)) + "\n")
+        self._plot_f.flush()
+
+    def close(self):
+        if self._plot_f is not None:
+            self._plot_f.close()
+            self._plot_f = None
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Benchmark for the `TemplateMutator` mutation engine.
+
+Compares mutations/sec of the in-place engine (`mutate`, `mutate_batch`) with
+the previous slice-and-concatenate engine on synthetic keymaster blobs, i.e.,
+sequences of `keymaster_key_param_t`-like entries typed with the keymaster
+enums of the given proto module.
+
+    python -m fuzz.tests.bench_templatemutator -s 4096 16384 65536
+"""
+import re
+import time
+import random
+import struct
+import argparse
+import logging
+
+from fuzz.mutation.templatemutator import TemplateMutator
+from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
+
+logging.basicConfig()
+log = logging.getLogger(__name__)
+log.setLevel(logging.INFO)
+
+TAG_TYPE = "android::hardware::keymaster::V3_0::Tag"
+ALGORITHM_TYPE = "android::hardware::keymaster::V3_0::Algorithm"
+
+
+class LegacyTemplateMutator(TemplateMutator):
+    """`TemplateMutator` rebuilding the buffer for every field mutation."""
+
+    def mutate(self, data, type=None):
+        if not type:
+            return self._flip_random_bit(data)
+        return self._mutate_complex(data, type)
+
+    def _mutate_complex(self, data, types):
+        types = {e.start: (e.size, e.type) for e in types.listify()}
+        type_keys = list(types.keys())
+
+        untyped_chunks = []
+        off = 0
+        for k, v in types.items():
+            if off < k:
+                untyped_chunks.append((off, k))
+            off = k + v[0]
+
+        ntypes = min(len(type_keys), 1 << random.randint(0, 5))
+        nnotypes = min(len(untyped_chunks), 1 << random.randint(0, 5))
+
+        for _ in range(0, ntypes):
+            type_idx = random.choice(type_keys)
+            sz = types[type_idx][0]
+            type_ = types[type_idx][1]
+            updated = self._mutate_field(data[type_idx : type_idx + sz], type_)
+            data = data[:type_idx] + updated + data[type_idx + sz :]
+
+        for _ in range(0, nnotypes):
+            start, end = random.choice(untyped_chunks)
+            data = (
+                data[:start]
+                + self._flip_random_bit(data[start:end])
+                + data[end:]
+            )
+        return data
+
+    @staticmethod
+    def _flip_random_bit(data):
+        target_byte = random.randint(0, len(data) - 1)
+        data_low = data[:target_byte]
+        b = data[target_byte] ^ (0x1 << random.randint(0, 7))
+        b = struct.pack("<B", b)
+        data_high = data[target_byte + 1 :]
+        return data_low + b + data_high
+
+    def _mutate_field(self, data, type_):
+        size = len(data)
+        mangled_type = self._mangle_type_name(type_)
+        type_name = self._normalize_type(type_)
+
+        if mangled_type in self._proto.DESCRIPTOR.enum_types_by_name:
+            enum_desc = self._proto.DESCRIPTOR.enum_types_by_name[mangled_type]
+            val = random.choice([v for v in enum_desc.values])
+            data = struct.pack(self.FMT[size], val.number & self.MASK[size])
+        elif type_name in self.NUMERIC_TYPES:
+            mask = self.MASK[size]
+            magic_vals = [0, mask >> 1, (mask >> 1) + 1, mask]
+            magic_vals.append(random.randint(0x1, mask - 1))
+            data = struct.pack(self.FMT[size], random.choice(magic_vals))
+        elif type_name in self.BYTE_TYPES or re.match(r".*\[\d+\]", type_name):
+            data = self._flip_random_bit(data)
+        else:
+            data = self._flip_random_bit(data)
+        return data
+
+
+def keymaster_blob(size):
+    """Returns a blob of `size` bytes and its `SeedTemplate`.
+
+    The blob consists of key params (tag, algorithm, length, data) with
+    untyped padding in between."""
+    elems = []
+    off = 0
+    while True:
+        blob_sz = random.choice([4, 8, 16, 32, 64])
+        entry = [
+            (4, TAG_TYPE),
+            (4, ALGORITHM_TYPE),
+            (4, "uint32_t"),
+            (8, "uint64_t"),
+            (blob_sz, f"uint8_t[{blob_sz}]"),
+        ]
+        if off + sum(sz for sz, _ in entry) + 4 > size:
+            break
+        for sz, type_ in entry:
+            elems.append(SeedTemplateElement(off, off + sz, type_))
+            off += sz
+        # padding
+        off += 4
+    return bytes(random.getrandbits(8) for _ in range(size)), SeedTemplate(
+        size, elems
+    )
+
+
+def bench(func, iters):
+    tstart = time.perf_counter()
+    nmutants = 0
+    for _ in range(iters):
+        nmutants += func()
+    return nmutants / (time.perf_counter() - tstart)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--proto", default="fuzz.proto.KeymasterDevice_pb2")
+    parser.add_argument("-n", "--iters", type=int, default=500)
+    parser.add_argument("-k", type=int, default=32, help="Batch size.")
+    parser.add_argument(
+        "-s",
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[4 * 1024, 16 * 1024, 64 * 1024],
+        help="Blob sizes in bytes.",
+    )
+    args = parser.parse_args()
+
+    # enum mutations are logged on info level
+    logging.getLogger("fuzz.mutation.templatemutator").setLevel(logging.WARN)
+
+    legacy = LegacyTemplateMutator(args.proto)
+    mutator = TemplateMutator(args.proto)
+
+    print(
+        f"{'size':>8} {'legacy [mut/s]':>15} {'in-place [mut/s]':>17} "
+        f"{'batch [mut/s]':>14} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        random.seed(size)
+        data, types = keymaster_blob(size)
+        r_legacy = bench(lambda: len([legacy.mutate(data, types)]), args.iters)
+        r_inplace = bench(
+            lambda: len([mutator.mutate(data, types)]), args.iters
+        )
+        r_batch = bench(
+            lambda: len(mutator.mutate_batch(data, types, args.k)),
+            max(1, args.iters // args.k),
+        )
+        print(
+            f"{size:>8} {r_legacy:>15.1f} {r_inplace:>17.1f} "
+            f"{r_batch:>14.1f} {r_inplace / r_legacy:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
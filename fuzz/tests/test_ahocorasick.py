@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from fuzz.fmt_recovery.ahocorasick import AhoCorasick
+
+
+def find_all(buf, pattern):
+    off = buf.find(pattern)
+    while off != -1:
+        yield off
+        off = buf.find(pattern, off + 1)
+
+
+class AhoCorasickTest(unittest.TestCase):
+    def test_like_find(self):
+        rnd = random.Random(0)
+        for _ in range(200):
+            alphabet = rnd.sample(range(256), rnd.choice([2, 3, 16]))
+            size = rnd.randrange(300)
+            buf = bytes(rnd.choice(alphabet) for _ in range(size))
+            patterns = set()
+            for _ in range(rnd.randrange(1, 20)):
+                off = rnd.randrange(len(buf) + 1)
+                pattern = buf[off : off + rnd.randrange(1, 8)]
+                patterns.add(pattern or bytes([alphabet[0]]))
+
+            matcher = AhoCorasick()
+            ids = {matcher.add(pattern): pattern for pattern in patterns}
+            expected = sorted(
+                (off, pattern_id)
+                for pattern_id, pattern in ids.items()
+                for off in find_all(buf, pattern)
+            )
+            self.assertEqual(sorted(matcher.finditer(buf)), expected)
+
+    def test_add_after_scan(self):
+        matcher = AhoCorasick()
+        he = matcher.add(b"he")
+        self.assertEqual(list(matcher.finditer(b"ushers")), [(2, he)])
+        she = matcher.add(b"she")
+        hers = matcher.add(b"hers")
+        self.assertEqual(
+            list(matcher.finditer(b"ushers")), [(1, she), (2, he), (2, hers)]
+        )
+        with self.assertRaises(ValueError):
+            matcher.add(b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
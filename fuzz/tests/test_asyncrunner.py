@@ -0,0 +1,171 @@
+import asyncio
+import unittest
+
+from fuzz.const import TEEZZ_CMD
+from fuzz.optee.opteedata import TeeIoctlInvokeArg
+from fuzz.runner.asyncrunner import (
+    AsyncRunner,
+    AsyncSequenceRunner,
+    run_on_executors,
+)
+from fuzz.runner.latency import LatencyTracker
+from fuzz.runner.runner import RunnerStatus
+from fuzz.runner.sessionmeta import OPTEESessionMetaData
+from fuzz.tests.test_trimmer import make_plain_seedseq
+from fuzz.utils import p32, u32
+
+# invoke args of this command make the executor hang
+HANG_FUNC = 7
+
+
+class AsyncExecutor(object):
+    """Serves the forkserver status port and the data port of an executor.
+
+    Replies to an invoke arg with the invoke arg itself, i.e., a successful
+    invocation of a command with input params only."""
+
+    def __init__(self):
+        self.sessions = []
+
+    async def start(self):
+        self._status_server = await asyncio.start_server(
+            self._serve_status, "127.0.0.1", 0
+        )
+        self.port = self._status_server.sockets[0].getsockname()[1]
+        self._data_server = await asyncio.start_server(
+            self._serve, "127.0.0.1", 0
+        )
+        self.data_port = self._data_server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        for server in (self._status_server, self._data_server):
+            server.close()
+            await server.wait_closed()
+
+    async def _serve_status(self, reader, writer):
+        writer.write(p32(1))
+        await writer.drain()
+
+    async def _reply(self, writer, inp):
+        if u32(inp[:4]) == HANG_FUNC:
+            await asyncio.sleep(60)
+        out = p32(TeeIoctlInvokeArg.SIZE) + inp[: TeeIoctlInvokeArg.SIZE]
+        # input params have no output
+        out += p32(0) * TeeIoctlInvokeArg._TEEC_CONFIG_PAYLOAD_REF_COUNT
+        writer.write(p32(RunnerStatus.EXECUTOR_SUCCESS) + p32(len(out)) + out)
+
+    async def _serve(self, reader, writer):
+        cmds = []
+        self.sessions.append(cmds)
+        try:
+            while True:
+                cmd = await reader.readexactly(1)
+                sz = u32(await reader.readexactly(4))
+                data = await reader.readexactly(sz)
+                cmds.append(cmd)
+                if cmd == TEEZZ_CMD.TEEZZ_CMD_SEND:
+                    await self._reply(writer, data)
+                elif cmd == TEEZZ_CMD.TEEZZ_CMD_SEND_BATCH:
+                    pos = 0
+                    while pos < len(data):
+                        sz = u32(data[pos : pos + 4])
+                        await self._reply(writer, data[pos + 4 : pos + 4 + sz])
+                        pos += 4 + sz
+                elif cmd == TEEZZ_CMD.TEEZZ_CMD_END:
+                    break
+                await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.CancelledError,
+            ConnectionResetError,
+        ):
+            # the client hung up or the server was stopped
+            pass
+        writer.close()
+
+
+def funcs(seedseq):
+    return [seed.output.func for seed in seedseq]
+
+
+class AsyncRunnerTest(unittest.TestCase):
+    def test_run_on_executors(self):
+        async def main():
+            executors = [AsyncExecutor() for _ in range(2)]
+            pairs = []
+            for i, executor in enumerate(executors):
+                await executor.start()
+                seqrunner = AsyncSequenceRunner("127.0.0.1", executor.port)
+                await seqrunner.open()
+                runner = AsyncRunner(
+                    "127.0.0.1",
+                    executor.data_port,
+                    OPTEESessionMetaData("00" * 16),
+                    batch=bool(i),
+                    latency=LatencyTracker(),
+                )
+                pairs.append((seqrunner, runner))
+            self.assertEqual(await pairs[0][0].forkserver_status(), 1)
+            await pairs[0][0].close()
+
+            seedseqs = [make_plain_seedseq([i, i + 1]) for i in range(6)]
+            results = await run_on_executors(pairs, seedseqs)
+            for executor in executors:
+                await executor.stop()
+            # both runners tracked the latencies of the commands they ran
+            tracked = [len(runner.latency) for _, runner in pairs]
+            return executors, seedseqs, results, tracked
+
+        executors, seedseqs, results, tracked = asyncio.run(main())
+        self.assertTrue(all(tracked))
+        for i, (seedseq, result) in enumerate(zip(seedseqs, results)):
+            self.assertEqual(result.status, RunnerStatus.EXECUTOR_SUCCESS)
+            self.assertEqual(funcs(seedseq), [i, i + 1])
+            self.assertEqual(len(result.coverage), 2)
+            self.assertFalse(result.crashed)
+        # both executors took part
+        self.assertTrue(all(executor.sessions for executor in executors))
+
+    def test_timeouts(self):
+        async def main():
+            executor = AsyncExecutor()
+            await executor.start()
+            seqrunner = AsyncSequenceRunner("127.0.0.1", executor.port)
+            runner = AsyncRunner(
+                "127.0.0.1",
+                executor.data_port,
+                OPTEESessionMetaData("00" * 16),
+                persistent=8,
+            )
+            runner.RECV_TIMEOUT = 0.1
+            statuses = []
+            for cmds in ([1, HANG_FUNC], [2, 3]):
+                seedseq = make_plain_seedseq(cmds)
+                statuses.append(await seqrunner.run(runner, seedseq))
+            # a deadline for the whole sequence
+            runner.RECV_TIMEOUT = 10.0
+            statuses.append(
+                await seqrunner.run(
+                    runner, make_plain_seedseq([HANG_FUNC]), timeout=0.1
+                )
+            )
+            await executor.stop()
+            return executor, statuses, runner._connected
+
+        executor, statuses, connected = asyncio.run(main())
+        self.assertEqual(
+            statuses,
+            [
+                RunnerStatus.EXECUTOR_TIMEOUT,
+                RunnerStatus.EXECUTOR_SUCCESS,
+                RunnerStatus.EXECUTOR_TIMEOUT,
+            ],
+        )
+        # the session is recycled after the first timeout, the third sequence
+        # continues in the session of the second
+        self.assertEqual(len(executor.sessions), 2)
+        self.assertFalse(connected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.batchtriage import (
+    TARGET_DIED,
+    UNREPRODUCIBLE,
+    bucket_results,
+    find_crashes,
+)
+from fuzz.triaging.signature import log_signature
+
+
+TC_LOG = """
+[TA] =========== The PC which result in abort is task_keymaster(get_key_param+0x00000048)=======
+[TA] ====backtraces:
+[TA]         #[0] task_keymaster(km_import_key+0x{off:08x})
+[TA]         #[1] task_keymaster(TA_InvokeCommandEntryPoint+0x00000180)
+[TA]         #[2] Wrong Address
+[TA] ==============Task Crash======================================
+"""
+
+OPTEE_LOG = """
+E/TC:? 0 User mode data-abort at address 0x0 (read permission fault)
+E/TC:? 0 Status of TA 8efd4a25-b4a1-4a1b-80f3-1f53e6f3ee63
+E/TC:? 0 Call stack:
+E/TC:? 0  0x{base:08x}
+E/TC:? 0  0x{base2:08x}
+"""
+
+
+class SignatureTest(unittest.TestCase):
+    def test_tc(self):
+        sig = log_signature(TC_LOG.format(off=0x34))
+        self.assertEqual(
+            sig.frames,
+            (
+                "task_keymaster!km_import_key",
+                "task_keymaster!TA_InvokeCommandEntryPoint",
+            ),
+        )
+        # the same bug in another build
+        self.assertEqual(sig, log_signature(TC_LOG.format(off=0x38)))
+        self.assertIsNone(log_signature("nothing to see"))
+
+    def test_most_common(self):
+        other = TC_LOG.replace("km_import_key", "km_export_key")
+        sig = log_signature(
+            TC_LOG.format(off=0x34) + other.format(off=0) * 2
+        )
+        self.assertEqual(sig.frames[0], "task_keymaster!km_export_key")
+
+    def test_optee_aslr(self):
+        sig = log_signature(
+            OPTEE_LOG.format(base=0x40003F2C, base2=0x40001000)
+        )
+        other = log_signature(
+            OPTEE_LOG.format(base=0x41237F2C, base2=0x41235000)
+        )
+        self.assertEqual(sig, other)
+        self.assertEqual(
+            sig.frames[0], "8efd4a25-b4a1-4a1b-80f3-1f53e6f3ee63!0xf2c"
+        )
+
+
+class BatchTriageTest(unittest.TestCase):
+    def test_find_crashes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for inst in ("a", "b"):
+                crashes = os.path.join(tmp, "tc", inst, "crashes")
+                os.makedirs(os.path.join(crashes, "id:00000000,time:1", "0"))
+                open(os.path.join(crashes, "id:00000001,time:2"), "w").close()
+            os.makedirs(os.path.join(tmp, "tc", "a", "queue", "id:00000000"))
+            crashes = find_crashes([tmp])
+            self.assertEqual(len(crashes), 4)
+            self.assertEqual(find_crashes(crashes[:1]), crashes[:1])
+
+    def test_bucket_results(self):
+        def result(crash, reproduced, signature):
+            return {
+                "crash": crash,
+                "runs": 4,
+                "reproduced": reproduced,
+                "signature": signature,
+                "frames": [signature] if signature else [],
+            }
+
+        buckets = bucket_results(
+            [
+                result("c0", 0, None),
+                result("c1", 1, "aaa"),
+                result("c2", 4, "bbb"),
+                result("c3", 2, "bbb"),
+                result("c4", 1, None),
+            ]
+        )
+        self.assertEqual(
+            list(buckets), ["bbb", "aaa", TARGET_DIED, UNREPRODUCIBLE]
+        )
+        self.assertEqual(
+            [c["reproducibility"] for c in buckets["bbb"]["crashes"]],
+            [1.0, 0.5],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from fuzz.campaign import Campaign, CampaignInstance, assign_ports
+
+# accepts and drops connections on the port given as first argument
+EXECUTOR = (
+    "import socket, sys\n"
+    "s = socket.socket()\n"
+    "s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)\n"
+    "s.bind(('127.0.0.1', int(sys.argv[1])))\n"
+    "s.listen(8)\n"
+    "while True:\n"
+    "    s.accept()[0].close()\n"
+)
+
+# connects to the executor and dies on its first run
+INSTANCE = (
+    "import os, socket, sys\n"
+    "socket.create_connection(('127.0.0.1', int(sys.argv[1]))).close()\n"
+    "if not os.path.exists(sys.argv[2]):\n"
+    "    open(sys.argv[2], 'w').close()\n"
+    "    sys.exit(1)\n"
+)
+
+
+class CampaignTest(unittest.TestCase):
+    def test_assign_ports(self):
+        ports = assign_ports(20000, 3)
+        self.assertEqual(len(ports), 3)
+        for a, b in zip(ports, ports[1:]):
+            self.assertGreaterEqual(b - a, 2)
+
+    def test_restart_dead_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            instances = []
+            for i, port in enumerate(assign_ports(20100, 3)):
+                marker = os.path.join(tmp, f"died-{i}")
+                cmd = [sys.executable, "-c", INSTANCE, str(port), marker]
+                executor = [sys.executable, "-c", EXECUTOR, str(port)]
+                instances.append(
+                    CampaignInstance(f"tcp-{port}", port, cmd, tmp, executor)
+                )
+            campaign = Campaign(
+                instances, restart_delay=0.1, poll_interval=0.05
+            )
+            self.assertTrue(campaign.run())
+            self.assertEqual([i.restarts for i in instances], [1, 1, 1])
+
+    def test_give_up(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cmd = [sys.executable, "-c", "raise SystemExit(3)"]
+            instance = CampaignInstance("tcp", 0, cmd, tmp)
+            campaign = Campaign(
+                [instance], max_restarts=2, restart_delay=0, poll_interval=0.05
+            )
+            self.assertFalse(campaign.run())
+            self.assertEqual(instance.restarts, 2)
+            self.assertEqual(instance.returncode, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from fuzz.apidependency import IoctlCall, IoctlCallSequence, ValueDependency
+from fuzz.optee.opteedata import TeeIoctlInvokeArg, TeeIoctlParam
+from fuzz.seed.seed import Seed
+from fuzz.seed.seedsequence import SeedSequence
+from fuzz.utils import p32, p64
+
+
+def make_invoke_arg(func):
+    buf = p32(func) + p32(1) + p32(0) * 3 + p32(4)
+    buf += p64(TeeIoctlParam.TEE_IOCTL_PARAM_ATTR_TYPE_MEMREF_INPUT)
+    buf += p64(0) + p64(4) + p64(0)
+    buf += p64(TeeIoctlParam.TEE_IOCTL_PARAM_ATTR_TYPE_VALUE_INPUT)
+    buf += p64(1) + p64(2) + p64(0)
+    buf += p64(TeeIoctlParam.TEE_IOCTL_PARAM_ATTR_TYPE_NONE) * 8
+    invoke_arg = TeeIoctlInvokeArg._deserialize_raw(buf)
+    for param in invoke_arg.c_struct.params:
+        invoke_arg.params.append(TeeIoctlParam.deserialize_raw(bytes(param)))
+    invoke_arg.params[0].data = b"AAAA"
+    return invoke_arg
+
+
+def make_seedseq():
+    seeds = []
+    deps = IoctlCallSequence()
+    for i in range(2):
+        seeds.append(
+            Seed(TeeIoctlInvokeArg, i, make_invoke_arg(i), make_invoke_arg(i))
+        )
+        deps.append(IoctlCall(dump_group_id=0, dump_id=i))
+    deps[1].value_dependencies.append(
+        ValueDependency(deps[0], "param_0_data", 0, 4, "param_0_data", 0, 4)
+    )
+    return SeedSequence(seeds, deps)
+
+
+class CloneTest(unittest.TestCase):
+    def test_invoke_arg_clone(self):
+        orig = make_invoke_arg(7)
+        clone = orig.clone()
+        clone.c_struct.func = 8
+        clone.params[1].c_struct.a = 0x41
+        clone.params[0].data = b"BBBB"
+
+        self.assertEqual(orig.func, 7)
+        self.assertEqual(orig.params[1].a, 1)
+        self.assertEqual(orig.params[0].data, b"AAAA")
+        self.assertEqual(orig.serialize(), make_invoke_arg(7).serialize())
+
+    def test_seedseq_clone(self):
+        orig = make_seedseq()
+        clone = orig.clone()
+
+        self.assertIsNot(clone[0], orig[0])
+        self.assertIsNot(clone[0].input, orig[0].input)
+        # outputs and dependencies are shared until modified
+        self.assertIs(clone[0].output, orig[0].output)
+        self.assertIs(clone._seed_deps, orig._seed_deps)
+
+        deps = clone.mutable_dependencies()
+        del deps[1].value_dependencies[0]
+        self.assertFalse(clone.has_value_dependencies())
+        self.assertTrue(orig.has_value_dependencies())
+        self.assertEqual(orig._seed_deps.dump_ids, deps.dump_ids)
+
+    def test_original_copies_on_write(self):
+        orig = make_seedseq()
+        clone = orig.clone()
+        del orig.mutable_dependencies()[1].value_dependencies[0]
+        self.assertTrue(clone.has_value_dependencies())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import random
+import tempfile
+import unittest
+
+from fuzz.optee.opteedata import TeeIoctlInvokeArg
+from fuzz.seed.corpus import Corpus, CorpusIndex
+from fuzz.seed.corpussync import META_NAME, dump_meta
+from fuzz.tests.test_clone import make_seedseq
+
+
+class CorpusTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.out_dir = self._tmp.name
+        self.queue_dir = os.path.join(self.out_dir, "queue")
+        os.makedirs(self.queue_dir)
+        self.seedseq = make_seedseq()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def corpus(self, **kwargs):
+        return Corpus(
+            self.out_dir, self.queue_dir, TeeIoctlInvokeArg, **kwargs
+        )
+
+    def store(self, id, coverage):
+        name = f"id:{id:08d},time:00000000"
+        meta = {META_NAME: dump_meta(coverage, f"digest{id}")}
+        path = os.path.join(self.queue_dir, name)
+        size = self.seedseq.store_packed(path, extra_files=meta)
+        return name, size
+
+    def test_resume(self):
+        corpus = self.corpus()
+        for i in range(3):
+            name, size = self.store(i, {(i,)})
+            corpus.append(self.seedseq, name, size, {(i,)}, f"digest{i}")
+        corpus.set_energy(1, 4.5)
+        corpus.close()
+
+        corpus = self.corpus(cache_size=1)
+        self.assertEqual(len(corpus), 3)
+        self.assertEqual(corpus.sync_with_queue(), 0)
+        self.assertEqual(corpus.info(2).coverage, frozenset({(2,)}))
+        self.assertEqual(corpus.energy(1), 4.5)
+        # members are loaded when picked
+        self.assertEqual(len(corpus._cache), 0)
+        seedseq = random.choice(corpus)
+        self.assertEqual(seedseq.digest(), self.seedseq.digest())
+        self.assertIs(corpus[-1], corpus[2])
+        corpus[0]
+        self.assertEqual(list(corpus._cache), [0])
+
+    def test_sync_with_queue(self):
+        self.store(0, {(0,)})
+        self.store(1, {(1,)})
+        corpus = self.corpus()
+        self.assertEqual(corpus.sync_with_queue(), 2)
+        self.assertEqual(corpus.info(1).digest, "digest1")
+        corpus.close()
+
+        # a record cut short by a crash is dropped
+        with open(os.path.join(self.out_dir, Corpus.INDEX_NAME), "ab") as f:
+            f.write(b"\x00" * (CorpusIndex.RECORD.size // 2))
+        corpus = self.corpus()
+        self.assertEqual(len(corpus), 2)
+        name, size = self.store(2, {(2,)})
+        corpus.append(self.seedseq, name, size, {(2,)})
+        self.assertEqual(corpus.info(2).name, name)
+        self.assertEqual(corpus.info(0).name, "id:00000000,time:00000000")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.seed.corpussync import CorpusSync, write_meta
+
+
+class CorpusSyncTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        for instance in ("a", "b", "c"):
+            os.makedirs(os.path.join(self.root, instance, "queue"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def add_entry(self, instance, id, coverage, digest, suffix=""):
+        path = os.path.join(
+            self.root, instance, "queue", f"id:{id:08d},time:00000000{suffix}"
+        )
+        os.makedirs(path)
+        if coverage is not None:
+            write_meta(path, coverage, digest)
+        return path
+
+    def pulled(self, sync, coverage_seen=()):
+        return [(e.sibling, e.id) for e in sync.pull(set(coverage_seen))]
+
+    def test_pull(self):
+        self.add_entry("b", 0, {(1,)}, "x")
+        self.add_entry("b", 1, {(2,)}, "y")
+        # same inputs as `b`'s first entry
+        self.add_entry("c", 0, {(3,)}, "x")
+        # nothing new
+        self.add_entry("c", 1, {(2,)}, "z")
+        # imported by `c` from somewhere else
+        self.add_entry("c", 2, {(4,)}, "w", ",sync:b,src:00000007")
+
+        sync = CorpusSync(os.path.join(self.root, "a"))
+        self.assertEqual(self.pulled(sync, {(1,)}), [("b", 1)])
+        # entries are only looked at once
+        self.assertEqual(self.pulled(sync), [])
+        self.assertEqual(self.pulled(CorpusSync(sync._out_dir)), [])
+
+    def test_incomplete_entry(self):
+        self.add_entry("b", 0, None, None)
+        self.add_entry("b", 1, None, None)
+        sync = CorpusSync(os.path.join(self.root, "a"))
+        self.assertEqual(self.pulled(sync), [])
+
+        # the last entry was still being written, the one before is legacy
+        write_meta(
+            os.path.join(self.root, "b", "queue", "id:00000001,time:00000000"),
+            {(1,)},
+            "x",
+        )
+        self.assertEqual(self.pulled(sync), [("b", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
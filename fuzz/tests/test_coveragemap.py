@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.runner.coveragemap import CoverageMap, bucket
+
+
+class CoverageMapTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "coverage")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_bucket(self):
+        buckets = [bucket(c) for c in (1, 2, 3, 4, 7, 8, 16, 32, 128, 1000)]
+        self.assertEqual(
+            buckets, [1, 2, 4, 8, 8, 16, 32, 64, 128, 128]
+        )
+
+    def test_novelty(self):
+        cmap = CoverageMap()
+        a, b = (1, 0, 0), (1, 0xFFFF0006, 3)
+        self.assertEqual(cmap.update({a}), CoverageMap.NEW_TUPLES)
+        self.assertEqual(cmap.update({a}), CoverageMap.NOTHING_NEW)
+        self.assertEqual(cmap.has_new({a: 2}), CoverageMap.NEW_BUCKETS)
+        self.assertEqual(cmap.has_new([a, b]), CoverageMap.NEW_TUPLES)
+        self.assertEqual(cmap.update({a: 2}), CoverageMap.NEW_BUCKETS)
+        self.assertEqual(cmap.update({a: 2, b: 1}), CoverageMap.NEW_TUPLES)
+        self.assertEqual(cmap.hits(a), 4)
+        self.assertEqual(cmap.rarest([a, b]), 1)
+        self.assertEqual(cmap.new_tuples([a, (2,)]), [(2,)])
+        self.assertEqual(set(cmap), {a, b})
+
+    def test_persistence(self):
+        cmap = CoverageMap(self.path)
+        cmap.update({(1,): 1, "tc:0000": 5})
+        cmap.update({(1,): 1})
+        cmap.close()
+        # the hit counts of tuples seen after the last save are lost
+        cmap = CoverageMap(self.path)
+        cmap.update({(2,): 1})
+        cmap._map_f.close()
+
+        # a record cut short by a crash
+        with open(f"{self.path}.map", "ab") as f:
+            f.write(b"\x10\x00")
+        cmap = CoverageMap(self.path)
+        self.assertEqual(list(cmap), [(1,), "tc:0000", (2,)])
+        self.assertEqual(cmap.hits((1,)), 2)
+        self.assertEqual(cmap.hits("tc:0000"), 1)
+        self.assertEqual(cmap.hits((2,)), 0)
+        self.assertEqual(cmap.has_new({"tc:0000": 4}), CoverageMap.NOTHING_NEW)
+        cmap.update({(3,): 1})
+        cmap.close()
+        self.assertEqual(len(CoverageMap(self.path)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
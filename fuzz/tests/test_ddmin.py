@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.triaging.ddmin import DDMinException, DeltaDebugger, ResultCache
+from fuzz.tests.test_clone import make_seedseq
+
+
+class DDMinTest(unittest.TestCase):
+    def test_ddmin(self):
+        # fails if items 3 and 11 are present
+        dd = DeltaDebugger(lambda c: {3, 11} <= set(c))
+        self.assertEqual(dd.ddmin(range(16)), [3, 11])
+        with self.assertRaises(DDMinException):
+            DeltaDebugger(lambda c: False).ddmin(range(4))
+
+    def test_resume_from_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache")
+            tested = []
+
+            def test(config):
+                tested.append(config)
+                if len(tested) == 4:
+                    # the device did not come back
+                    raise RuntimeError()
+                return 5 in config
+
+            with self.assertRaises(RuntimeError):
+                DeltaDebugger(test, ResultCache(path), "calls").ddmin(range(8))
+
+            fresh = DeltaDebugger(lambda c: 5 in c)
+            fresh.ddmin(range(8))
+            dd = DeltaDebugger(lambda c: 5 in c, ResultCache(path), "calls")
+            self.assertEqual(dd.ddmin(range(8)), [5])
+            # the three finished replays are not repeated
+            self.assertEqual(dd.execs, fresh.execs - 3)
+
+    def test_subsequence(self):
+        seedseq = make_seedseq()
+        sub = seedseq.subsequence([1])
+        self.assertEqual(len(sub), 1)
+        self.assertEqual(sub.dependencies()[0].dump_id, 0)
+        # the source of the dependency was dropped
+        self.assertFalse(sub.has_value_dependencies())
+
+        sub = seedseq.subsequence([0, 1])
+        valdep = sub.dependencies()[1].value_dependencies[0]
+        self.assertIs(valdep.src_ioctl_call, sub.dependencies()[0])
+        self.assertIsNot(sub.dependencies()[0], seedseq.dependencies()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
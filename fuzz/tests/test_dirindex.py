@@ -0,0 +1,86 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from fuzz.dirindex import DirIndex, RACY_NS
+from fuzz.fmt_recovery.recindex import ONLEAVE, recording_paths, recordings
+from fuzz.utils import find_dirs, find_files
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"\x00")
+
+
+def age(root):
+    """Backdates the directories below `root` so their listings are
+    trusted."""
+    for dir_path, _, _ in os.walk(root):
+        st = os.stat(dir_path)
+        os.utime(dir_path, ns=(st.st_atime_ns, st.st_mtime_ns - 2 * RACY_NS))
+
+
+class DirIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        for dump_id in ("0", "1"):
+            for direction in ("onenter", "onleave"):
+                d = os.path.join(self.root, dump_id, direction)
+                touch(os.path.join(d, "param_0_data"))
+                touch(os.path.join(d, "param_0_data.types"))
+                touch(os.path.join(d, "req"))
+                touch(os.path.join(d, "HAL_foo_1", "param_1_a"))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    @unittest.skipIf(shutil.which("find") is None, "no find")
+    def test_like_find(self):
+        for what in (".*/param_.*", ".*/\\(resp\\|req\\)", "*", ".*"):
+            out = subprocess.check_output(
+                ["find", self.root, "-regex", what, "-type", "f"]
+            )
+            self.assertEqual(
+                sorted(find_files(self.root, what)), sorted(out.split())
+            )
+        out = subprocess.check_output(
+            ["find", self.root, "-iname", "hal_*", "-type", "d"]
+        )
+        self.assertEqual(
+            sorted(find_dirs(self.root, "hal_*")), sorted(out.split())
+        )
+
+    def test_invalidation(self):
+        age(self.root)
+        index = DirIndex()
+        nfiles = len(list(index.files(self.root)))
+        nlisted = index.nlisted
+        self.assertEqual(len(list(index.files(self.root))), nfiles)
+        self.assertEqual(index.nlisted, nlisted)
+
+        # only the changed directory is listed again
+        touch(os.path.join(self.root, "1", "onleave", "resp"))
+        self.assertEqual(len(list(index.files(self.root))), nfiles + 1)
+        self.assertEqual(index.nlisted, nlisted + 1)
+
+    def test_recordings(self):
+        paths = recording_paths("optee", self.root)
+        self.assertEqual(len(paths), 4)
+        self.assertTrue(all(p.endswith(b"/param_0_data") for p in paths))
+
+        recs = recordings("qsee", self.root, direction=ONLEAVE, dump_id="1")
+        self.assertEqual(len(recs), 1)
+        self.assertEqual(recs[0].name, "req")
+        self.assertEqual(
+            recs[0].path, os.fsencode(os.path.join(self.root, "1/onleave/req"))
+        )
+        with self.assertRaises(ValueError):
+            recordings("sgx", self.root)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.fmt_recovery.pipeline import (
+    PIPELINE_FILE,
+    default_stages,
+    load_state,
+    process_dir,
+    run_pipeline,
+)
+
+
+def typify(tee, ioctl_dir):
+    for root, _, files in os.walk(ioctl_dir):
+        for name in files:
+            if name.startswith("param_"):
+                with open(os.path.join(root, f"{name}.types"), "w") as f:
+                    f.write(tee)
+
+
+def count(tee, ioctl_dir):
+    path = os.path.join(ioctl_dir, "match.stats")
+    n = 0
+    if os.path.isfile(path):
+        with open(path) as f:
+            n = int(f.read())
+    with open(path, "w") as f:
+        f.write(str(n + 1))
+
+
+def fail(tee, ioctl_dir):
+    if ioctl_dir.endswith("bad"):
+        raise ValueError("broken recording")
+
+
+STAGES = [("TYPIFY", typify), ("COUNT", count), ("FAIL", fail)]
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(data)
+
+
+def runs(ioctl_dir):
+    with open(os.path.join(ioctl_dir, "match.stats")) as f:
+        return int(f.read())
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.seq_dir = os.path.join(self._tmp.name, "out")
+        for name in ("a", "b", "bad"):
+            write(os.path.join(self.seq_dir, name, "0", "param_0_data"), name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_incremental(self):
+        result = run_pipeline("optee", self.seq_dir, jobs=2, stages=STAGES)
+        self.assertEqual(result, (2, 0, [os.path.join(self.seq_dir, "bad")]))
+        a = os.path.join(self.seq_dir, "a")
+        self.assertEqual(
+            load_state(a)["stages"], ["TYPIFY", "COUNT", "FAIL"]
+        )
+        self.assertTrue(os.path.isfile(os.path.join(a, PIPELINE_FILE)))
+
+        # nothing changed
+        self.assertEqual(process_dir("optee", a, STAGES), [])
+        self.assertEqual(runs(a), 1)
+
+        # a new recording
+        write(os.path.join(a, "1", "param_0_data"), "new")
+        self.assertEqual(len(process_dir("optee", a, STAGES)), 3)
+        self.assertEqual(runs(a), 2)
+        ran = process_dir("optee", a, STAGES, force=True)
+        self.assertEqual(ran[0], "TYPIFY")
+
+    def test_cache(self):
+        cache_dir = self.seq_dir
+        run_pipeline("optee", cache_dir, stages=STAGES)
+
+        # a fresh copy of the recordings
+        seq_dir = os.path.join(self._tmp.name, "fresh")
+        write(os.path.join(seq_dir, "a", "0", "param_0_data"), "a")
+        write(os.path.join(seq_dir, "b", "0", "param_0_data"), "changed")
+        result = run_pipeline(
+            "optee", seq_dir, stages=STAGES, cache_dir=cache_dir
+        )
+        self.assertEqual(result, (1, 1, []))
+        types_path = os.path.join(seq_dir, "a", "0", "param_0_data.types")
+        self.assertTrue(os.path.isfile(types_path))
+
+    def test_default_stages(self):
+        stages = default_stages(jobs=1)
+        self.assertEqual(
+            [name for name, _ in stages],
+            ["TYPIFY", "MATCH", "COMMON_SEQ", "SZ_OFF", "VAL_DEPS"],
+        )
+        # nested in the pipeline's pool, COMMON_SEQ has to run inline
+        self.assertEqual(dict(stages)["COMMON_SEQ"].keywords, {"jobs": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
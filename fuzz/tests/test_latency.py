@@ -0,0 +1,48 @@
+import unittest
+
+from fuzz.runner.latency import LatencyTracker, latency_key, percentile
+from fuzz.tests.test_clone import make_invoke_arg
+
+
+class LatencyTrackerTest(unittest.TestCase):
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_timeout(self):
+        tracker = LatencyTracker(
+            k=4, min_timeout=0.1, max_timeout=10.0, min_samples=4
+        )
+        # too few samples
+        for _ in range(3):
+            tracker.record(1, 0.05)
+        self.assertEqual(tracker.timeout(1), 10.0)
+        tracker.record(1, 0.05)
+        self.assertAlmostEqual(tracker.timeout(1), 0.2)
+        self.assertTrue(tracker.is_adaptive(tracker.timeout(1)))
+
+        # fast commands get the minimum, slow ones the maximum
+        for _ in range(4):
+            tracker.record(2, 0.001)
+            tracker.record(3, 5.0)
+        self.assertEqual(tracker.timeout(2), 0.1)
+        self.assertEqual(tracker.timeout(3), 10.0)
+        self.assertFalse(tracker.is_adaptive(tracker.timeout(3)))
+
+        # timeouts push the deadline up
+        tracker.record_timeout(1, 0.2)
+        self.assertAlmostEqual(tracker.timeout(1), 0.8)
+        stats = tracker.stats()
+        self.assertEqual(stats["#latencykeys"], 3)
+        self.assertEqual(stats["timeout_min_ms"], 100.0)
+        self.assertEqual(stats["timeout_max_ms"], 10000.0)
+
+    def test_latency_key(self):
+        self.assertEqual(latency_key(make_invoke_arg(3)), 3)
+        self.assertIsNone(latency_key(object()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import importlib.util
+import os
+import socket
+import tempfile
+import unittest
+
+from fuzz.runner.recovery import (
+    HARDRESET,
+    REBOOT,
+    RECONNECT,
+    RESTART,
+    RecoveryException,
+    RecoveryPolicy,
+)
+from fuzz.runner.runner import Runner
+from fuzz.runner.seqrunner import SequenceRunner
+from fuzz.runner.sessionmeta import OPTEESessionMetaData
+from fuzz.tests.test_runner_batch import EchoExecutor
+from fuzz.utils import p32, u32
+
+
+class FakeTarget(object):
+    """Becomes healthy with the tiers in `cures`."""
+
+    def __init__(self, cures):
+        self.cures = cures
+        self.healthy = False
+        self.attempts = []
+
+    def tiers(self):
+        return {
+            tier: (lambda tier=tier: self._act(tier))
+            for tier in (RECONNECT, RESTART, REBOOT, HARDRESET)
+        }
+
+    def _act(self, tier):
+        self.attempts.append(tier)
+        if tier == RESTART and tier not in self.cures:
+            raise ConnectionRefusedError()
+        self.healthy = tier in self.cures
+
+    def probe(self):
+        return self.healthy
+
+
+class RecoveryPolicyTest(unittest.TestCase):
+    def test_escalation(self):
+        target = FakeTarget({REBOOT, HARDRESET})
+        policy = RecoveryPolicy(target.tiers(), target.probe)
+        self.assertEqual(policy.recover(), REBOOT)
+        self.assertEqual(target.attempts, [RECONNECT, RESTART, REBOOT])
+        stats = policy.stats()
+        self.assertEqual(stats[RESTART]["attempts"], 1)
+        self.assertEqual(stats[RESTART]["successes"], 0)
+        self.assertEqual(stats[REBOOT]["successes"], 1)
+
+        target.attempts = []
+        self.assertEqual(policy.recover(weakest=REBOOT), REBOOT)
+        self.assertEqual(target.attempts, [REBOOT])
+
+        target.cures = set()
+        with self.assertRaises(RecoveryException):
+            policy.recover(weakest=HARDRESET)
+
+    def test_skips_useless_tiers(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            path = os.path.join(out_dir, "recovery.json")
+            target = FakeTarget({RESTART})
+            policy = RecoveryPolicy(target.tiers(), target.probe, path)
+            for _ in range(8):
+                target.healthy = False
+                self.assertEqual(policy.recover(), RESTART)
+
+            # reconnecting never helped, it costs more than restarting now
+            policy = RecoveryPolicy(target.tiers(), target.probe, path)
+            self.assertGreater(
+                policy.expected_cost(RECONNECT), policy.expected_cost(RESTART)
+            )
+            target.attempts = []
+            target.healthy = False
+            self.assertEqual(policy.recover(), RESTART)
+            self.assertEqual(target.attempts, [RESTART])
+
+
+class FakeForkserver(EchoExecutor):
+    """Accepts the status connection once, like `fsrv_serve`, and reports
+    on it after every data connection."""
+
+    def __init__(self, nconns=1):
+        super().__init__(nconns)
+        self.status_listener = socket.socket()
+        self.status_listener.bind(("127.0.0.1", 0))
+        self.status_listener.listen(1)
+        self.status_port = self.status_listener.getsockname()[1]
+
+    def run(self):
+        status_sock, _ = self.status_listener.accept()
+        with status_sock:
+            for _ in range(self.nconns):
+                sock, _ = self.listener.accept()
+                with sock:
+                    self._serve(sock)
+                status_sock.sendall(p32(0))
+        self.status_listener.close()
+        self.listener.close()
+
+
+@unittest.skipUnless(importlib.util.find_spec("adb"), "no adb")
+class ReconnectTest(unittest.TestCase):
+    def test_keeps_status_connection(self):
+        from fuzz.runner.baserunner import BaseRunner
+
+        fsrv = FakeForkserver(nconns=2)
+        fsrv.start()
+        target = BaseRunner.__new__(BaseRunner)
+        target._seqrunner = seqrunner = SequenceRunner(
+            "127.0.0.1", fsrv.status_port
+        )
+        target._runner = Runner(
+            "127.0.0.1",
+            fsrv.port,
+            OPTEESessionMetaData("00" * 16),
+            persistent=2,
+        )
+        with target._runner:
+            target._runner.run(b"A")
+        # ends the open session
+        target._reconnect()
+        self.assertIs(target._seqrunner, seqrunner)
+        self.assertEqual(u32(seqrunner._reader.read_exact(4, timeout=5)), 0)
+
+        with target._runner:
+            self.assertEqual(bytes(target._runner.run(b"B")[1]), b"B")
+        target._runner.close()
+        self.assertEqual(u32(seqrunner._reader.read_exact(4, timeout=5)), 0)
+        fsrv.join(5)
+        self.assertEqual(len(fsrv.sessions), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
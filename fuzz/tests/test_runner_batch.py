@@ -0,0 +1,89 @@
+import unittest
+import socket
+import threading
+
+from fuzz.const import TEEZZ_CMD
+from fuzz.runner.runner import Runner, RunnerStatus
+from fuzz.runner.sessionmeta import OPTEESessionMetaData
+from fuzz.utils import p32, u32
+
+
+def recv_exact(sock, sz):
+    out = b""
+    while len(out) < sz:
+        chunk = sock.recv(sz - len(out))
+        if not chunk:
+            raise ConnectionResetError()
+        out += chunk
+    return out
+
+
+class EchoExecutor(threading.Thread):
+    """Echoes every input of `TEEZZ_CMD_SEND` and `TEEZZ_CMD_SEND_BATCH`."""
+
+    def __init__(self, nconns=1):
+        super().__init__(daemon=True)
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.nconns = nconns
+        # commands received, one list per connection
+        self.sessions = []
+
+    def _reply(self, sock, inp):
+        sock.sendall(p32(RunnerStatus.EXECUTOR_SUCCESS) + p32(len(inp)) + inp)
+
+    def _serve(self, sock):
+        cmds = []
+        self.sessions.append(cmds)
+        while True:
+            cmd = recv_exact(sock, 1)
+            data = recv_exact(sock, u32(recv_exact(sock, 4)))
+            cmds.append(cmd)
+            if cmd == TEEZZ_CMD.TEEZZ_CMD_SEND:
+                self._reply(sock, data)
+            elif cmd == TEEZZ_CMD.TEEZZ_CMD_SEND_BATCH:
+                pos = 0
+                while pos < len(data):
+                    sz = u32(data[pos : pos + 4])
+                    self._reply(sock, data[pos + 4 : pos + 4 + sz])
+                    pos += 4 + sz
+            elif cmd == TEEZZ_CMD.TEEZZ_CMD_END:
+                break
+
+    def run(self):
+        for _ in range(self.nconns):
+            sock, _ = self.listener.accept()
+            with sock:
+                self._serve(sock)
+        self.listener.close()
+
+
+class RunnerBatchTest(unittest.TestCase):
+    def test_run_batch(self):
+        executor = EchoExecutor()
+        executor.start()
+        inps = [b"A" * 8, b"", b"B" * 4096, b"C"]
+        runner = Runner(
+            "127.0.0.1", executor.port, OPTEESessionMetaData("00" * 16)
+        )
+        with runner:
+            for inp, (status, response) in zip(inps, runner.run_batch(inps)):
+                self.assertEqual(status, RunnerStatus.EXECUTOR_SUCCESS)
+                self.assertEqual(bytes(response), inp)
+        executor.join(5)
+        self.assertEqual(
+            executor.sessions,
+            [
+                [
+                    TEEZZ_CMD.TEEZZ_CMD_START,
+                    TEEZZ_CMD.TEEZZ_CMD_SEND_BATCH,
+                    TEEZZ_CMD.TEEZZ_CMD_END,
+                ]
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from fuzz.const import TEEZZ_CMD
+from fuzz.runner.runner import Runner
+from fuzz.runner.sessionmeta import OPTEESessionMetaData
+from fuzz.tests.test_runner_batch import EchoExecutor
+
+
+class RunnerPersistentTest(unittest.TestCase):
+    def test_persistent(self):
+        executor = EchoExecutor(nconns=3)
+        executor.start()
+        runner = Runner(
+            "127.0.0.1",
+            executor.port,
+            OPTEESessionMetaData("00" * 16),
+            persistent=2,
+        )
+        # the first two sequences share a session
+        for _ in range(2):
+            with runner:
+                self.assertEqual(bytes(runner.run(b"A")[1]), b"A")
+        # the third one is cut short by a recycle
+        with runner:
+            runner.run(b"B")
+            runner.recycle()
+        with runner:
+            runner.run(b"C")
+        runner.close()
+        executor.join(5)
+
+        start, send, end = (
+            TEEZZ_CMD.TEEZZ_CMD_START,
+            TEEZZ_CMD.TEEZZ_CMD_SEND,
+            TEEZZ_CMD.TEEZZ_CMD_END,
+        )
+        self.assertEqual(
+            executor.sessions,
+            [[start, send, send, end], [start, send, end], [start, send, end]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import random
+import unittest
+
+from fuzz.scheduler.scheduler import (
+    FastScheduler,
+    SchedulerException,
+    UniformScheduler,
+    make_scheduler,
+)
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_uniform_matches_random_choice(self):
+        scheduler = UniformScheduler()
+        population = list(range(10))
+        for _ in population:
+            scheduler.add(4, 0.1)
+
+        random.seed(1)
+        picks = [scheduler.choose() for _ in range(100)]
+        nmutations = scheduler.nmutations(0, 4)
+        random.seed(1)
+        expected = [random.choice(population) for _ in range(100)]
+        self.assertEqual(picks, expected)
+        self.assertEqual(nmutations, random.randint(1, 4))
+
+    def test_fast_favors_productive_and_fast(self):
+        scheduler = FastScheduler()
+        slow = scheduler.add(4, 1.0)
+        fast = scheduler.add(4, 0.1)
+        productive = scheduler.add(4, 1.0)
+        for _ in range(5):
+            scheduler.report(productive, 1.0, found=True, timed_out=False)
+        self.assertGreater(scheduler.energy(fast), scheduler.energy(slow))
+        self.assertGreater(
+            scheduler.energy(productive), scheduler.energy(slow)
+        )
+
+        random.seed(1)
+        picks = [scheduler.choose() for _ in range(1000)]
+        self.assertGreater(picks.count(fast), picks.count(slow))
+        self.assertGreater(picks.count(productive), picks.count(slow))
+
+    def test_fast_timeouts_lower_energy(self):
+        scheduler = FastScheduler()
+        idx = scheduler.add(4, 0.1)
+        energy = scheduler.energy(idx)
+        scheduler.report(idx, 5.0, found=False, timed_out=True)
+        self.assertAlmostEqual(scheduler.energy(idx), energy / 2)
+
+    def test_restored_energy(self):
+        scheduler = FastScheduler()
+        idx = scheduler.add(energy=0.5)
+        self.assertEqual(scheduler.energy(idx), 0.5)
+        for _ in range(20):
+            n = scheduler.nmutations(idx, 4)
+            self.assertTrue(1 <= n <= 4 * FastScheduler.MAX_MUTATIONS_FACTOR)
+
+    def test_make_scheduler(self):
+        self.assertIsInstance(make_scheduler("fast"), FastScheduler)
+        with self.assertRaises(SchedulerException):
+            make_scheduler("nope")
+        with self.assertRaises(SchedulerException):
+            make_scheduler("uniform").choose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from fuzz.optee.opteedata import TeeIoctlInvokeArg
+from fuzz.seed import seedpack
+from fuzz.seed.seedsequence import SeedSequence
+from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
+from fuzz.tests.test_clone import make_seedseq
+
+
+class SeedPackTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp = self._tmp.name
+        self.seedseq = make_seedseq()
+        self.seedseq[0].input.params[0].types = SeedTemplate(
+            4, [SeedTemplateElement(0, 4, "uint32_t")]
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def assertSameSequence(self, seedseq):
+        self.assertEqual(seedseq.to_files(), self.seedseq.to_files())
+        self.assertEqual(seedseq.digest(), self.seedseq.digest())
+        types = seedseq[0].input.params[0].types
+        self.assertEqual(types.typed_chunks, [(0, 4, "uint32_t")])
+
+    def test_roundtrip(self):
+        for compression in (
+            seedpack.COMPRESSION_NONE,
+            seedpack.COMPRESSION_ZLIB,
+        ):
+            path = os.path.join(self.tmp, f"seq{compression}")
+            self.seedseq.store_packed(path, compression)
+            self.assertNotIn(f".seq{compression}.tmp", os.listdir(self.tmp))
+            self.assertSameSequence(
+                SeedSequence.load_sequence(TeeIoctlInvokeArg, path)
+            )
+
+    def test_legacy_layout(self):
+        seq_dir = os.path.join(self.tmp, "dir")
+        self.seedseq.store_sequence(seq_dir)
+        self.assertEqual(seedpack.read_tree(seq_dir), self.seedseq.to_files())
+
+        # folder -> file -> folder
+        seq_path = os.path.join(self.tmp, "packed")
+        seedpack.store(seq_path, seedpack.read_tree(seq_dir))
+        self.assertSameSequence(
+            SeedSequence.load_sequence(TeeIoctlInvokeArg, seq_path)
+        )
+        unpacked_dir = os.path.join(self.tmp, "unpacked")
+        seedpack.write_tree(unpacked_dir, seedpack.load(seq_path))
+        self.assertSameSequence(
+            SeedSequence.load_sequence(TeeIoctlInvokeArg, unpacked_dir)
+        )
+
+    def test_bad_magic(self):
+        with self.assertRaises(seedpack.SeedPackException):
+            seedpack.unpack(b"XXXX\x01\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()
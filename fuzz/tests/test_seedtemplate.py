@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
+
+
+class SeedTemplateTest(unittest.TestCase):
+    def test_layout(self):
+        tmpl = SeedTemplate(32)
+        tmpl.add_elems(
+            [
+                SeedTemplateElement(16, 20, "uint32_t"),
+                SeedTemplateElement(4, 8, "uint32_t"),
+                SeedTemplateElement(8, 16, "uint64_t"),
+            ]
+        )
+        self.assertEqual([e.start for e in tmpl.listify()], [4, 8, 16])
+        self.assertEqual(
+            tmpl.typed_chunks,
+            [(4, 4, "uint32_t"), (8, 8, "uint64_t"), (16, 4, "uint32_t")],
+        )
+        self.assertEqual(tmpl.untyped_chunks, [(0, 4)])
+
+        tmpl.add_elem(SeedTemplateElement(24, 28, "int"))
+        self.assertEqual(tmpl.untyped_chunks, [(0, 4), (20, 24)])
+
+    def test_collision(self):
+        tmpl = SeedTemplate(32, [SeedTemplateElement(8, 16, "uint64_t")])
+        for start, end in [(8, 16), (10, 12), (4, 12), (12, 20), (0, 32)]:
+            with self.assertRaises(ValueError):
+                tmpl.add_elem(SeedTemplateElement(start, end, "int"))
+        tmpl.add_elem(SeedTemplateElement(4, 8, "int"))
+        tmpl.add_elem(SeedTemplateElement(16, 20, "int"))
+
+    def test_pickle(self):
+        tmpl = SeedTemplate(16, [SeedTemplateElement(4, 8, "uint32_t")])
+        restored = pickle.loads(pickle.dumps(tmpl))
+        self.assertEqual(restored.listify(), tmpl.listify())
+        self.assertEqual(restored.untyped_chunks, [(0, 4)])
+
+    def test_legacy_pickle_state(self):
+        # templates used to keep a dict of elements keyed by their start
+        elem = SeedTemplateElement.__new__(SeedTemplateElement)
+        elem.__setstate__({"start": 4, "end": 8, "type": "uint32_t"})
+        tmpl = SeedTemplate.__new__(SeedTemplate)
+        tmpl.__setstate__({"_size": 16, "_elements": {4: elem}})
+        self.assertEqual(tmpl.typed_chunks, [(4, 4, "uint32_t")])
+        tmpl.add_elem(SeedTemplateElement(0, 4, "uint32_t"))
+        self.assertEqual(len(tmpl.listify()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import socket
+import threading
+
+from fuzz.runner.sockreader import SocketReader
+from fuzz.utils import p32, u32
+
+
+class SocketReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.host_sock, self.target_sock = socket.socketpair()
+
+    def tearDown(self):
+        self.host_sock.close()
+        self.target_sock.close()
+
+    def test_read_exact_chunks(self):
+        reader = SocketReader(self.host_sock, bufsize=16)
+        payload = bytes(range(256)) * 64
+        msg = p32(42) + p32(len(payload)) + payload
+
+        # send the message in tiny pieces to exercise buffering and growth
+        def send():
+            for i in range(0, len(msg), 7):
+                self.target_sock.sendall(msg[i : i + 7])
+
+        t = threading.Thread(target=send)
+        t.start()
+        self.assertEqual(u32(reader.read_exact(4, timeout=5)), 42)
+        sz = u32(reader.read_exact(4, timeout=5))
+        self.assertEqual(sz, len(payload))
+        self.assertEqual(bytes(reader.read_exact(sz, timeout=5)), payload)
+        self.assertEqual(reader.buffered, 0)
+        t.join()
+
+    def test_timeout(self):
+        reader = SocketReader(self.host_sock)
+        self.target_sock.sendall(b"\x00\x01")
+        with self.assertRaises(socket.timeout):
+            reader.read_exact(4, timeout=0.1)
+
+    def test_closed_connection(self):
+        reader = SocketReader(self.host_sock)
+        self.target_sock.close()
+        with self.assertRaises(socket.timeout):
+            reader.read_exact(4, timeout=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
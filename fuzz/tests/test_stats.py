@@ -0,0 +1,52 @@
+import os
+import json
+import tempfile
+import unittest
+
+from fuzz.stats import STATS, StatsWriter
+
+
+class StatsWriterTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.out_dir = self._tmp.name
+        self._saved = dict(STATS)
+
+    def tearDown(self):
+        STATS.update(self._saved)
+        self._tmp.cleanup()
+
+    def test_flush_and_resume(self):
+        writer = StatsWriter(self.out_dir, interval=3600)
+        self.assertFalse(writer.due())
+        self.assertEqual(writer.load(), {})
+
+        STATS["#interactions"] = 100
+        writer.flush(10.0, {"#covtuples": 3})
+        STATS["#interactions"] = 300
+        writer.flush(20.0, {"#covtuples": 4})
+        writer.close()
+
+        with open(os.path.join(self.out_dir, "stats.json")) as f:
+            stats = json.load(f)
+        self.assertEqual(stats["#interactions"], 300)
+        self.assertEqual(stats["#covtuples"], 4)
+        self.assertEqual(stats["execs_per_sec"], 15.0)
+        with open(os.path.join(self.out_dir, "plot_data")) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith("# elapsed_time,"))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2].split(",")[0], "20.00")
+
+        STATS["#interactions"] = 0
+        stats = StatsWriter(self.out_dir).load()
+        self.assertEqual(STATS["#interactions"], 300)
+        self.assertEqual(stats["elapsed_time"], 20.0)
+
+    def test_due(self):
+        writer = StatsWriter(self.out_dir, interval=0)
+        self.assertTrue(writer.due())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import pickle
+import random
+import tempfile
+import unittest
+from difflib import SequenceMatcher
+
+from fuzz.fmt_recovery.common_sequence import common_sequence
+from fuzz.fmt_recovery.substrings import SubstringIndex
+from fuzz.fmt_recovery.typify import typify
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class SubstringIndexTest(unittest.TestCase):
+    def test_like_sequence_matcher(self):
+        rnd = random.Random(0)
+        for _ in range(500):
+            alphabet = rnd.sample(range(256), rnd.choice([2, 3, 8]))
+            a, b = (
+                bytes(rnd.choice(alphabet) for _ in range(rnd.randrange(200)))
+                for _ in range(2)
+            )
+            common = os.urandom(rnd.randrange(4, 150))
+            a, b = a[:20] + common + a[20:], b[:90] + common + b[90:]
+
+            index = SubstringIndex()
+            index.add("a", a)
+            matcher = SequenceMatcher(None, a, b, autojunk=False)
+            expected = [
+                tuple(m) for m in matcher.get_matching_blocks() if m.size >= 4
+            ]
+            self.assertEqual(index.matching_blocks(b)["a"], expected)
+
+    def test_accept(self):
+        index = SubstringIndex()
+        index.add(0, b"foobarbaz")
+        index.add(1, b"xxbarbazyy")
+        self.assertEqual(
+            index.runs(b"_barbaz_"), {0: [(3, 1, 6)], 1: [(2, 1, 6)]}
+        )
+        self.assertEqual(
+            index.runs(b"_barbaz_", lambda key: key > 0), {1: [(2, 1, 6)]}
+        )
+        with self.assertRaises(ValueError):
+            index.add(0, b"")
+
+    def test_common_sequence(self):
+        token = b"\x13\x37\xca\xfe\xba\xbe\x00\x42\xde\xad\xbe\xef"
+        with tempfile.TemporaryDirectory() as ioctl_dir:
+            resp_path = os.path.join(ioctl_dir, "0/onleave/param_0_data")
+            req_path = os.path.join(ioctl_dir, "1/onenter/param_0_data")
+            write(resp_path, b"\x01" + token + b"\x00" * 4)
+            write(req_path, b"\x02\x03" + token)
+            # requests only match responses of earlier dumps
+            write(os.path.join(ioctl_dir, "1/onleave/param_0_data"), token)
+            typify("optee", ioctl_dir)
+            common_sequence("optee", ioctl_dir, jobs=1)
+
+            for path, start in ((resp_path, 1), (req_path, 2)):
+                with open(f"{path}.types", "rb") as f:
+                    self.assertEqual(
+                        pickle.load(f).typed_chunks, [(start, 12, "uint8_t*")]
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
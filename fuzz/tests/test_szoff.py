@@ -0,0 +1,52 @@
+import os
+import pickle
+import struct
+import tempfile
+import unittest
+
+from fuzz.fmt_recovery.sz_off import find_sz_off, process_param
+from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
+
+
+def fields(matches):
+    return [(e.start, e.end, e.type) for e in matches]
+
+
+class SzOffTest(unittest.TestCase):
+    def test_offset_and_length(self):
+        # offset 0x10 with the length of the buffer it points to after it
+        data = struct.pack("<IIII", 0xFFFF, 0x10, 8, 0xFFFF) + b"\xff" * 8
+        types = {16: (8, "uint8_t*")}
+        len_matches, off_matches = find_sz_off(data, types)
+        self.assertEqual(fields(off_matches), [(4, 8, "off_t")])
+        self.assertEqual(fields(len_matches), [(8, 12, "size_t")])
+
+    def test_string_length(self):
+        data = b"\xff\xff" + struct.pack("<Q", 5) + b"hello" + b"\x00"
+        self.assertEqual(find_sz_off(data, {}, 8), ([], []))
+        len_matches, _ = find_sz_off(data, {}, 8, aligned=False)
+        self.assertEqual(fields(len_matches), [(2, 10, "size_t")])
+        len_matches, _ = find_sz_off(b"\x05\x00hello", {}, 2)
+        self.assertEqual(fields(len_matches), [(0, 2, "size_t")])
+
+    def test_process_param(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "param_0_data")
+            data = struct.pack("<I", 12) + b"\xff" * 8
+            with open(path, "wb") as f:
+                f.write(data)
+            tmpl = SeedTemplate(len(data))
+            tmpl.add_elem(SeedTemplateElement(4, 12, "uint8_t*"))
+            with open(f"{path}.types", "wb") as f:
+                pickle.dump(tmpl, f)
+
+            process_param(os.fsencode(path))
+            with open(f"{path}.types", "rb") as f:
+                self.assertEqual(
+                    pickle.load(f).typed_chunks,
+                    [(0, 4, "size_t"), (4, 8, "uint8_t*")],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
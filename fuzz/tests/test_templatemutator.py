@@ -0,0 +1,52 @@
+import random
+import unittest
+
+from fuzz.mutation.templatemutator import TemplateMutator
+from fuzz.tests.bench_templatemutator import (
+    LegacyTemplateMutator,
+    keymaster_blob,
+)
+
+PROTO = "fuzz.proto.KeymasterDevice_pb2"
+
+
+class TemplateMutatorTest(unittest.TestCase):
+    def setUp(self):
+        self.mutator = TemplateMutator(PROTO)
+        random.seed(0)
+        self.data, self.types = keymaster_blob(4096)
+
+    def test_matches_legacy_engine(self):
+        legacy = LegacyTemplateMutator(PROTO)
+        for seed in range(50):
+            random.seed(seed)
+            expected = legacy.mutate(self.data, self.types)
+            random.seed(seed)
+            mutant = self.mutator.mutate(self.data, self.types)
+            self.assertEqual(mutant, expected)
+
+            random.seed(seed)
+            expected = legacy.mutate(self.data)
+            random.seed(seed)
+            self.assertEqual(self.mutator.mutate(self.data), expected)
+
+    def test_mutate_batch(self):
+        mutants = self.mutator.mutate_batch(self.data, self.types, 16)
+        self.assertEqual(len(mutants), 16)
+        for mutant in mutants:
+            self.assertIsInstance(mutant, bytes)
+            self.assertEqual(len(mutant), len(self.data))
+        self.assertNotEqual(set(mutants), {self.data})
+
+    def test_field_mutator_resolved_once(self):
+        mutator = self.mutator._field_mutator("uint32_t")
+        self.assertIs(self.mutator._field_mutator("uint32_t"), mutator)
+        self.assertIs(mutator, TemplateMutator._mutate_numeric)
+
+        buf = bytearray(4)
+        self.mutator._field_mutator("bool")(buf, 0, 1)
+        self.assertEqual(buf, b"\x01\x00\x00\x00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from fuzz.mutation.trimmer import SequenceTrimmer, TrimAborted
+from fuzz.optee.opteedata import TeeIoctlInvokeArg
+from fuzz.seed.seed import Seed
+from fuzz.seed.seedsequence import SeedSequence
+from fuzz.seed.seedtemplate import SeedTemplate, SeedTemplateElement
+from fuzz.tests.test_clone import make_invoke_arg, make_seedseq
+
+
+def make_plain_seedseq(funcs):
+    seeds = []
+    for i, func in enumerate(funcs):
+        invoke_arg = make_invoke_arg(func)
+        invoke_arg.params[0].data = b"A" * 64
+        invoke_arg.params[0].c_struct.b = 64
+        seeds.append(Seed(TeeIoctlInvokeArg, i, invoke_arg, invoke_arg))
+    return SeedSequence(seeds)
+
+
+def funcs(seedseq):
+    return [seed.input.func for seed in seedseq]
+
+
+class TrimmerTest(unittest.TestCase):
+    def test_trim(self):
+        seedseq = make_plain_seedseq([1, 2, 1, 3, 1, 1])
+
+        def check(candidate):
+            # same set of commands, command 1 needs 16 bytes of data
+            return set(funcs(candidate)) == {1, 2, 3} and all(
+                len(seed.input.params[0].data) >= 16
+                for seed in candidate
+                if seed.input.func == 1
+            )
+
+        trimmer = SequenceTrimmer(check)
+        trimmed = trimmer.trim(seedseq)
+        self.assertEqual(funcs(trimmed), [1, 2, 3])
+        self.assertEqual(len(trimmed[0].input.params[0].data), 16)
+        self.assertEqual(trimmed[0].input.params[0].c_struct.b, 16)
+        self.assertEqual(len(trimmed[1].input.params[0].data), 4)
+        # the original is untouched
+        self.assertEqual(funcs(seedseq), [1, 2, 1, 3, 1, 1])
+        self.assertEqual(len(seedseq[0].input.params[0].data), 64)
+
+    def test_trim_typed_data(self):
+        seedseq = make_plain_seedseq([1])
+        types = SeedTemplate(
+            64,
+            [
+                SeedTemplateElement(0, 4, "uint32_t"),
+                SeedTemplateElement(4, 12, "uint64_t"),
+                SeedTemplateElement(32, 64, "uint8_t*"),
+            ],
+        )
+        seedseq[0].input.params[0].types = types
+
+        trimmed = SequenceTrimmer(lambda c: True).trim(seedseq)
+        param = trimmed[0].input.params[0]
+        self.assertEqual(len(param.data), 4)
+        self.assertEqual(param.types.size, 4)
+        self.assertEqual(param.types.typed_chunks, [(0, 4, "uint32_t")])
+        # serializing checks the template against the data
+        TeeIoctlInvokeArg.serialize_obj_to_files(trimmed[0].input)
+        # the original template is untouched
+        self.assertEqual(types.size, 64)
+        self.assertEqual(len(types.typed_chunks), 3)
+
+    def test_budget_and_abort(self):
+        seedseq = make_plain_seedseq([1, 1, 1, 1])
+        trimmer = SequenceTrimmer(lambda c: True, max_execs=1)
+        self.assertEqual(len(trimmer.trim(seedseq)), 2)
+        self.assertEqual(trimmer.execs, 1)
+
+        def abort(candidate):
+            raise TrimAborted()
+
+        self.assertIs(SequenceTrimmer(abort).trim(seedseq), seedseq)
+
+    def test_value_dependencies(self):
+        seedseq = make_seedseq()
+        self.assertFalse(SequenceTrimmer.is_removable(seedseq, 0))
+        self.assertTrue(SequenceTrimmer.is_removable(seedseq, 1))
+
+        # the source of the dependency has to stay
+        trimmed = SequenceTrimmer(lambda c: True).trim(seedseq)
+        self.assertEqual(funcs(trimmed), [0])
+        self.assertEqual(len(trimmed.dependencies()), 1)
+        self.assertEqual(len(seedseq.dependencies()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import argparse
 import logging
-from fuzz.runner.triagerunner import TriageRunner
+import sys
+from fuzz.runner.triagerunner import TriageRunner, TriageRunnerException
 
 
 FORMAT = (
@@ -48,6 +49,16 @@ def setup_args():
         action="store_true",
         help="Reboot device after every sequence.",
     )
+    parent_parser.add_argument(
+        "-m",
+        "--minimize",
+        action="store_true",
+        help="Minimize the crashing seq instead of replaying it once.",
+    )
+    parent_parser.add_argument(
+        "--original",
+        help="Seq dir the crash was mutated from, to minimize the mutated bytes.",
+    )
 
     # required arguments
     parent_parser.add_argument(
@@ -84,7 +95,17 @@ def main():
     args = arg_parser.parse_args()
 
     runner = args.func(args)
-    runner.triage(args.crash_seq_dir)
+    if args.minimize:
+        try:
+            runner.minimize(args.crash_seq_dir, args.original)
+        except TriageRunnerException as e:
+            # the replays done so far are cached
+            log.error(f"{e} Rerun with the same arguments to resume.")
+            runner._terminate()
+            sys.exit(1)
+        runner._terminate()
+    else:
+        runner.triage(args.crash_seq_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+"""Delta debugging (Zeller's ddmin) with a persistent cache of test results.
+
+Replaying a crash on a device is expensive, it often takes a reboot. The
+cache makes sure no configuration is tested twice. As ddmin is
+deterministic, a minimization that was interrupted, e.g., because the
+device did not come back after a reset, resumes where it stopped when run
+again with the same cache: the tests it already did are answered from the
+cache.
+"""
+from __future__ import annotations
+import json
+import logging
+import os
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+log = logging.getLogger(__name__)
+
+
+class DDMinException(Exception):
+    pass
+
+
+class ResultCache(object):
+    """Test results by stage and configuration, appended to the JSON-lines
+    file `path` if given."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._results: Dict[Tuple[str, Tuple[int, ...]], bool] = {}
+        if path and os.path.isfile(path):
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # cut short while writing
+                        continue
+                    key = (entry["stage"], tuple(entry["config"]))
+                    self._results[key] = entry["result"]
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, stage: str, config: Tuple[int, ...]) -> Optional[bool]:
+        return self._results.get((stage, config))
+
+    def put(self, stage: str, config: Tuple[int, ...], result: bool):
+        self._results[(stage, config)] = result
+        if self._path:
+            entry = {"stage": stage, "config": list(config), "result": result}
+            with open(self._path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+class DeltaDebugger(object):
+    """Minimizes a configuration, i.e., a list of item indices, with respect
+    to `test`.
+
+    `test` gets a configuration and returns `True` if it still triggers the
+    failure. `stage` names the kind of items in the cache, so one cache can
+    hold the tests of several minimizations.
+    """
+
+    def __init__(
+        self,
+        test: Callable[[Tuple[int, ...]], bool],
+        cache: Optional[ResultCache] = None,
+        stage: str = "",
+    ):
+        self._test = test
+        self._cache = cache if cache is not None else ResultCache()
+        self._stage = stage
+        # tests that were actually executed, i.e., not cached
+        self.execs = 0
+
+    def test(self, config: Sequence[int]) -> bool:
+        config = tuple(sorted(config))
+        if not config:
+            return False
+        result = self._cache.get(self._stage, config)
+        if result is None:
+            self.execs += 1
+            result = bool(self._test(config))
+            self._cache.put(self._stage, config, result)
+        return result
+
+    @staticmethod
+    def _split(config: List[int], n: int) -> List[List[int]]:
+        chunks = []
+        start = 0
+        for i in range(n):
+            end = start + (len(config) - start) // (n - i)
+            chunks.append(config[start:end])
+            start = end
+        return chunks
+
+    def ddmin(self, config: Sequence[int]) -> List[int]:
+        """Returns a 1-minimal subset of `config` that still fails."""
+        config = sorted(config)
+        if not self.test(config):
+            raise DDMinException("The full configuration does not fail.")
+
+        n = 2
+        while len(config) >= 2:
+            chunks = self._split(config, n)
+            reduced = False
+            for chunk in chunks:
+                if self.test(chunk):
+                    config, n, reduced = chunk, 2, True
+                    break
+            # with two chunks, the complements are the chunks themselves
+            if not reduced and n > 2:
+                for chunk in chunks:
+                    complement = [i for i in config if i not in chunk]
+                    if self.test(complement):
+                        config, n, reduced = complement, max(n - 1, 2), True
+                        break
+            if not reduced:
+                if n >= len(config):
+                    break
+                n = min(2 * n, len(config))
+        log.debug(f"ddmin: {len(config)} items left after {self.execs} execs")
+        return config
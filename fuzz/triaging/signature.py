@@ -0,0 +1,110 @@
+"""Crash signatures from TEE logs.
+
+A signature identifies a bug independently of the crash that triggered it.
+It is built from the backtrace the TEE logs when a TA aborts, normalized to
+what stays the same across crashes of the same bug:
+
+- TC (`hisi_teelog`, `/proc/tzlog`) logs symbolized frames, e.g.,
+
+      ====backtraces:
+              #[0] task_keymaster(km_import_key+0x00000034)
+              #[1] task_keymaster(TA_InvokeCommandEntryPoint+0x00000180)
+              #[3] Wrong Address
+      ==============Task Crash=============
+
+  Frames are reduced to `task!function`, offsets and invalid frames are
+  dropped.
+- OP-TEE logs raw addresses below `Call stack:`. TAs are loaded at
+  randomized, page-aligned addresses, so only the page offset of a frame
+  is kept, prefixed with the TA's UUID.
+
+If the log holds no backtrace, e.g., for the tcp target, the caller falls
+back to the coverage tuple of the crashing interaction.
+"""
+from __future__ import annotations
+import hashlib
+import re
+
+from collections import Counter
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+
+# number of innermost frames a signature is built from
+MAX_FRAMES = 5
+
+_TC_BACKTRACE = re.compile(
+    r"The PC which.*?====backtraces:\s*\n(.*?)\n[^\n]*?=+\s*Task Crash",
+    re.DOTALL,
+)
+_TC_FRAME = re.compile(r"#\[\d+\]\s+(\S+?)\((\w+)(?:\+0x[0-9a-fA-F]+)?\)")
+
+_OPTEE_UUID = re.compile(
+    r"Status of TA ([0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})"
+)
+_OPTEE_CALL_STACK = re.compile(
+    r"Call stack:\s*\n((?:.*0x[0-9a-fA-F]+.*\n?)+)", re.MULTILINE
+)
+_OPTEE_FRAME = re.compile(r"0x([0-9a-fA-F]+)")
+
+
+class Signature(NamedTuple):
+    # short hash of `frames`, used as bucket name
+    id: str
+    frames: Tuple[str, ...]
+
+    def __str__(self) -> str:
+        return f"{self.id} " + " <- ".join(self.frames)
+
+
+def make_signature(frames: List[str]) -> Signature:
+    frames = tuple(frames[:MAX_FRAMES])
+    digest = hashlib.sha1("\n".join(frames).encode()).hexdigest()
+    return Signature(digest[:12], frames)
+
+
+def tc_backtraces(log_text: str) -> List[List[str]]:
+    """Returns the normalized frames of every TC backtrace in `log_text`."""
+    backtraces = []
+    for match in _TC_BACKTRACE.finditer(log_text.replace("\x00", "")):
+        frames = [
+            f"{task}!{func}"
+            for task, func in _TC_FRAME.findall(match.group(1))
+        ]
+        if frames:
+            backtraces.append(frames)
+    return backtraces
+
+
+def optee_backtraces(log_text: str) -> List[List[str]]:
+    """Returns the normalized frames of every OP-TEE call stack in
+    `log_text`."""
+    uuids = _OPTEE_UUID.findall(log_text)
+    uuid = uuids[-1] if uuids else "?"
+    backtraces = []
+    for match in _OPTEE_CALL_STACK.finditer(log_text):
+        frames = [
+            f"{uuid}!{int(addr, 16) & 0xFFF:#05x}"
+            for addr in _OPTEE_FRAME.findall(match.group(1))
+        ]
+        if frames:
+            backtraces.append(frames)
+    return backtraces
+
+
+def log_signature(log_text: str) -> Optional[Signature]:
+    """Returns the signature of the backtrace logged most often in
+    `log_text`, the first one logged on a tie, `None` if there is no
+    backtrace."""
+    for parse in (tc_backtraces, optee_backtraces):
+        backtraces = Counter(
+            make_signature(frames) for frames in parse(log_text)
+        )
+        if backtraces:
+            return backtraces.most_common(1)[0][0]
+    return None
+
+
+def coverage_signature(coverage: Tuple[Any]) -> Signature:
+    """Returns a signature for a crash without backtrace from the coverage
+    tuple of the crashing interaction."""
+    return make_signature([f"coverage!{coverage}"])
@@ -1,35 +1,68 @@
 import struct
 import os
 import errno
-import subprocess
-
-from typing import List
+import fnmatch
+import functools
+import re
+
+from typing import Dict, Iterator, List, Mapping, Pattern
+
+from fuzz.dirindex import INDEX
+
+
+@functools.lru_cache(maxsize=None)
+def _find_regex(what: str) -> Pattern[bytes]:
+    """Translates the emacs regular expression of `find -regex` to a Python
+    one. Groups and alternatives are escaped, e.g., `\\(a\\|b\\)`."""
+    out = []
+    i = 0
+    while i < len(what):
+        c = what[i]
+        if c == "\\" and i + 1 < len(what):
+            nxt = what[i + 1]
+            out.append(nxt if nxt in "(|){}" else c + nxt)
+            i += 2
+            continue
+        if c == "[":
+            # copy the bracket expression, a leading ']' is part of it
+            j = i + 1
+            if j < len(what) and what[j] == "^":
+                j += 1
+            if j < len(what) and what[j] == "]":
+                j += 1
+            j = what.find("]", j)
+            if j == -1:
+                raise ValueError(f"unterminated bracket in {what!r}")
+            out.append(what[i : j + 1].replace("\\", "\\\\"))
+            i = j + 1
+            continue
+        if c in "(|){}":
+            out.append("\\" + c)
+        elif c in "*+?" and (not out or out[-1] in ("(", "|")):
+            # an operator without operand is literal
+            out.append("\\" + c)
+        else:
+            out.append(c)
+        i += 1
+    return re.compile(os.fsencode("".join(out)), re.DOTALL)
 
 
-def find_files(where: str, what: str) -> List[str]:
-    cmd = ["find", where, "-regex", what, "-type", "f"]
-    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    d = p.stdout.read()
-    p.wait()
-    p.stdout.close()
-    p.stderr.close()
-    if not d:
-        return []
-    paths = [line for line in d.split(b"\n") if line]
-    return paths
+def find_files(where: str, what: str) -> List[bytes]:
+    """Returns the paths of the files in `where` matching `what` like
+    `find where -regex what -type f`."""
+    regex = _find_regex(what)
+    return [path for path in INDEX.files(where) if regex.fullmatch(path)]
 
 
-def find_dirs(where, what):
-    cmd = ["find", where, "-iname", what, "-type", "d"]
-    p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    d = p.stdout.read()
-    p.wait()
-    p.stdout.close()
-    p.stderr.close()
-    if not d:
-        return []
-    paths = [line for line in d.split(b"\n") if line]
-    return paths
+def find_dirs(where: str, what: str) -> List[bytes]:
+    """Returns the paths of the directories in `where` whose name matches
+    `what` like `find where -iname what -type d`."""
+    pattern = os.fsencode(what).lower()
+    return [
+        path
+        for path in INDEX.dirs(where)
+        if fnmatch.fnmatchcase(os.path.basename(path).lower(), pattern)
+    ]
 
 
 def p8(v):
@@ -78,3 +111,36 @@ def mkdir_p(path):
             pass
         else:
             raise
+
+
+class FolderFiles(Mapping[str, bytes]):
+    """Read-only mapping of file names to the contents of the files in
+    `path`. Files are read when they are accessed."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __getitem__(self, name: str) -> bytes:
+        try:
+            with open(os.path.join(self.path, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(name)
+
+    def __contains__(self, name) -> bool:
+        return os.path.isfile(os.path.join(self.path, name))
+
+    def __iter__(self) -> Iterator[str]:
+        for name in os.listdir(self.path):
+            if os.path.isfile(os.path.join(self.path, name)):
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+def write_files(path: str, files: Dict[str, bytes]):
+    """Writes the contents of `files` (file name -> content) to `path`."""
+    for name, data in files.items():
+        with open(os.path.join(path, name), "wb") as f:
+            f.write(data)